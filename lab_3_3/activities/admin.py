@@ -6,13 +6,45 @@ from .models import (
     Kudos,
     Follower,
     ActivityPoint,
+    ActivityTrack,
+    ActivityStreamLevel,
+    Segment,
+    SegmentEffort,
     UserMonthlyStats
 )
 
 admin.site.register(Activity)
 admin.site.register(Profile)
-admin.site.register(Comment)
-admin.site.register(Kudos)
 admin.site.register(Follower)
 admin.site.register(ActivityPoint)
-admin.site.register(UserMonthlyStats)
\ No newline at end of file
+admin.site.register(ActivityTrack)
+admin.site.register(ActivityStreamLevel)
+admin.site.register(UserMonthlyStats)
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('id', '__str__', 'parent_comment_id', 'created_at')
+    # __str__ читає user.username — один JOIN замість запиту на кожен рядок
+    list_select_related = ('user',)
+    raw_id_fields = ('activity', 'user', 'parent_comment')
+
+
+@admin.register(Kudos)
+class KudosAdmin(admin.ModelAdmin):
+    list_display = ('id', '__str__', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('activity', 'user')
+
+
+@admin.register(Segment)
+class SegmentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'activity_type', 'distance_m', 'created_at')
+    raw_id_fields = ('created_by',)
+    exclude = ('polyline',)
+
+
+@admin.register(SegmentEffort)
+class SegmentEffortAdmin(admin.ModelAdmin):
+    list_display = ('id', '__str__', 'started_at', 'elapsed_sec')
+    raw_id_fields = ('segment', 'activity', 'user')
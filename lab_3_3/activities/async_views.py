@@ -0,0 +1,89 @@
+from django.http import HttpResponse, JsonResponse, Http404
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache import AnalyticsCache
+from .pagination import encode_cursor, decode_cursor, parse_limit, split_page
+from .renderers import ColumnarJSONRenderer, columnar_payload, dumps
+from .repositories import AnalyticsRepository, social_cursor_key
+from .summaries import build_analytics_payload, parse_include
+from .views import AnalyticsViewSet
+
+# Компактний JSON без екранування, як у DRF JSONRenderer
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+# Ті самі запити й поля, що й у відповідних діях AnalyticsViewSet:
+# назва -> (метод репозиторію, поля, колонки статистики, колонка групування)
+ASYNC_ENDPOINTS = {
+    'leaderboard': (
+        'get_leaderboard', ['rank', 'username', 'total_distance', 'activities_count'], ['total_distance'], None,
+    ),
+    'social_engagement': (
+        'get_social_activities',
+        ['id', 'user__username', 'comments_count', 'kudos_count', 'engagement_score'],
+        ['engagement_score', 'comments_count', 'kudos_count'],
+        None,
+    ),
+    'monthly_trends': ('get_monthly_activity_stats', None, ['total_distance', 'avg_duration'], None),
+    'influencers': (
+        'get_influential_users',
+        ['username', 'followers_count', 'pagerank', 'mutual_count', 'community_id'],
+        ['followers_count', 'pagerank'],
+        None,
+    ),
+    'communities': (
+        'get_communities', ['community_id', 'members', 'total_followers', 'max_pagerank'], ['members'], None,
+    ),
+    'activity_performance': ('get_activity_type_performance', None, ['avg_distance', 'max_elevation'], None),
+    'user_levels': ('get_user_activity_levels', None, ['activities_count'], 'status'),
+}
+
+
+@require_GET
+async def analytics_endpoint(request, name):
+    """Асинхронна (ASGI) версія /api/analytics/<name>/ з тією ж формою JSON."""
+    if name not in ASYNC_ENDPOINTS:
+        raise Http404(f"Unknown analytics endpoint: {name}")
+
+    method, fields, stats_columns, group_by_col = ASYNC_ENDPOINTS[name]
+    repository = AnalyticsRepository()
+    include = parse_include(request.GET.get('include'))
+    columnar = request.GET.get('format') == ColumnarJSONRenderer.format
+    if columnar:
+        include.add('dataset')
+
+    if name == 'social_engagement':
+        try:
+            after = social_cursor_key(decode_cursor(request.GET.get('cursor'), 2))
+            limit = parse_limit(request.GET.get('limit'))
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400, json_dumps_params=JSON_PARAMS)
+
+        method = 'get_social_activities_page'
+        page = await AnalyticsCache().aget_or_compute(
+            method, lambda: repository.afetch(method, after=after, limit=limit),
+            kwargs={'after': after, 'limit': limit}
+        )
+        rows, has_more = split_page(page, limit)
+        payload = build_analytics_payload(
+            rows, fields, stats_columns, group_by_col, include_dataset='none' not in include
+        )
+        payload['next_cursor'] = (
+            encode_cursor(rows[-1]['engagement_score'], rows[-1]['id']) if has_more else None
+        )
+    else:
+        try:
+            kwargs = AnalyticsViewSet._leaderboard_top_params(request.GET) if name == 'leaderboard' else {}
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400, json_dumps_params=JSON_PARAMS)
+
+        rows = await AnalyticsCache().aget_or_compute(
+            method, lambda: repository.afetch(method, **kwargs), kwargs=kwargs or None
+        )
+        payload = build_analytics_payload(
+            rows, fields, stats_columns, group_by_col, include_dataset='dataset' in include
+        )
+
+    if columnar:
+        return HttpResponse(dumps(columnar_payload(payload)), content_type=ColumnarJSONRenderer.media_type)
+    return JsonResponse(payload, encoder=JSONEncoder, json_dumps_params=JSON_PARAMS)
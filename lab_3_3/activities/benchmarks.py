@@ -0,0 +1,346 @@
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+import django
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .pooling import close_pools, init_process, is_pooled, pool_stats, process_context
+from .repositories import AnalyticsRepository
+from .routers import use_database
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ('queries', 'api')
+MODES = ('threads', 'processes', 'asyncio')
+CONNECTION_MODES = ('reuse', 'per-request')
+PERCENTILES = (50, 95, 99)
+
+# Ендпоінт API -> метод AnalyticsRepository, що стоїть за ним
+ENDPOINTS = {
+    'leaderboard': 'get_top_distance_users',
+    'social_engagement': 'get_social_activities',
+    'monthly_trends': 'get_monthly_activity_stats',
+    'influencers': 'get_influential_users',
+    'activity_performance': 'get_activity_type_performance',
+    'user_levels': 'get_user_activity_levels',
+}
+
+
+def _call_query(name):
+    # Без кешу: вимірюємо саму БД
+    list(getattr(AnalyticsRepository(), ENDPOINTS[name])())
+    return True
+
+
+def _call_api(name):
+    from .views import AnalyticsViewSet
+
+    request = APIRequestFactory().get(f'/api/analytics/{name}/')
+    force_authenticate(request, user=User(username='benchmark'))
+    response = AnalyticsViewSet.as_view({'get': name})(request)
+    response.render()
+    return response.status_code < 400
+
+
+async def _acall_query(name):
+    await AnalyticsRepository().afetch(ENDPOINTS[name])
+    return True
+
+
+async def _acall_api(name):
+    from .async_views import analytics_endpoint
+
+    response = await analytics_endpoint(AsyncRequestFactory().get(f'/api/async/analytics/{name}/'), name)
+    return response.status_code < 400
+
+
+CALLS = {'queries': _call_query, 'api': _call_api}
+ASYNC_CALLS = {'queries': _acall_query, 'api': _acall_api}
+
+
+def timed_call(target, name, per_request, database=DEFAULT_DB_ALIAS):
+    """Один запит робочого навантаження: (name, ok, latency_s). Модульна функція — щоб працював pickle для процесів."""
+    start = time.perf_counter()
+    try:
+        with use_database(database):
+            ok = CALLS[target](name)
+    except Exception:
+        logger.exception("Benchmark call %s/%s failed", target, name)
+        ok = False
+    finally:
+        if per_request:
+            close_connection(database)
+    return name, ok, time.perf_counter() - start
+
+
+def close_connection(database=DEFAULT_DB_ALIAS):
+    # Для пулу close() лише повертає з'єднання у пул
+    connections[database].close()
+
+
+class BenchmarkSuite:
+    """
+    Відтворює реальне навантаження (запити AnalyticsRepository або API-ендпоінти)
+    з різними моделями конкурентності та стратегіями з'єднань.
+
+    Кожен сценарій — (ціль, режим, конкурентність, з'єднання): спершу warmup
+    невимірюваних викликів, далі repetitions прогонів по requests викликів.
+    """
+
+    def __init__(self, targets=('queries',), modes=('threads',), concurrency=(1, 4, 16),
+                 connection_modes=CONNECTION_MODES, requests=200, warmup=20, repetitions=3, endpoints=None,
+                 databases=(DEFAULT_DB_ALIAS,)):
+        self.targets = tuple(targets)
+        self.modes = tuple(modes)
+        self.concurrency = tuple(concurrency)
+        self.connection_modes = tuple(connection_modes)
+        self.requests = requests
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.endpoints = tuple(endpoints or ENDPOINTS)
+        self.databases = tuple(databases)
+
+        unknown = (set(self.targets) - set(TARGETS)) | (set(self.modes) - set(MODES)) \
+            | (set(self.connection_modes) - set(CONNECTION_MODES)) | (set(self.endpoints) - set(ENDPOINTS)) \
+            | (set(self.databases) - set(settings.DATABASES))
+        if unknown:
+            raise ValueError(f"Unknown benchmark options: {', '.join(sorted(unknown))}")
+
+    def scenarios(self):
+        return itertools.product(self.databases, self.targets, self.modes, self.concurrency, self.connection_modes)
+
+    def _plan(self, total):
+        return [self.endpoints[i % len(self.endpoints)] for i in range(total)]
+
+    def _run_pool(self, executor, database, target, per_request):
+        call = partial(timed_call, target, per_request=per_request, database=database)
+
+        list(executor.map(call, self._plan(self.warmup)))
+        runs = []
+        for _ in range(self.repetitions):
+            start = time.perf_counter()
+            results = list(executor.map(call, self._plan(self.requests)))
+            runs.append((results, time.perf_counter() - start))
+        return runs
+
+    def _run_threads(self, database, target, concurrency, per_request):
+        opened = []
+        lock = threading.Lock()
+
+        def remember_connection():
+            with lock:
+                opened.append(connections[database])
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, initializer=remember_connection) as executor:
+            runs = self._run_pool(executor, database, target, per_request)
+
+        # З'єднання живуть у потоках пулу — закриваємо їх тут, щоб не лишати висячих сесій
+        for conn in opened:
+            conn.inc_thread_sharing()
+            try:
+                conn.close()
+            finally:
+                conn.dec_thread_sharing()
+        return runs
+
+    def _run_processes(self, database, target, concurrency, per_request):
+        # Дочірні процеси не повинні успадкувати відкритий сокет чи пул батька
+        connections.close_all()
+        close_pools()
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=concurrency, mp_context=process_context(), initializer=init_process
+        ) as executor:
+            return self._run_pool(executor, database, target, per_request)
+
+    async def _run_asyncio(self, database, target, concurrency, per_request):
+        semaphore = asyncio.Semaphore(concurrency)
+        call = ASYNC_CALLS[target]
+        # Закриває з'єднання потоку, в якому async ORM виконує запити
+        close = sync_to_async(partial(close_connection, database))
+
+        async def timed(name):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    with use_database(database):
+                        ok = await call(name)
+                except Exception:
+                    logger.exception("Benchmark call %s/%s failed", target, name)
+                    ok = False
+                finally:
+                    if per_request:
+                        await close()
+                return name, ok, time.perf_counter() - start
+
+        await asyncio.gather(*(timed(name) for name in self._plan(self.warmup)))
+        runs = []
+        for _ in range(self.repetitions):
+            start = time.perf_counter()
+            results = await asyncio.gather(*(timed(name) for name in self._plan(self.requests)))
+            runs.append((results, time.perf_counter() - start))
+        await close()
+        return runs
+
+    def run_scenario(self, database, target, mode, concurrency, connection_mode):
+        per_request = connection_mode == 'per-request'
+        pool_stats(database, reset=True)
+        if mode == 'asyncio':
+            runs = asyncio.run(self._run_asyncio(database, target, concurrency, per_request))
+        elif mode == 'processes':
+            runs = self._run_processes(database, target, concurrency, per_request)
+        else:
+            runs = self._run_threads(database, target, concurrency, per_request)
+
+        result = self.summarize(database, target, mode, concurrency, connection_mode, runs)
+        # Пули дочірніх процесів недоступні звідси — метрики пулу лише для потоків і asyncio
+        if mode != 'processes' and result['pooled']:
+            result['pool'] = pool_stats(database, reset=True)
+        return result
+
+    def summarize(self, database, target, mode, concurrency, connection_mode, runs):
+        results = [row for rows, _ in runs for row in rows]
+        latencies = np.array([latency for _, ok, latency in results if ok]) * 1000
+        throughputs = [sum(1 for _, ok, _ in rows if ok) / wall if wall > 0 else 0.0 for rows, wall in runs]
+
+        per_endpoint = {}
+        for name in self.endpoints:
+            values = np.array([latency for n, ok, latency in results if ok and n == name]) * 1000
+            per_endpoint[name] = percentiles(values)
+
+        return {
+            'database': database,
+            'pooled': is_pooled(database),
+            'target': target,
+            'mode': mode,
+            'concurrency': concurrency,
+            'connections': connection_mode,
+            'requests': self.requests,
+            'repetitions': self.repetitions,
+            'throughput': round(float(np.median(throughputs)), 2) if throughputs else 0.0,
+            'throughput_runs': [round(value, 2) for value in throughputs],
+            'mean_ms': round(float(latencies.mean()), 3) if len(latencies) else None,
+            **percentiles(latencies),
+            'errors': sum(1 for _, ok, _ in results if not ok),
+            'per_endpoint': per_endpoint,
+        }
+
+    def metadata(self):
+        return {
+            'created_at': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'parameters': {
+                'targets': self.targets,
+                'modes': self.modes,
+                'concurrency': self.concurrency,
+                'connections': self.connection_modes,
+                'requests': self.requests,
+                'warmup': self.warmup,
+                'repetitions': self.repetitions,
+                'endpoints': self.endpoints,
+                'databases': self.databases,
+            },
+        }
+
+    def run(self, progress=None):
+        report = {'meta': self.metadata(), 'results': []}
+        for scenario in self.scenarios():
+            result = self.run_scenario(*scenario)
+            report['results'].append(result)
+            if progress is not None:
+                progress(result)
+        return report
+
+
+def percentiles(values_ms):
+    if not len(values_ms):
+        return {f'p{q}_ms': None for q in PERCENTILES}
+    return {f'p{q}_ms': round(float(value), 3) for q, value in zip(PERCENTILES, np.percentile(values_ms, PERCENTILES))}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def results_dir():
+    return Path(getattr(settings, 'BENCHMARK_RESULTS_DIR', settings.BASE_DIR / 'benchmark_results'))
+
+
+def save_report(report, path=None):
+    if path is None:
+        stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+        path = results_dir() / f"{stamp}-{report['meta'].get('commit') or 'nogit'}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    return path
+
+
+def list_reports():
+    """Імена збережених прогонів, найновіші першими."""
+    directory = results_dir()
+    if not directory.is_dir():
+        return []
+    return sorted((path.name for path in directory.glob('*.json')), reverse=True)
+
+
+def load_report(name):
+    """Прогін за іменем зі списку list_reports(); шлях завжди будуємо всередині results_dir()."""
+    if name not in list_reports():
+        raise FileNotFoundError(name)
+    return json.loads((results_dir() / name).read_text())
+
+
+def load_report_file(name_or_path):
+    """Для CLI (--compare): довільний файл звіту або ім'я збереженого прогону."""
+    path = Path(name_or_path)
+    if path.is_file():
+        return json.loads(path.read_text())
+    return load_report(path.name)
+
+
+def compare_reports(baseline, current):
+    """Зміна throughput і p95 (у %) для сценаріїв, присутніх в обох прогонах."""
+    def key(row):
+        return row.get('database', DEFAULT_DB_ALIAS), row['target'], row['mode'], row['concurrency'], row['connections']
+
+    def change(old, new):
+        if old in (None, 0) or new is None:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    before = {key(row): row for row in baseline['results']}
+    return [
+        {
+            'scenario': key(row),
+            'throughput_change_pct': change(before[key(row)]['throughput'], row['throughput']),
+            'p95_change_pct': change(before[key(row)]['p95_ms'], row['p95_ms']),
+        }
+        for row in current['results'] if key(row) in before
+    ]
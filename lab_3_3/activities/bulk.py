@@ -0,0 +1,44 @@
+from django.db import connection
+
+
+def supports_copy():
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+def copy_rows(model, fields, rows, batch_size=5000):
+    """
+    Записує кортежі значень (у порядку fields) у таблицю моделі.
+
+    На Postgres з psycopg 3 використовує COPY FROM STDIN, інакше — bulk_create
+    пакетами по batch_size. Сигнали моделі не надсилаються.
+    """
+    if supports_copy():
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(name).column) for name in fields
+        )
+        table = connection.ops.quote_name(model._meta.db_table)
+        written = 0
+        with connection.cursor() as cursor:
+            with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    written += 1
+        return written
+
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(model(**dict(zip(fields, row))))
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            written += len(batch)
+            batch = []
+
+    if batch:
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        written += len(batch)
+
+    return written
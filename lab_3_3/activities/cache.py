@@ -0,0 +1,128 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class AnalyticsCache:
+    """
+    Кеш результатів аналітичних запитів у Django cache framework.
+
+    Ключі містять "покоління" (generation): інвалідація — це один incr лічильника,
+    після чого всі старі записи просто перестають читатися і вмирають по TTL.
+    """
+
+    PREFIX = 'analytics'
+    DEFAULT_TIMEOUT = 300
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')]
+        self.timeouts = getattr(settings, 'ANALYTICS_CACHE_TIMEOUTS', {})
+
+    @property
+    def _generation_key(self):
+        return f'{self.PREFIX}:generation'
+
+    def _stat_key(self, kind):
+        return f'{self.PREFIX}:stats:{kind}'
+
+    def _incr(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, None):
+                return 1
+            return self.cache.incr(key)
+
+    def generation(self):
+        value = self.cache.get(self._generation_key)
+        if value is None:
+            self.cache.add(self._generation_key, 1, None)
+            value = self.cache.get(self._generation_key, 1)
+        return value
+
+    def invalidate(self):
+        return self._incr(self._generation_key)
+
+    def timeout_for(self, name):
+        return self.timeouts.get(name, self.timeouts.get('default', self.DEFAULT_TIMEOUT))
+
+    def _make_key(self, generation, name, args=(), kwargs=None):
+        params = repr((args, sorted((kwargs or {}).items())))
+        digest = hashlib.md5(params.encode()).hexdigest()
+        return f'{self.PREFIX}:{generation}:{name}:{digest}'
+
+    def key(self, name, args=(), kwargs=None):
+        return self._make_key(self.generation(), name, args, kwargs)
+
+    def get_or_compute(self, name, compute, args=(), kwargs=None):
+        key = self.key(name, args, kwargs)
+        value = self.cache.get(key)
+        if value is not None:
+            self._incr(self._stat_key('hits'))
+            return value
+
+        self._incr(self._stat_key('misses'))
+        value = compute()
+        self.cache.set(key, value, self.timeout_for(name))
+        return value
+
+    async def _aincr(self, key):
+        try:
+            return await self.cache.aincr(key)
+        except ValueError:
+            if await self.cache.aadd(key, 1, None):
+                return 1
+            return await self.cache.aincr(key)
+
+    async def ageneration(self):
+        value = await self.cache.aget(self._generation_key)
+        if value is None:
+            await self.cache.aadd(self._generation_key, 1, None)
+            value = await self.cache.aget(self._generation_key, 1)
+        return value
+
+    async def aget_or_compute(self, name, compute, args=(), kwargs=None):
+        """Асинхронний варіант get_or_compute; compute — фабрика корутини."""
+        key = self._make_key(await self.ageneration(), name, args, kwargs)
+        value = await self.cache.aget(key)
+        if value is not None:
+            await self._aincr(self._stat_key('hits'))
+            return value
+
+        await self._aincr(self._stat_key('misses'))
+        value = await compute()
+        await self.cache.aset(key, value, self.timeout_for(name))
+        return value
+
+    def stats(self):
+        hits = self.cache.get(self._stat_key('hits'), 0)
+        misses = self.cache.get(self._stat_key('misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+            'generation': self.generation(),
+        }
+
+    def reset_stats(self):
+        self.cache.delete_many([self._stat_key('hits'), self._stat_key('misses')])
+
+
+class CachedAnalyticsRepository:
+    """Обгортка над AnalyticsRepository: кожен get_* матеріалізується у list і кешується."""
+
+    def __init__(self, repository, cache=None):
+        self.repository = repository
+        self.cache = cache or AnalyticsCache()
+
+    def __getattr__(self, name):
+        attr = getattr(self.repository, name)
+        if not name.startswith('get_') or not callable(attr):
+            return attr
+
+        def cached(*args, **kwargs):
+            return self.cache.get_or_compute(name, lambda: list(attr(*args, **kwargs)), args, kwargs)
+
+        return cached
@@ -0,0 +1,180 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, FloatField, Max, Sum
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+from .cache import AnalyticsCache
+from .models import Activity, CohortActivityStats, CohortProfileStats, CohortViewRefresh, Profile
+
+ALL_TYPES = CohortActivityStats.ALL_TYPES
+DIMENSIONS = ('country', 'age_band', 'gender', 'activity_type')
+PROFILE_DIMENSIONS = ('country', 'age_band', 'gender')
+AGE_BANDS = ('<18', '18-24', '25-34', '35-44', '45-54', '55-64', '65+', 'unknown')
+
+
+def parse_dimensions(value, allowed, default=('country',)):
+    """?group_by=country,age_band -> кортеж вимірів; ValueError для невідомих."""
+    dimensions = tuple(dict.fromkeys(part.strip() for part in (value or '').split(',') if part.strip()))
+    unknown = [dimension for dimension in dimensions if dimension not in allowed]
+    if unknown:
+        raise ValueError(f"group_by must be a comma-separated subset of: {', '.join(allowed)}")
+    return dimensions or default
+
+
+def _ratio(numerator, denominator):
+    return Cast(numerator, FloatField()) / NullIf(denominator, 0)
+
+
+class CohortAnalytics:
+    """
+    Розрізи активностей за демографією профілю (країна, вікова група, стать) і типом активності.
+
+    Join Profile x Activity рахується не на запит, а в матеріалізованих представленнях (міграція 0014):
+    API агрегує вже згорнуті когорти — тисячі рядків замість усієї таблиці Activity. Представлення
+    оновлює refresh(): REFRESH MATERIALIZED VIEW CONCURRENTLY, тож читання не блокуються. На інших СУБД
+    представлення звичайні й завжди актуальні.
+    """
+
+    VIEWS = (CohortActivityStats, CohortProfileStats)
+
+    @staticmethod
+    def materialized():
+        return connection.vendor == 'postgresql'
+
+    @staticmethod
+    def max_age():
+        return getattr(settings, 'COHORT_VIEWS_MAX_AGE', 3600)
+
+    @staticmethod
+    def state():
+        return CohortViewRefresh.objects.exclude(mode='skipped').order_by('-id').first()
+
+    @classmethod
+    def is_populated(cls):
+        """Чи наповнені представлення (після міграції вони WITH NO DATA і читання з них — помилка)."""
+        return all(cls.populated_views().values())
+
+    @classmethod
+    def populated_views(cls):
+        """{db_table: наповнене?} для кожного представлення; без Postgres — завжди True."""
+        tables = [model._meta.db_table for model in cls.VIEWS]
+        if not cls.materialized():
+            return dict.fromkeys(tables, True)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT matviewname, ispopulated FROM pg_matviews WHERE matviewname = ANY(%s)", [tables])
+            populated = dict(cursor.fetchall())
+        return {table: populated.get(table, False) for table in tables}
+
+    @staticmethod
+    def sources():
+        """Знімок джерел для перевірки змін: кількість і найбільший id активностей та профілів."""
+        activities = Activity.objects.aggregate(total=Count('id'), last_id=Max('id'))
+        profiles = Profile.objects.aggregate(total=Count('id'), last_id=Max('id'))
+        return {
+            'activities': activities['total'],
+            'last_activity_id': activities['last_id'],
+            'profiles': profiles['total'],
+            'last_profile_id': profiles['last_id'],
+        }
+
+    @classmethod
+    def freshness(cls):
+        if not cls.materialized():
+            return {'materialized': False, 'refreshed_at': None, 'age_sec': None, 'stale': False}
+        previous = cls.state()
+        if previous is None:
+            return {'materialized': True, 'refreshed_at': None, 'age_sec': None, 'stale': True}
+        age = (timezone.now() - previous.created_at).total_seconds()
+        return {
+            'materialized': True,
+            'refreshed_at': previous.created_at,
+            'age_sec': round(age, 1),
+            'stale': age > cls.max_age(),
+        }
+
+    @classmethod
+    def refresh(cls, force=False, max_age=None):
+        """
+        Оновлює обидва представлення, якщо вони застарілі: змінилися кількість чи найбільший id
+        активностей або профілів, або з останнього оновлення минуло більше max_age секунд (редагування
+        наявних рядків знімок не змінює — їх наздоганяє max_age). force — оновити без перевірок.
+        """
+        started = time.perf_counter()
+        max_age = cls.max_age() if max_age is None else max_age
+        sources = cls.sources()
+        previous = cls.state()
+        views = cls.populated_views()
+        populated = all(views.values())
+
+        if not force and previous is not None and populated:
+            unchanged = all(getattr(previous, field) == value for field, value in sources.items())
+            if unchanged and (timezone.now() - previous.created_at).total_seconds() < max_age:
+                return cls._log('skipped', sources, started)
+
+        mode = 'live'
+        if cls.materialized():
+            # Перше наповнення (WITH NO DATA після міграції) Postgres не дозволяє робити CONCURRENTLY —
+            # таке представлення оновлюється звичайним REFRESH; далі читачі бачать старі дані до кінця оновлення
+            mode = 'concurrent' if populated else 'full'
+            with connection.cursor() as cursor:
+                for table, ready in views.items():
+                    concurrently = 'CONCURRENTLY ' if ready else ''
+                    cursor.execute(f"REFRESH MATERIALIZED VIEW {concurrently}{connection.ops.quote_name(table)}")
+        AnalyticsCache().invalidate()
+        return cls._log(
+            mode, sources, started,
+            activity_rows=CohortActivityStats.objects.count(), profile_rows=CohortProfileStats.objects.count(),
+        )
+
+    @staticmethod
+    def _log(mode, sources, started, **fields):
+        return CohortViewRefresh.objects.create(
+            mode=mode, duration_ms=round((time.perf_counter() - started) * 1000, 1), **sources, **fields,
+        )
+
+    @staticmethod
+    def _filter(queryset, filters, dimensions):
+        return queryset.filter(**{
+            dimension: filters[dimension] for dimension in dimensions if filters.get(dimension)
+        })
+
+    @classmethod
+    def breakdown(cls, group_by=('country',), **filters):
+        """
+        Підсумки активностей за вимірами group_by; фільтри — country/age_band/gender/activity_type.
+        Без activity_type у group_by читаються рядки 'all' (або рядки заданого типу), тож athletes точний:
+        користувач належить рівно одній демографічній когорті.
+        """
+        queryset = CohortActivityStats.objects.all()
+        activity_type = filters.get('activity_type')
+        if 'activity_type' in group_by:
+            queryset = queryset.exclude(activity_type=ALL_TYPES)
+            if activity_type:
+                queryset = queryset.filter(activity_type=activity_type)
+        else:
+            queryset = queryset.filter(activity_type=activity_type or ALL_TYPES)
+
+        return cls._filter(queryset, filters, PROFILE_DIMENSIONS).values(*group_by).annotate(
+            total_athletes=Sum('athletes'),
+            total_activities=Sum('activities_count'),
+            total_distance=Sum('total_distance_m'),
+            total_duration=Sum('total_duration_sec'),
+            total_elevation_gain=Sum('total_elevation_gain_m'),
+        ).annotate(
+            avg_distance=_ratio(F('total_distance'), F('total_activities')),
+            distance_per_athlete=_ratio(F('total_distance'), F('total_athletes')),
+        ).order_by('-total_distance', *group_by)
+
+    @classmethod
+    def demographics(cls, group_by=('country',), **filters):
+        """Склад когорт: кількість користувачів і середні вік/вага/зріст/ІМТ серед заповнених профілів."""
+        return cls._filter(CohortProfileStats.objects.all(), filters, PROFILE_DIMENSIONS).values(*group_by).annotate(
+            total_athletes=Sum('athletes'),
+            avg_age=_ratio(Sum('age_sum'), Sum('age_count')),
+            avg_weight_kg=_ratio(Sum('weight_kg_sum'), Sum('weight_kg_count')),
+            avg_height_cm=_ratio(Sum('height_cm_sum'), Sum('height_cm_count')),
+            avg_bmi=_ratio(Sum('bmi_sum'), Sum('bmi_count')),
+        ).order_by('-total_athletes', *group_by)
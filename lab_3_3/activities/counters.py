@@ -0,0 +1,49 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Activity, Comment, Kudos
+
+
+class EngagementCounters:
+    """Лічильники kudos_count/comments_count в Activity замість COUNT(DISTINCT) по двох JOIN."""
+
+    SOURCES = {
+        'kudos_count': Kudos,
+        'comments_count': Comment,
+    }
+
+    @staticmethod
+    def increment(activity_id, field):
+        Activity.objects.filter(pk=activity_id).update(**{field: F(field) + 1})
+
+    @staticmethod
+    def decrement(activity_id, field):
+        Activity.objects.filter(pk=activity_id).update(**{field: Greatest(F(field) - 1, 0)})
+
+    @classmethod
+    def actual_counts(cls):
+        """Вирази з фактичною кількістю рядків-джерел для кожного лічильника."""
+        return {
+            field: Coalesce(Subquery(
+                model.objects.filter(activity=OuterRef('pk')).order_by()
+                .values('activity').annotate(n=Count('id')).values('n')
+            ), 0)
+            for field, model in cls.SOURCES.items()
+        }
+
+    @classmethod
+    def drifted(cls):
+        """Активності, у яких збережений лічильник не збігається з фактичним."""
+        actual = {f'actual_{field}': expression for field, expression in cls.actual_counts().items()}
+        drift = Q()
+        for field in cls.SOURCES:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+        return Activity.objects.annotate(**actual).filter(drift)
+
+    @classmethod
+    def reconcile(cls, dry_run=False):
+        """Виправляє розбіжності; повертає кількість активностей з некоректними лічильниками."""
+        ids = list(cls.drifted().values_list('pk', flat=True))
+        if ids and not dry_run:
+            Activity.objects.filter(pk__in=ids).update(**cls.actual_counts())
+        return len(ids)
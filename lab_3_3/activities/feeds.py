@@ -0,0 +1,207 @@
+from itertools import chain, groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+
+from .models import Activity, FeedCelebrity, FeedEntry, Follower
+
+FEED_FIELDS = (
+    'id', 'user__username', 'activity_type', 'start_time',
+    'distance_m', 'duration_sec', 'kudos_count', 'comments_count',
+)
+
+
+def feed_cursor_key(cursor_values):
+    """(published_at ISO, activity_id) з курсора -> ключ keyset-пагінації."""
+    if cursor_values is None:
+        return None
+    published_at, activity_id = cursor_values
+    published_at = parse_datetime(published_at) if isinstance(published_at, str) else None
+    if published_at is None or not isinstance(activity_id, int):
+        raise ValueError("Invalid cursor")
+    return published_at, activity_id
+
+
+class FeedService:
+    """
+    Стрічка: власні активності та активності тих, на кого підписаний користувач.
+
+    Звичайний автор при збереженні активності розсилає її у FeedEntry кожного підписника
+    (fan-out-on-write). Автори з понад FEED_FANOUT_LIMIT підписників (FeedCelebrity) не розсилають —
+    їхні активності дочитуються під час запиту (fan-out-on-read). Сторінка — злиття двох
+    keyset-діапазонів за (published_at, activity_id); активності без start_time у стрічку не потрапляють.
+    """
+
+    BATCH_SIZE = 2000
+
+    @staticmethod
+    def max_length():
+        return getattr(settings, 'FEED_MAX_LENGTH', 500)
+
+    @staticmethod
+    def fanout_limit():
+        return getattr(settings, 'FEED_FANOUT_LIMIT', 10000)
+
+    @staticmethod
+    def is_celebrity(user_id):
+        return FeedCelebrity.objects.filter(pk=user_id).exists()
+
+    @classmethod
+    def mark_celebrity(cls, user_id):
+        """Позначає автора як FeedCelebrity, щойно підписників стало не менше за поріг."""
+        limit = cls.fanout_limit()
+        # count() по зрізу проходить не більше limit записів індексу followee
+        if Follower.objects.filter(followee_id=user_id).values('pk')[:limit].count() < limit:
+            return False
+        FeedCelebrity.objects.update_or_create(
+            user_id=user_id, defaults={'followers_count': Follower.objects.filter(followee_id=user_id).count()}
+        )
+        return True
+
+    @classmethod
+    def _fan_out(cls, items, owner_ids):
+        """items — [(activity_id, published_at)], owner_ids — ітератор власників стрічок."""
+        created, batch = 0, []
+        for owner_id in owner_ids:
+            batch.extend(FeedEntry(owner_id=owner_id, activity_id=pk, published_at=at) for pk, at in items)
+            if len(batch) >= cls.BATCH_SIZE:
+                FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+        return created
+
+    @staticmethod
+    def _followers(user_id, chunk_size):
+        return Follower.objects.filter(followee_id=user_id).values_list('follower_id', flat=True).iterator(
+            chunk_size=chunk_size
+        )
+
+    @classmethod
+    def publish(cls, activity):
+        if activity.start_time is None:
+            return 0
+
+        # Власна активність завжди у власній стрічці; підписникам знаменитості — лише при читанні
+        owners = [activity.user_id]
+        if not (cls.is_celebrity(activity.user_id) or cls.mark_celebrity(activity.user_id)):
+            owners = chain(owners, cls._followers(activity.user_id, cls.BATCH_SIZE))
+        with transaction.atomic():
+            return cls._fan_out([(activity.pk, activity.start_time)], owners)
+
+    @classmethod
+    def reschedule(cls, activity, old_start_time):
+        """Зміна start_time збереженої активності: перенести, прибрати або вперше розіслати."""
+        if activity.start_time == old_start_time:
+            return
+        entries = FeedEntry.objects.filter(activity_id=activity.pk)
+        if activity.start_time is None:
+            entries.delete()
+        elif old_start_time is None:
+            cls.publish(activity)
+        else:
+            entries.update(published_at=activity.start_time)
+
+    @classmethod
+    def follow(cls, follower_id, followee_id):
+        """Нова підписка: останні активності автора одразу з'являються у стрічці підписника."""
+        if cls.is_celebrity(followee_id):
+            return 0
+        recent = Activity.objects.filter(user_id=followee_id, start_time__isnull=False).order_by(
+            '-start_time', '-id'
+        ).values_list('id', 'start_time')[:cls.max_length()]
+        created = cls._fan_out(list(recent), [follower_id])
+        cls.trim([follower_id])
+        return created
+
+    @staticmethod
+    def unfollow(follower_id, followee_id):
+        return FeedEntry.objects.filter(owner_id=follower_id, activity__user_id=followee_id).delete()[0]
+
+    @classmethod
+    def trim(cls, owner_ids=None):
+        """Обрізає стрічки до FEED_MAX_LENGTH найновіших записів (ROW_NUMBER по власнику)."""
+        ranked = FeedEntry.objects.annotate(position=Window(
+            RowNumber(), partition_by=[F('owner_id')], order_by=[F('published_at').desc(), F('activity_id').desc()]
+        ))
+        if owner_ids is not None:
+            ranked = ranked.filter(owner_id__in=owner_ids)
+
+        stale = list(ranked.filter(position__gt=cls.max_length()).values_list('pk', flat=True))
+        deleted = 0
+        for start in range(0, len(stale), cls.BATCH_SIZE):
+            deleted += FeedEntry.objects.filter(pk__in=stale[start:start + cls.BATCH_SIZE]).delete()[0]
+        return deleted
+
+    @classmethod
+    def rebuild(cls):
+        """Перераховує знаменитостей і стрічки з нуля: до FEED_MAX_LENGTH останніх активностей кожного автора."""
+        limit = cls.fanout_limit()
+        with transaction.atomic():
+            FeedEntry.objects.all().delete()
+            FeedCelebrity.objects.all().delete()
+
+            FeedCelebrity.objects.bulk_create([
+                FeedCelebrity(user_id=row['followee_id'], followers_count=row['followers'])
+                for row in Follower.objects.values('followee_id').annotate(followers=Count('id')).filter(
+                    followers__gte=limit
+                ).order_by()
+            ])
+            celebrities = set(FeedCelebrity.objects.values_list('pk', flat=True))
+
+            recent = Activity.objects.filter(start_time__isnull=False).annotate(position=Window(
+                RowNumber(), partition_by=[F('user_id')], order_by=[F('start_time').desc(), F('id').desc()]
+            )).filter(position__lte=cls.max_length()).order_by('user_id').values_list('user_id', 'id', 'start_time')
+
+            for author_id, rows in groupby(recent.iterator(chunk_size=cls.BATCH_SIZE), key=itemgetter(0)):
+                items = [(pk, at) for _, pk, at in rows]
+                owners = [author_id]
+                if author_id not in celebrities:
+                    owners = chain(owners, cls._followers(author_id, cls.BATCH_SIZE))
+                cls._fan_out(items, owners)
+
+            cls.trim()
+        return FeedEntry.objects.count()
+
+    @staticmethod
+    def _before(queryset, time_field, id_field, after):
+        if after is None:
+            return queryset
+        published_at, activity_id = after
+        return queryset.filter(
+            Q(**{f'{time_field}__lt': published_at}) | Q(**{time_field: published_at, f'{id_field}__lt': activity_id})
+        )
+
+    @classmethod
+    def page(cls, user_id, after=None, limit=20):
+        """
+        (rows, has_more) для сторінки стрічки після ключа after = (published_at, activity_id).
+        Обидва джерела читаються діапазоном індексу і дають не більше limit + 1 ключів.
+        """
+        pushed = cls._before(FeedEntry.objects.filter(owner_id=user_id), 'published_at', 'activity_id', after)
+        keys = set(pushed.order_by('-published_at', '-activity_id').values_list('published_at', 'activity_id')[:limit + 1])
+
+        celebrities = list(Follower.objects.filter(
+            follower_id=user_id, followee__feed_celebrity__isnull=False
+        ).values_list('followee_id', flat=True))
+        if celebrities:
+            pulled = cls._before(
+                Activity.objects.filter(user_id__in=celebrities, start_time__isnull=False), 'start_time', 'id', after
+            )
+            keys.update(pulled.order_by('-start_time', '-id').values_list('start_time', 'id')[:limit + 1])
+
+        # Автор міг стати знаменитістю вже після розсилки — set прибирає дублікати
+        keys = sorted(keys, reverse=True)[:limit + 1]
+        has_more = len(keys) > limit
+        keys = keys[:limit]
+
+        details = {row['id']: row for row in Activity.objects.filter(id__in=[pk for _, pk in keys]).values(*FEED_FIELDS)}
+        rows = [details[pk] for _, pk in keys if pk in details]
+        return rows, has_more
@@ -0,0 +1,292 @@
+import time
+from itertools import chain
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .cache import AnalyticsCache
+from .models import Follower, FollowSuggestion, SocialGraphRefresh, UserGraphMetrics
+
+
+def csr(rows, cols, n):
+    """(indptr, indices) розрідженої матриці суміжності n x n з ребер rows -> cols."""
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order]
+
+
+def gather(indptr, rows):
+    """Позиції в indices для рядків rows — конкатенація зрізів indptr[r]:indptr[r + 1] без циклу."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    return np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+
+
+class SocialGraph:
+    """
+    Граф підписок у CSR: вершини — усі користувачі (щільні індекси 0..n-1 у порядку id),
+    ребро follower -> followee. Зберігаються обидва напрямки: out (підписки) та in (підписники).
+    """
+
+    def __init__(self, user_ids, src, dst):
+        self.user_ids = user_ids
+        self.n = len(user_ids)
+        self.src, self.dst = src, dst
+        self.out_ptr, self.out_idx = csr(src, dst, self.n)
+        self.in_ptr, self.in_idx = csr(dst, src, self.n)
+
+    @classmethod
+    def load(cls, chunk_size=100000):
+        user_ids = np.fromiter(
+            User.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size), dtype=np.int64
+        )
+        edges = Follower.objects.order_by().values_list('follower_id', 'followee_id').iterator(chunk_size=chunk_size)
+        pairs = np.fromiter(chain.from_iterable(edges), dtype=np.int64).reshape(-1, 2)
+        return cls(user_ids, np.searchsorted(user_ids, pairs[:, 0]), np.searchsorted(user_ids, pairs[:, 1]))
+
+    @property
+    def out_degree(self):
+        return np.diff(self.out_ptr)
+
+    @property
+    def in_degree(self):
+        return np.diff(self.in_ptr)
+
+    def index_of(self, user_ids):
+        """Щільні індекси для id користувачів; -1 для відсутніх."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        positions = np.clip(np.searchsorted(self.user_ids, user_ids), 0, max(self.n - 1, 0))
+        found = self.n > 0
+        return np.where(found & (self.user_ids[positions] == user_ids), positions, -1) if found else positions - 1
+
+    def pagerank(self, damping=0.85, tol=1e-6, max_iter=100, start=None):
+        """Степеневий метод; start — попередній вектор для теплого старту. Повертає (ranks, iterations)."""
+        n = self.n
+        if not n:
+            return np.empty(0), 0
+
+        out_degree = self.out_degree.astype(np.float64)
+        dangling = out_degree == 0
+        ranks = np.full(n, 1.0 / n) if start is None else start / start.sum()
+
+        iterations = 0
+        for iterations in range(1, max_iter + 1):
+            share = np.divide(ranks, out_degree, out=np.zeros(n), where=~dangling)
+            updated = np.bincount(self.dst, weights=share[self.src], minlength=n)
+            updated = damping * (updated + ranks[dangling].sum() / n) + (1.0 - damping) / n
+            error = np.abs(updated - ranks).sum()
+            ranks = updated
+            if error < n * tol:
+                break
+        return ranks, iterations
+
+    def mutual_counts(self):
+        """Кількість взаємних підписок кожної вершини (ребро u -> v, для якого є v -> u)."""
+        keys = np.sort(self.src * self.n + self.dst)
+        reverse = self.dst * self.n + self.src
+        positions = np.clip(np.searchsorted(keys, reverse), 0, max(len(keys) - 1, 0))
+        mutual = keys[positions] == reverse if len(keys) else np.zeros(0, dtype=bool)
+        return np.bincount(self.src[mutual], minlength=self.n)
+
+    def suggestions(self, node, ranks, limit=10):
+        """
+        Кандидати для node: підписки його підписок, крім нього самого та тих, на кого він уже підписаний.
+        Сортування за кількістю двокрокових шляхів, далі за PageRank. Повертає (nodes, paths).
+        """
+        following = self.out_idx[self.out_ptr[node]:self.out_ptr[node + 1]]
+        if not len(following):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        candidates = self.out_idx[gather(self.out_ptr, following)]
+        candidates = candidates[(candidates != node) & ~np.isin(candidates, following)]
+        nodes, paths = np.unique(candidates, return_counts=True)
+        order = np.lexsort((nodes, -ranks[nodes], -paths))[:limit]
+        return nodes[order], paths[order]
+
+    def communities(self, start=None, max_iter=30, seed=42):
+        """
+        Label propagation по неорієнтованому графу: кожна вершина бере найчастішу мітку сусідів
+        (поточну, якщо вона серед найчастіших). Щоб уникнути осциляцій, за ітерацію оновлюється
+        випадкова половина вершин. Повертає мітки — щільні індекси вершин-"представників".
+        """
+        n = self.n
+        labels = np.arange(n) if start is None else start.copy()
+        nodes = np.concatenate([self.src, self.dst])
+        neighbours = np.concatenate([self.dst, self.src])
+        rng = np.random.default_rng(seed)
+
+        for _ in range(max_iter):
+            keys, counts = np.unique(nodes * n + labels[neighbours], return_counts=True)
+            owners, candidates = keys // n, keys % n
+
+            order = np.lexsort((candidates, -counts, owners))
+            first = np.r_[True, owners[order][1:] != owners[order][:-1]] if len(order) else np.zeros(0, dtype=bool)
+            best = labels.copy()
+            best[owners[order][first]] = candidates[order][first]
+            best_count = np.zeros(n, dtype=np.int64)
+            best_count[owners[order][first]] = counts[order][first]
+
+            # Поточна мітка лишається, якщо вона теж найчастіша
+            current = np.arange(n) * n + labels
+            positions = np.clip(np.searchsorted(keys, current), 0, max(len(keys) - 1, 0))
+            current_count = np.where(keys[positions] == current, counts[positions], 0) if len(keys) else 0
+            best = np.where(current_count >= best_count, labels, best)
+
+            changing = best != labels
+            if not changing.any():
+                break
+            changing &= rng.random(n) < 0.5
+            labels = np.where(changing, best, labels)
+        return labels
+
+
+class SocialGraphAnalytics:
+    """
+    Перерахунок UserGraphMetrics та FollowSuggestion.
+
+    Інкрементальний режим (від останнього SocialGraphRefresh додались лише нові підписки):
+    PageRank і спільноти стартують зі збережених значень і сходяться за кілька ітерацій,
+    записуються лише змінені рядки метрик, а рекомендації — лише для користувачів, чий
+    двокроковий окіл змінився (автори нових підписок та їхні підписники).
+    Видалені підписки або відсутність попереднього стану — повний перерахунок.
+    """
+
+    BATCH_SIZE = 5000
+    SUGGESTIONS_PER_USER = 10
+    METRIC_FIELDS = ('followers_count', 'following_count', 'mutual_count', 'pagerank', 'community_id', 'community_size')
+
+    @staticmethod
+    def state():
+        return SocialGraphRefresh.objects.exclude(mode='skipped').order_by('-id').first()
+
+    @classmethod
+    def refresh(cls, full=False):
+        started = time.perf_counter()
+        previous = None if full else cls.state()
+        edges = Follower.objects.aggregate(last_id=Max('id'), total=Count('id'))
+        users = User.objects.count()
+
+        added = None
+        if previous is not None:
+            added = list(Follower.objects.filter(id__gt=previous.last_follower_id or 0).values_list('follower_id', flat=True))
+            if previous.edges + len(added) != edges['total']:
+                # Частину підписок видалено — інкрементально не відстежуємо
+                previous, added = None, None
+            elif not added and previous.nodes == users:
+                return cls._log('skipped', previous.nodes, previous.edges, edges['last_id'], started)
+
+        graph = SocialGraph.load()
+        stored = cls._stored_metrics(graph) if previous is not None else None
+
+        ranks, iterations = graph.pagerank(start=stored['pagerank'] if stored else None)
+        labels = graph.communities(start=stored['labels'] if stored else None)
+        sizes = np.bincount(labels, minlength=graph.n)
+        metrics = {
+            'followers_count': graph.in_degree,
+            'following_count': graph.out_degree,
+            'mutual_count': graph.mutual_counts(),
+            'pagerank': ranks,
+            'community_id': graph.user_ids[labels] if graph.n else labels,
+            'community_size': sizes[labels],
+        }
+
+        if stored is not None:
+            authors = graph.index_of(np.unique(np.array(added, dtype=np.int64)))
+            authors = authors[authors >= 0]
+            affected = np.unique(np.concatenate([authors, graph.in_idx[gather(graph.in_ptr, authors)]]))
+        else:
+            affected = np.arange(graph.n)
+
+        with transaction.atomic():
+            users_updated = cls._write_metrics(graph, metrics, stored)
+            suggestions_updated = cls._write_suggestions(graph, ranks, affected, full=stored is None)
+            transaction.on_commit(AnalyticsCache().invalidate)
+            return cls._log(
+                'incremental' if stored is not None else 'full', graph.n, len(graph.src), edges['last_id'], started,
+                pagerank_iterations=iterations, communities=int((sizes > 0).sum()),
+                users_updated=users_updated, suggestions_updated=suggestions_updated,
+            )
+
+    @staticmethod
+    def _log(mode, nodes, edges, last_follower_id, started, **fields):
+        return SocialGraphRefresh.objects.create(
+            mode=mode, nodes=nodes, edges=edges, last_follower_id=last_follower_id,
+            duration_ms=round((time.perf_counter() - started) * 1000, 1), **fields,
+        )
+
+    @classmethod
+    def _stored_metrics(cls, graph):
+        """Збережені метрики, вирівняні за щільними індексами графа (для теплого старту і порівняння)."""
+        rows = np.array(
+            list(UserGraphMetrics.objects.values_list('user_id', *cls.METRIC_FIELDS)), dtype=np.float64
+        ).reshape(-1, len(cls.METRIC_FIELDS) + 1)
+        index = graph.index_of(rows[:, 0].astype(np.int64))
+        rows, index = rows[index >= 0], index[index >= 0]
+
+        stored = {'present': np.zeros(graph.n, dtype=bool)}
+        stored['present'][index] = True
+        for position, field in enumerate(cls.METRIC_FIELDS, start=1):
+            stored[field] = np.zeros(graph.n)
+            stored[field][index] = rows[:, position]
+
+        # Нові користувачі: базовий PageRank і власна спільнота
+        stored['pagerank'][~stored['present']] = 0.15 / max(graph.n, 1)
+        labels = graph.index_of(stored['community_id'].astype(np.int64))
+        stored['labels'] = np.where(stored['present'] & (labels >= 0), labels, np.arange(graph.n))
+        return stored
+
+    @classmethod
+    def _write_metrics(cls, graph, metrics, stored):
+        changed = np.ones(graph.n, dtype=bool)
+        if stored is not None:
+            changed = ~stored['present'] | ~np.isclose(metrics['pagerank'], stored['pagerank'], rtol=1e-6, atol=0)
+            for field in cls.METRIC_FIELDS:
+                if field != 'pagerank':
+                    changed |= metrics[field] != stored[field]
+
+        nodes = np.flatnonzero(changed)
+        for start in range(0, len(nodes), cls.BATCH_SIZE):
+            batch = nodes[start:start + cls.BATCH_SIZE]
+            UserGraphMetrics.objects.bulk_create(
+                [
+                    UserGraphMetrics(user_id=int(graph.user_ids[node]), **{
+                        field: metrics[field][node].item() for field in cls.METRIC_FIELDS
+                    })
+                    for node in batch
+                ],
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=list(cls.METRIC_FIELDS) + ['updated_at'],
+            )
+        return len(nodes)
+
+    @classmethod
+    def _write_suggestions(cls, graph, ranks, affected, full):
+        if full:
+            FollowSuggestion.objects.all().delete()
+
+        written = 0
+        for start in range(0, len(affected), cls.BATCH_SIZE):
+            batch = affected[start:start + cls.BATCH_SIZE]
+            if not full:
+                FollowSuggestion.objects.filter(user_id__in=graph.user_ids[batch].tolist()).delete()
+
+            rows = []
+            for node in batch:
+                nodes, paths = graph.suggestions(node, ranks, cls.SUGGESTIONS_PER_USER)
+                rows.extend(
+                    FollowSuggestion(
+                        user_id=int(graph.user_ids[node]), suggested_id=int(graph.user_ids[candidate]),
+                        mutual_connections=int(count), rank=rank,
+                    )
+                    for rank, (candidate, count) in enumerate(zip(nodes, paths), start=1)
+                )
+            FollowSuggestion.objects.bulk_create(rows, batch_size=cls.BATCH_SIZE)
+            written += len(rows)
+        return written
@@ -0,0 +1,329 @@
+import csv
+import io
+import time
+import xml.etree.ElementTree as ET
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .bulk import copy_rows
+from .geo import haversine_m
+from .models import Activity, ActivityPoint
+from .segments import SegmentService
+from .spatial import SpatialIndex, cells_of
+from .streams import StreamPyramid
+from .track_metrics import ELEVATION_WINDOW, trailing_mean
+from .tracks import TrackStore
+
+POINT_COLUMNS = ('recorded_at', 'lat', 'lon', 'ele', 'speed', 'cadence')
+
+CSV_ALIASES = {
+    'recorded_at': 'recorded_at', 'time': 'recorded_at', 'timestamp': 'recorded_at',
+    'lat': 'lat', 'latitude': 'lat',
+    'lon': 'lon', 'lng': 'lon', 'longitude': 'lon',
+    'ele': 'ele', 'elevation': 'ele', 'altitude': 'ele',
+    'speed': 'speed',
+    'cadence': 'cadence', 'cad': 'cadence',
+}
+
+
+def _empty_raw():
+    return {name: [] for name in POINT_COLUMNS}
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def read_gpx(fileobj, chunk_size):
+    """Потоково читає trkpt/rtept з GPX, повертаючи сирі значення пакетами по chunk_size."""
+    raw = _empty_raw()
+    container = None
+    point = None
+
+    for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+        name = _local_name(elem.tag)
+
+        if event == 'start':
+            if name in ('trkseg', 'rte'):
+                container = elem
+            elif name in ('trkpt', 'rtept'):
+                point = dict.fromkeys(POINT_COLUMNS)
+                point['lat'] = elem.get('lat')
+                point['lon'] = elem.get('lon')
+            continue
+
+        if point is None:
+            if name == 'wpt':
+                elem.clear()
+            continue
+
+        if name in ('trkpt', 'rtept'):
+            for column in POINT_COLUMNS:
+                raw[column].append(point[column])
+            point = None
+
+            # Звільняємо вже оброблені вузли, щоб пам'ять не росла з розміром файлу
+            elem.clear()
+            if container is not None:
+                container.remove(elem)
+
+            if len(raw['lat']) >= chunk_size:
+                yield raw
+                raw = _empty_raw()
+        elif name == 'time':
+            point['recorded_at'] = elem.text
+        elif name == 'ele':
+            point['ele'] = elem.text
+        elif name == 'speed':
+            point['speed'] = elem.text
+        elif name in ('cad', 'cadence'):
+            point['cadence'] = elem.text
+
+    if raw['lat']:
+        yield raw
+
+
+def read_csv(fileobj, chunk_size):
+    """Потоково читає CSV з колонками lat/lon[/time/ele/speed/cadence] (допускаються синоніми)."""
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        text = io.TextIOWrapper(getattr(fileobj, 'file', fileobj), encoding='utf-8-sig', newline='')
+
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    columns = [CSV_ALIASES.get(name.strip().lower()) for name in header]
+    if 'lat' not in columns or 'lon' not in columns:
+        raise ValidationError("CSV має містити колонки lat та lon.")
+
+    raw = _empty_raw()
+    for row in reader:
+        # Перше непорожнє значення для кожної колонки: синоніми (lat і latitude) не зсувають рядки
+        point = dict.fromkeys(POINT_COLUMNS)
+        for column, value in zip(columns, row):
+            if column is not None and point[column] is None and value.strip():
+                point[column] = value
+        if point['lat'] is None or point['lon'] is None:
+            continue
+        for column in POINT_COLUMNS:
+            raw[column].append(point[column])
+
+        if len(raw['lat']) >= chunk_size:
+            yield raw
+            raw = _empty_raw()
+
+    if raw['lat']:
+        yield raw
+
+
+READERS = {
+    'gpx': read_gpx,
+    'csv': read_csv,
+}
+
+
+def build_batch(raw):
+    """Перетворює сирі рядкові значення у типізовані масиви (NaN/NaT для відсутніх)."""
+    batch = {
+        name: pd.to_numeric(pd.Series(raw[name], dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        for name in POINT_COLUMNS if name != 'recorded_at'
+    }
+    times = pd.to_datetime(pd.Series(raw['recorded_at'], dtype=object), utc=True, errors='coerce', format='ISO8601')
+    batch['recorded_at'] = times.dt.tz_localize(None).to_numpy(dtype='datetime64[us]')
+    return batch
+
+
+def validate_points(batch):
+    """Векторизована перевірка тих самих умов, що й CheckConstraint моделі ActivityPoint."""
+    lat, lon = batch['lat'], batch['lon']
+    return (
+        np.isfinite(lat) & np.isfinite(lon)
+        & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+        & ~(batch['speed'] < 0)
+        & ~(batch['cadence'] < 0)
+    )
+
+
+def point_rows(activity_id, batch):
+    """Кортежі для copy_rows; activity_id — одне значення або масив (по одному на точку)."""
+    owners = np.asarray(activity_id).tolist() if np.ndim(activity_id) else repeat(activity_id)
+    times = pd.DatetimeIndex(batch['recorded_at']).tz_localize('UTC').to_pydatetime()
+    recorded_at = np.where(np.isnat(batch['recorded_at']), None, times)
+
+    def nullable(values, as_int=False):
+        converted = np.rint(np.nan_to_num(values)).astype(np.int64) if as_int else values
+        return np.where(np.isnan(values), None, converted.astype(object)).tolist()
+
+    return zip(
+        owners,
+        recorded_at.tolist(),
+        batch['lat'].tolist(),
+        batch['lon'].tolist(),
+        nullable(batch['ele']),
+        nullable(batch['speed']),
+        nullable(batch['cadence'], as_int=True),
+    )
+
+
+class TrackAccumulator:
+    """Рахує підсумки треку пакет за пакетом, зберігаючи лише останню точку між пакетами."""
+
+    def __init__(self):
+        self.points = 0
+        self.distance_m = 0.0
+        self.elevation_gain_m = 0.0
+        self.max_ele = None
+        self.start = None
+        self.end = None
+        self._last_position = None
+        self._ele_tail = np.zeros(0)
+        self._last_smoothed = None
+        # Просторовий індекс: bbox (min_lat, min_lon, max_lat, max_lon) і комірки сітки
+        self.bounds = None
+        self.cells = np.zeros(0, dtype=np.int64)
+
+    def update(self, batch):
+        lat, lon, ele = batch['lat'], batch['lon'], batch['ele']
+        self.points += len(lat)
+
+        box = (lat.min(), lon.min(), lat.max(), lon.max())
+        if self.bounds is not None:
+            box = (min(self.bounds[0], box[0]), min(self.bounds[1], box[1]),
+                   max(self.bounds[2], box[2]), max(self.bounds[3], box[3]))
+        self.bounds = box
+        self.cells = np.union1d(self.cells, cells_of(lat, lon))
+
+        if self._last_position is not None:
+            lat = np.concatenate(([self._last_position[0]], lat))
+            lon = np.concatenate(([self._last_position[1]], lon))
+        if len(lat) > 1:
+            self.distance_m += float(haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:]).sum())
+        self._last_position = (lat[-1], lon[-1])
+
+        ele = ele[~np.isnan(ele)]
+        if len(ele):
+            self.max_ele = float(ele.max()) if self.max_ele is None else max(self.max_ele, float(ele.max()))
+
+            # Згладжування як у track_metrics: хвіст попереднього пакета дає повні вікна
+            values = np.concatenate((self._ele_tail, ele))
+            smoothed = trailing_mean(values, ELEVATION_WINDOW, np.zeros(1, dtype=np.int64))[len(self._ele_tail):]
+            if self._last_smoothed is not None:
+                smoothed = np.concatenate(([self._last_smoothed], smoothed))
+            self.elevation_gain_m += float(np.clip(np.diff(smoothed), 0, None).sum())
+            self._last_smoothed = smoothed[-1]
+            self._ele_tail = values[-(ELEVATION_WINDOW - 1):]
+
+        times = batch['recorded_at'][~np.isnat(batch['recorded_at'])]
+        if len(times):
+            self.start = times.min() if self.start is None else min(self.start, times.min())
+            self.end = times.max() if self.end is None else max(self.end, times.max())
+
+    def apply_to(self, activity):
+        activity.distance_m = self.distance_m
+        activity.elevation_gain_m = int(round(self.elevation_gain_m))
+        activity.height = max(int(round(self.max_ele)), 0) if self.max_ele is not None else 0
+
+        if self.start is not None:
+            activity.start_time = pd.Timestamp(self.start).tz_localize('UTC').to_pydatetime()
+            activity.end_time = pd.Timestamp(self.end).tz_localize('UTC').to_pydatetime()
+            activity.duration_sec = float((self.end - self.start) / np.timedelta64(1, 's'))
+        else:
+            activity.duration_sec = 0.0
+
+
+class TrackImporter:
+    """
+    Імпорт GPS-файлів: потоковий парсинг, векторизована валідація, пакетний запис точок.
+
+    Activity зберігається звичайним save() (тож сигнали та агрегати працюють),
+    точки пишуться через COPY/bulk_create без створення об'єктів моделі.
+    """
+
+    STORAGES = ('rows', 'packed')
+
+    def __init__(self, user, activity_type='other', batch_size=5000, storage='rows'):
+        if activity_type not in dict(Activity.ACTIVITY_TYPES):
+            raise ValidationError(f"Невідомий тип активності: {activity_type}")
+        if storage not in self.STORAGES:
+            raise ValidationError(f"Невідомий режим зберігання: {storage}")
+
+        self.user = user
+        self.activity_type = activity_type
+        self.batch_size = batch_size
+        self.storage = storage
+
+    @staticmethod
+    def detect_format(filename, fmt=None):
+        fmt = (fmt or str(filename).rsplit('.', 1)[-1]).lower()
+        if fmt not in READERS:
+            raise ValidationError(f"Непідтримуваний формат файлу: {fmt}")
+        return fmt
+
+    def import_file(self, fileobj, fmt):
+        reader = READERS[fmt]
+        started = time.perf_counter()
+        accumulator = TrackAccumulator()
+        rejected = 0
+        packed = []
+
+        try:
+            with transaction.atomic():
+                activity = Activity(
+                    user=self.user, activity_type=self.activity_type,
+                    duration_sec=0, distance_m=0, elevation_gain_m=0, height=0
+                )
+                activity.save()
+
+                for raw in reader(fileobj, self.batch_size):
+                    batch = build_batch(raw)
+                    valid = validate_points(batch)
+                    rejected += int((~valid).sum())
+                    batch = {name: values[valid] for name, values in batch.items()}
+                    if not len(batch['lat']):
+                        continue
+
+                    accumulator.update(batch)
+                    if self.storage == 'packed':
+                        packed.append(batch)
+                    else:
+                        copy_rows(
+                            ActivityPoint, ('activity_id',) + POINT_COLUMNS,
+                            point_rows(activity.pk, batch), batch_size=self.batch_size
+                        )
+
+                if accumulator.points == 0:
+                    raise ValidationError("Файл не містить жодної валідної точки треку.")
+
+                if packed:
+                    TrackStore.save(activity.pk, {
+                        name: np.concatenate([batch[name] for batch in packed]) for name in POINT_COLUMNS
+                    })
+
+                accumulator.apply_to(activity)
+                activity.save(update_fields=[
+                    'distance_m', 'elevation_gain_m', 'height', 'duration_sec', 'start_time', 'end_time'
+                ])
+                SpatialIndex.store(activity.pk, accumulator.bounds, accumulator.cells, accumulator.points)
+                SegmentService.match_activity(activity.pk)
+                StreamPyramid.build(activity.pk)
+        except (ET.ParseError, csv.Error, UnicodeDecodeError) as exc:
+            raise ValidationError(f"Не вдалося розібрати файл: {exc}")
+
+        duration = time.perf_counter() - started
+        return {
+            'activity_id': activity.pk,
+            'points': accumulator.points,
+            'rejected_points': rejected,
+            'distance_m': round(activity.distance_m, 1),
+            'elevation_gain_m': activity.elevation_gain_m,
+            'duration_sec': activity.duration_sec,
+            'seconds': round(duration, 3),
+            'rows_per_sec': round(accumulator.points / duration) if duration > 0 else None,
+        }
@@ -0,0 +1,203 @@
+import datetime
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Q, Sum, Value, Window
+from django.db.models.functions import Greatest, Round, RowNumber, Trunc
+from django.utils import timezone
+
+from .models import Activity, LeaderboardEntry
+
+ALL_TIME_START = datetime.date(1970, 1, 1)
+WINDOWS = tuple(window for window, _ in LeaderboardEntry.WINDOWS)
+ALL_TYPES = LeaderboardEntry.ALL_TYPES
+
+
+def period_start(window, day):
+    if window == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if window == 'month':
+        return day.replace(day=1)
+    if window == 'year':
+        return day.replace(month=1, day=1)
+    return ALL_TIME_START
+
+
+class LeaderboardRollup:
+    """
+    Таблиці лідерів для кожного календарного вікна (week/month/year/all) та типу активності
+    (плюс 'all'). Кожне збереження Activity оновлює 8 рядків двома запитами, як MonthlyStatsRollup.
+    """
+
+    BATCH_SIZE = 5000
+    STATE_FIELDS = ('user_id', 'start_time', 'activity_type', 'distance_m', 'duration_sec')
+
+    @staticmethod
+    def snapshot(user_id, start_time, activity_type, distance_m, duration_sec):
+        if user_id is None or start_time is None:
+            return None
+
+        if timezone.is_aware(start_time):
+            start_time = timezone.localtime(start_time)
+
+        return (
+            user_id,
+            start_time.date(),
+            activity_type,
+            float(distance_m or 0.0),
+            int((duration_sec or 0) + 0.5),
+        )
+
+    @classmethod
+    def snapshot_of(cls, activity):
+        return cls.snapshot(*(getattr(activity, field) for field in cls.STATE_FIELDS))
+
+    @classmethod
+    def snapshot_of_row(cls, row):
+        if row is None:
+            return None
+        return cls.snapshot(*(row[field] for field in cls.STATE_FIELDS))
+
+    @staticmethod
+    def keys(snapshot):
+        user_id, day, activity_type, _, _ = snapshot
+        return [
+            {'user_id': user_id, 'window': window, 'period_start': period_start(window, day), 'activity_type': kind}
+            for window in WINDOWS
+            for kind in (activity_type, ALL_TYPES)
+        ]
+
+    @classmethod
+    def _entries(cls, snapshot):
+        return LeaderboardEntry.objects.filter(reduce(or_, (Q(**key) for key in cls.keys(snapshot))))
+
+    @classmethod
+    def add(cls, snapshot):
+        if snapshot is None:
+            return
+
+        _, _, _, distance, duration = snapshot
+        with transaction.atomic():
+            LeaderboardEntry.objects.bulk_create(
+                [LeaderboardEntry(**key) for key in cls.keys(snapshot)], ignore_conflicts=True
+            )
+            cls._entries(snapshot).update(
+                total_distance_m=F('total_distance_m') + distance,
+                total_duration_sec=F('total_duration_sec') + duration,
+                activities_count=F('activities_count') + 1,
+            )
+
+    @classmethod
+    def subtract(cls, snapshot):
+        if snapshot is None:
+            return
+
+        _, _, _, distance, duration = snapshot
+        with transaction.atomic():
+            entries = cls._entries(snapshot)
+            entries.update(
+                total_distance_m=Greatest(F('total_distance_m') - distance, Value(0.0)),
+                total_duration_sec=Greatest(F('total_duration_sec') - duration, Value(0)),
+                activities_count=Greatest(F('activities_count') - 1, Value(0)),
+            )
+            entries.filter(activities_count=0).delete()
+
+    @classmethod
+    def replace(cls, old, new):
+        if old == new:
+            return
+        cls.subtract(old)
+        cls.add(new)
+
+    @classmethod
+    def rebuild(cls, batch_size=None):
+        batch_size = batch_size or cls.BATCH_SIZE
+        activities = Activity.objects.filter(start_time__isnull=False)
+
+        created = 0
+        with transaction.atomic():
+            LeaderboardEntry.objects.all().delete()
+
+            for window in WINDOWS:
+                if window == 'all':
+                    period = Value(ALL_TIME_START, output_field=DateField())
+                else:
+                    period = Trunc('start_time', window, output_field=DateField())
+
+                for by_type in (True, False):
+                    group = ['user_id', 'period'] + (['activity_type'] if by_type else [])
+                    rows = activities.annotate(period=period).values(*group).annotate(
+                        total_distance=Sum('distance_m'),
+                        total_duration=Sum(Round('duration_sec')),
+                        total_activities=Count('id'),
+                    ).order_by()
+
+                    batch = []
+                    for row in rows.iterator(chunk_size=batch_size):
+                        batch.append(LeaderboardEntry(
+                            user_id=row['user_id'],
+                            window=window,
+                            period_start=row['period'],
+                            activity_type=row['activity_type'] if by_type else ALL_TYPES,
+                            total_distance_m=max(row['total_distance'] or 0.0, 0.0),
+                            total_duration_sec=int(row['total_duration'] or 0),
+                            activities_count=row['total_activities'],
+                        ))
+                        if len(batch) >= batch_size:
+                            LeaderboardEntry.objects.bulk_create(batch)
+                            created += len(batch)
+                            batch = []
+
+                    if batch:
+                        LeaderboardEntry.objects.bulk_create(batch)
+                        created += len(batch)
+
+        return created
+
+    @staticmethod
+    def board(window='all', activity_type=ALL_TYPES, day=None):
+        """Рядки однієї таблиці лідерів (поточний період, якщо day не задано)."""
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown leaderboard window: {window}")
+        day = day or timezone.localdate()
+        return LeaderboardEntry.objects.filter(
+            window=window, period_start=period_start(window, day), activity_type=activity_type or ALL_TYPES
+        )
+
+    @classmethod
+    def top(cls, window='all', activity_type=ALL_TYPES, top_n=10, min_distance=0, day=None):
+        """
+        Top-N з фільтром дистанції в SQL. Поріг відсікає лише хвіст рейтингу,
+        тож ROW_NUMBER по відфільтрованих рядках збігається із загальним місцем.
+        """
+        ordering = [F('total_distance_m').desc(), F('user_id').asc()]
+        return cls.board(window, activity_type, day).filter(
+            total_distance_m__gte=min_distance, total_distance_m__gt=0
+        ).annotate(
+            rank=Window(RowNumber(), order_by=ordering)
+        ).order_by(*ordering).values(
+            'rank', 'activities_count', username=F('user__username'), total_distance=F('total_distance_m'),
+        )[:top_n]
+
+    @classmethod
+    def rank(cls, user_id, window='all', activity_type=ALL_TYPES, day=None):
+        """
+        Місце користувача: скільки записів цієї таблиці стоїть вище (ті самі умови, що й ORDER BY у top).
+        Рахується діапазоном по leaderboard_rank_idx, без сортування всієї таблиці.
+        """
+        board = cls.board(window, activity_type, day)
+        entry = board.filter(user_id=user_id).values('total_distance_m', 'activities_count').first()
+        if entry is None:
+            return None
+
+        distance = entry['total_distance_m']
+        ahead = board.filter(
+            Q(total_distance_m__gt=distance) | Q(total_distance_m=distance, user_id__lt=user_id)
+        ).count()
+        return {
+            'rank': ahead + 1,
+            'total_distance': distance,
+            'activities_count': entry['activities_count'],
+            'participants': board.filter(total_distance_m__gt=0).count(),
+        }
@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from activities.repositories import AnalyticsRepository
+
+
+class Command(BaseCommand):
+    help = (
+        "Виконує EXPLAIN (ANALYZE, BUFFERS) для кожного запиту AnalyticsRepository "
+        "і позначає послідовні скани великих таблиць. Запускати на заповненій базі (seed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help="Seq Scan вважається проблемою, якщо переглянуто щонайменше стільки рядків.")
+        parser.add_argument('--no-analyze', action='store_true', help="Лише план, без виконання запитів.")
+        parser.add_argument('--fail-on-seq-scan', action='store_true',
+                            help="Завершитися з помилкою, якщо знайдено хоч один Seq Scan (для CI).")
+        parser.add_argument('--show-plans', action='store_true', help="Вивести повні JSON-плани.")
+
+    @staticmethod
+    def queries():
+        repository = AnalyticsRepository()
+        names = sorted(name for name in dir(repository) if name.startswith('get_'))
+        return [(name, repository.queryset_for(name)) for name in names]
+
+    @staticmethod
+    def walk(node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from Command.walk(child)
+
+    @staticmethod
+    def scanned_rows(node):
+        # Для ANALYZE — фактично прочитані рядки (разом з відкинутими фільтром), інакше — оцінка планувальника
+        if 'Actual Rows' in node:
+            return (node['Actual Rows'] + node.get('Rows Removed by Filter', 0)) * node.get('Actual Loops', 1)
+        return node.get('Plan Rows', 0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) підтримується лише на PostgreSQL.")
+
+        explain_options = {'format': 'json'}
+        if not options['no_analyze']:
+            explain_options.update(analyze=True, buffers=True)
+
+        flagged = []
+        self.stdout.write(f"{'query':<36} {'time ms':>9} {'hit':>8} {'read':>8}  seq scans")
+        for name, queryset in self.queries():
+            raw = json.loads(queryset.explain(**explain_options))
+            plan = raw[0]['Plan']
+            seq_scans = [
+                (node['Relation Name'], self.scanned_rows(node))
+                for node in self.walk(plan)
+                if node['Node Type'] == 'Seq Scan' and self.scanned_rows(node) >= options['min_rows']
+            ]
+            flagged.extend((name, relation, rows) for relation, rows in seq_scans)
+
+            timing = raw[0].get('Execution Time')
+            timing = f"{timing:.2f}" if timing is not None else '-'
+            scans = ', '.join(f"{relation} ({rows:.0f} rows)" for relation, rows in seq_scans) or 'ok'
+            self.stdout.write(
+                f"{name:<36} {timing:>9} {plan.get('Shared Hit Blocks', '-'):>8} "
+                f"{plan.get('Shared Read Blocks', '-'):>8}  {scans}"
+            )
+            if options['show_plans']:
+                self.stdout.write(json.dumps(raw, indent=2))
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS("No sequential scans above the threshold."))
+            return
+
+        message = f"{len(flagged)} sequential scan(s) at or above {options['min_rows']} rows"
+        if options['fail_on_seq_scan']:
+            raise CommandError(message)
+        self.stdout.write(self.style.WARNING(message))
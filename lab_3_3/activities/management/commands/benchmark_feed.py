@@ -0,0 +1,41 @@
+import time
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from activities.benchmarks import percentiles
+from activities.feeds import FeedService
+
+
+class Command(BaseCommand):
+    help = "Латентність сторінок стрічки (p50/p95/p99) для користувачів з найбільшою кількістю підписок."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--pages', type=int, default=3, help="Сторінок на користувача (за курсором).")
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        user_ids = list(User.objects.annotate(following_count=Count('following')).order_by(
+            '-following_count', 'id'
+        ).values_list('id', flat=True)[:options['users']])
+
+        first, later = [], []
+        for user_id in user_ids:
+            after = None
+            for page in range(options['pages']):
+                start = time.perf_counter()
+                rows, has_more = FeedService.page(user_id, after=after, limit=options['limit'])
+                (first if page == 0 else later).append((time.perf_counter() - start) * 1000)
+                if not has_more:
+                    break
+                after = (rows[-1]['start_time'], rows[-1]['id'])
+
+        for name, values in (('first page', first), ('next pages', later)):
+            stats = percentiles(np.array(values))
+            self.stdout.write(
+                f"{name:<12} {len(values):>6} reads  "
+                + "  ".join(f"{key} {value if value is not None else '-'}" for key, value in stats.items())
+            )
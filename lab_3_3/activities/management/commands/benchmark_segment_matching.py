@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from activities.segments import SegmentMatcher, SegmentService
+from activities.tracks import TrackStore
+
+
+class Command(BaseCommand):
+    help = "Пропускна здатність пошуку проходжень сегментів (activities/s) для різної кількості процесів, без запису."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activities', type=int, default=None, help="Перші N активностей з треком.")
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+        parser.add_argument('--chunk-size', type=int, default=SegmentService.CHUNK_SIZE)
+        parser.add_argument('--repetitions', type=int, default=3)
+
+    def handle(self, *args, **options):
+        activity_ids = TrackStore.activity_ids()[:options['activities']]
+        segments = SegmentMatcher.queryset().count()
+        pairs = len(activity_ids) * segments
+        self.stdout.write(f"{len(activity_ids)} activities x {segments} segments = {pairs} pairs")
+
+        for workers in options['workers']:
+            runs = [
+                SegmentService.match(activity_ids, workers=workers, chunk_size=options['chunk_size'], save=False)
+                for _ in range(options['repetitions'])
+            ]
+            best = min(runs, key=lambda run: run['seconds'])
+            pruned = 1 - best['candidates'] / pairs if pairs else 0.0
+            self.stdout.write(
+                f"workers {workers:>3}  {best['activities_per_sec'] or 0:>10.1f} activities/s  "
+                f"{best['points'] / best['seconds'] if best['seconds'] > 0 else 0:>12.0f} points/s  "
+                f"best of {len(runs)}: {best['seconds']:.2f} s  "
+                f"candidates {best['candidates']} ({pruned:.1%} pairs pruned)  efforts {best['efforts']}"
+            )
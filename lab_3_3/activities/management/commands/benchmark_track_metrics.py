@@ -0,0 +1,160 @@
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from activities.geo import EARTH_RADIUS_M
+from activities.track_metrics import (
+    ELEVATION_WINDOW, MOVING_SPEED_MPS, PERCENTILES, SPLIT_DISTANCE_M, compute_metrics, grouped_percentiles,
+)
+
+
+def naive_percentiles(values):
+    """np.percentile (лінійна інтерполяція) для PERCENTILES по відсортованому списку."""
+    ordered = sorted(value for value in values if not math.isnan(value))
+    result = {}
+    for q in PERCENTILES:
+        if not ordered:
+            result[f"p{q}"] = None
+            continue
+        position = (len(ordered) - 1) * q / 100.0
+        low = math.floor(position)
+        high = min(low + 1, len(ordered) - 1)
+        result[f"p{q}"] = ordered[low] * (1 - (position - low)) + ordered[high] * (position - low)
+    return result
+
+
+def naive_metrics(points):
+    """Еталонна реалізація того самого набору метрик, що й compute_metrics: цикл по точках."""
+    distance = gain = moving = 0.0
+    window, speeds, cadences, splits = [], [], [], []
+    previous = previous_smoothed = None
+    first_time = last_time = None
+    split_from = None
+
+    for recorded_at, lat, lon, ele, speed, cadence in points:
+        if ele is not None:
+            window.append(ele)
+            if len(window) > ELEVATION_WINDOW:
+                window.pop(0)
+            smoothed = sum(window) / len(window)
+            if previous_smoothed is not None and smoothed > previous_smoothed:
+                gain += smoothed - previous_smoothed
+            previous_smoothed = smoothed
+
+        if first_time is None:
+            first_time = split_from = recorded_at
+        last_time = recorded_at
+
+        segment_speed = math.nan
+        if previous is not None:
+            p_time, p_lat, p_lon = previous
+            phi1, phi2 = math.radians(p_lat), math.radians(lat)
+            a = (math.sin((phi2 - phi1) / 2) ** 2
+                 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon - p_lon) / 2) ** 2)
+            step = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(max(a, 0.0), 1.0)))
+            dt = recorded_at - p_time
+            if dt > 0:
+                segment_speed = step / dt
+                if segment_speed >= MOVING_SPEED_MPS:
+                    moving += dt
+
+            # Спліт: момент перетину межі кілометра інтерполюється всередині відрізка
+            km = math.floor((distance + step) / SPLIT_DISTANCE_M)
+            if km > math.floor(distance / SPLIT_DISTANCE_M):
+                at = p_time + (km * SPLIT_DISTANCE_M - distance) / step * dt
+                splits.append(round(at - split_from, 1))
+                split_from = at
+            distance += step
+        previous = (recorded_at, lat, lon)
+
+        value = speed if speed is not None and not math.isnan(speed) else segment_speed
+        speeds.append(value if math.isfinite(value) else math.nan)
+        cadences.append(math.nan if cadence is None else cadence)
+
+    finite = [value for value in speeds if not math.isnan(value)]
+    avg_speed = distance / moving if moving > 0 else None
+    return {
+        'points': len(points),
+        'distance_m': distance,
+        'elevation_gain_m': gain,
+        'elapsed_time_sec': last_time - first_time if points else 0.0,
+        'moving_time_sec': moving,
+        'avg_speed_mps': avg_speed,
+        'pace_sec_per_km': 1000.0 / avg_speed if avg_speed else None,
+        'max_speed_mps': max(finite) if finite else None,
+        'speed_percentiles': naive_percentiles(speeds),
+        'cadence_percentiles': naive_percentiles(cadences),
+        'splits_sec': splits,
+    }
+
+
+class Command(BaseCommand):
+    help = "Порівнює пропускну здатність векторизованих метрик треку з наївним циклом по точках."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activities', type=int, default=50)
+        parser.add_argument('--points', type=int, default=10000, help="Точок на активність.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _synthetic(self, n_activities, n_points, seed):
+        rng = np.random.default_rng(seed)
+        total = n_activities * n_points
+        groups = np.repeat(np.arange(n_activities), n_points)
+        step = np.arange(total) % n_points
+        seconds = step.astype(np.int64)
+        track = {
+            'recorded_at': (np.datetime64('2025-01-01T00:00:00', 'us')
+                            + seconds.astype('timedelta64[s]') + groups.astype('timedelta64[D]')),
+            'lat': 49.8 + np.cumsum(rng.normal(2e-5, 1e-5, total)) % 0.5,
+            'lon': 24.0 + np.cumsum(rng.normal(2e-5, 1e-5, total)) % 0.5,
+            'ele': 300 + np.cumsum(rng.normal(0, 0.5, total)) % 200,
+            'speed': np.abs(rng.normal(3, 1, total)),
+            'cadence': rng.integers(70, 95, total).astype(np.float64),
+        }
+        return track, groups
+
+    def handle(self, *args, **options):
+        n_activities, n_points = options['activities'], options['points']
+        track, groups = self._synthetic(n_activities, n_points, options['seed'])
+        total = len(groups)
+
+        start = time.perf_counter()
+        vectorized = compute_metrics(track, groups)
+        vectorized_time = time.perf_counter() - start
+
+        # Частка перцентилів (сортування всередині груп) у векторизованому часі
+        start = time.perf_counter()
+        grouped_percentiles((track['speed'], track['cadence']), groups, n_activities)
+        percentiles_time = time.perf_counter() - start
+
+        seconds = (track['recorded_at'].astype(np.int64) / 1e6).tolist()
+        columns = [seconds] + [track[name].tolist() for name in ('lat', 'lon', 'ele', 'speed', 'cadence')]
+        rows = list(zip(*columns))
+
+        start = time.perf_counter()
+        naive = [naive_metrics(rows[g * n_points:(g + 1) * n_points]) for g in range(n_activities)]
+        naive_time = time.perf_counter() - start
+
+        max_error = max(
+            abs(v[name] - n[name])
+            for v, n in zip(vectorized, naive)
+            for name in ('distance_m', 'elevation_gain_m', 'moving_time_sec', 'elapsed_time_sec', 'max_speed_mps')
+        )
+        max_error = max([max_error] + [
+            abs(v[field][key] - n[field][key])
+            for v, n in zip(vectorized, naive)
+            for field in ('speed_percentiles', 'cadence_percentiles')
+            for key in v[field]
+        ])
+        splits_match = all(v['splits_sec'] == n['splits_sec'] for v, n in zip(vectorized, naive))
+
+        self.stdout.write(f"{n_activities} activities x {n_points} points = {total} points (same metric set)")
+        self.stdout.write(f"  vectorized: {vectorized_time:8.3f} s, {total / vectorized_time:12.0f} points/s")
+        self.stdout.write(f"    of which percentiles: {percentiles_time:8.3f} s")
+        self.stdout.write(f"  naive loop: {naive_time:8.3f} s, {total / naive_time:12.0f} points/s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Speed-up x{naive_time / vectorized_time:.1f} "
+            f"(max metric difference {max_error:.6f}, splits {'match' if splits_match else 'differ'})"
+        ))
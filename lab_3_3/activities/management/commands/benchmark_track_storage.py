@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from activities.models import ActivityPoint, ActivityTrack
+from activities.tracks import TrackStore, TrackCodec
+
+
+class Command(BaseCommand):
+    help = "Порівнює розмір на диску та час завантаження треків: рядки ActivityPoint vs ActivityTrack."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activities', type=int, default=20,
+                            help="Скільки активностей з точками брати у вибірку.")
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def _table_sizes(self):
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_total_relation_size(%s), pg_total_relation_size(%s)",
+                [ActivityPoint._meta.db_table, ActivityTrack._meta.db_table]
+            )
+            return cursor.fetchone()
+
+    def _sample_sizes(self, activity_ids):
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COALESCE(SUM(pg_column_size(p.*)), 0) FROM {ActivityPoint._meta.db_table} p "
+                f"WHERE p.activity_id = ANY(%s)",
+                [activity_ids]
+            )
+            return cursor.fetchone()[0]
+
+    def _time(self, fn, activity_ids, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for activity_id in activity_ids:
+                fn(activity_id)
+            duration = time.perf_counter() - start
+            best = duration if best is None else min(best, duration)
+        return best
+
+    def handle(self, *args, **options):
+        sample = list(
+            ActivityPoint.objects.values('activity_id').annotate(n=Count('id'))
+            .order_by('-n').values_list('activity_id', 'n')[:options['activities']]
+        )
+        if not sample:
+            self.stdout.write(self.style.WARNING("No ActivityPoint rows to benchmark."))
+            return
+
+        activity_ids = [activity_id for activity_id, _ in sample]
+        total_points = sum(n for _, n in sample)
+        blobs = {activity_id: TrackCodec.encode(TrackStore.load_from_points(activity_id)) for activity_id in activity_ids}
+        packed_bytes = sum(len(blob) for blob in blobs.values())
+
+        repeat = options['repeat']
+        results = {
+            'ORM instances': self._time(
+                lambda a: list(ActivityPoint.objects.filter(activity_id=a)), activity_ids, repeat),
+            'values_list -> NumPy': self._time(TrackStore.load_from_points, activity_ids, repeat),
+            'packed decode': self._time(lambda a: TrackCodec.decode(blobs[a]), activity_ids, repeat),
+        }
+
+        self.stdout.write(f"Sample: {len(activity_ids)} activities, {total_points} points")
+        self.stdout.write(f"Packed blobs: {packed_bytes / 1024:.1f} KiB ({packed_bytes / total_points:.2f} B/point)")
+
+        row_bytes = self._sample_sizes(activity_ids)
+        if row_bytes is not None:
+            self.stdout.write(
+                f"Row tuples (without indexes): {row_bytes / 1024:.1f} KiB ({row_bytes / total_points:.2f} B/point), "
+                f"ratio x{row_bytes / max(packed_bytes, 1):.1f}"
+            )
+
+        sizes = self._table_sizes()
+        if sizes is not None:
+            self.stdout.write(
+                f"Total relation size: activitypoint {sizes[0] / 1024 ** 2:.1f} MiB, "
+                f"activitytrack {sizes[1] / 1024 ** 2:.1f} MiB"
+            )
+
+        for name, duration in results.items():
+            self.stdout.write(
+                f"{name:>22}: {duration * 1000:8.1f} ms, {total_points / duration:12.0f} points/s"
+            )
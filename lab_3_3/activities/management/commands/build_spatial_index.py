@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.spatial import SpatialIndex
+
+
+class Command(BaseCommand):
+    help = "Перебудовує просторовий індекс (ActivityBounds і комірки ActivityCell) з точок треків."
+
+    def add_arguments(self, parser):
+        parser.add_argument('activity_ids', nargs='*', type=int, help="Лише ці активності (за замовчуванням — усі).")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = SpatialIndex.rebuild(options['activity_ids'] or None)
+        duration = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {created} activity cells in {duration:.2f} s"))
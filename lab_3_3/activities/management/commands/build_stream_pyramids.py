@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.streams import StreamPyramid
+from activities.tracks import TrackStore
+
+
+class Command(BaseCommand):
+    help = "Будує піраміди LTTB для потоків speed/ele/cadence (ActivityStreamLevel) з GPS-треків."
+
+    def add_arguments(self, parser):
+        parser.add_argument('activity_ids', nargs='*', type=int, help="Лише ці активності (за замовчуванням — усі з треком).")
+        parser.add_argument('--batch-size', type=int, default=StreamPyramid.BATCH_SIZE,
+                            help="Скільки треків читати одним запитом.")
+
+    def handle(self, *args, **options):
+        activity_ids = options['activity_ids'] or TrackStore.activity_ids()
+        start = time.perf_counter()
+        levels, points = StreamPyramid.rebuild(activity_ids, batch_size=options['batch_size'])
+        duration = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {levels} stream levels for {len(set(activity_ids))} activities ({points} points) in {duration:.2f} s"
+        ))
@@ -0,0 +1,42 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.models import Activity
+from activities.segments import SegmentService
+from activities.tracks import TrackStore
+
+
+class Command(BaseCommand):
+    help = "Створює сегмент з ділянки треку активності (точки start_index..end_index включно)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('activity_id', type=int)
+        parser.add_argument('start_index', type=int)
+        parser.add_argument('end_index', type=int)
+        parser.add_argument('--name', required=True)
+        parser.add_argument('--any-type', action='store_true',
+                            help="Рахувати сегмент для активностей будь-якого типу, а не лише типу цієї активності.")
+
+    def handle(self, *args, **options):
+        activity = Activity.objects.filter(pk=options['activity_id']).first()
+        if activity is None:
+            raise CommandError(f"Activity {options['activity_id']} does not exist")
+
+        track = TrackStore.load(activity.pk)
+        start, end = options['start_index'], options['end_index']
+        if not 0 <= start < end < len(track['lat']):
+            raise CommandError(f"Indexes must satisfy 0 <= start < end < {len(track['lat'])}")
+
+        try:
+            segment = SegmentService.create(
+                options['name'], track['lat'][start:end + 1], track['lon'][start:end + 1],
+                activity_type=None if options['any_type'] else activity.activity_type,
+                created_by=activity.user,
+            )
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created segment {segment.pk} '{segment.name}' ({segment.distance_m:.0f} m, {segment.points_count} points); "
+            f"run match_segments --segments {segment.pk} to find efforts"
+        ))
@@ -0,0 +1,70 @@
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.ingestion import TrackImporter, READERS
+
+
+class Command(BaseCommand):
+    help = "Імпортує GPX/CSV треки (файли або каталоги) у Activity та ActivityPoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--user', required=True, help="username власника активностей")
+        parser.add_argument('--type', default='other', dest='activity_type')
+        parser.add_argument('--format', choices=sorted(READERS), default=None,
+                            help="Формат файлів (за замовчуванням — за розширенням).")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--storage', choices=TrackImporter.STORAGES, default='rows')
+
+    def _files(self, paths):
+        for path in map(Path, paths):
+            if path.is_dir():
+                for extension in READERS:
+                    yield from sorted(path.rglob(f'*.{extension}'))
+            else:
+                yield path
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+
+        try:
+            importer = TrackImporter(
+                user, activity_type=options['activity_type'],
+                batch_size=options['batch_size'], storage=options['storage']
+            )
+        except ValidationError as exc:
+            raise CommandError('; '.join(exc.messages))
+
+        started = time.perf_counter()
+        files = points = failed = 0
+
+        for path in self._files(options['paths']):
+            try:
+                fmt = TrackImporter.detect_format(path.name, options['format'])
+                with open(path, 'rb') as fileobj:
+                    result = importer.import_file(fileobj, fmt)
+            except (ValidationError, OSError) as exc:
+                failed += 1
+                messages = exc.messages if isinstance(exc, ValidationError) else [str(exc)]
+                self.stderr.write(f"{path}: {'; '.join(messages)}")
+                continue
+
+            files += 1
+            points += result['points']
+            self.stdout.write(
+                f"{path}: activity #{result['activity_id']}, {result['points']} points "
+                f"({result['rejected_points']} rejected), {result['rows_per_sec']} rows/s"
+            )
+
+        duration = time.perf_counter() - started
+        rate = points / duration if duration > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {files} files ({failed} failed), {points} points in {duration:.2f} s — {rate:.0f} rows/s"
+        ))
@@ -0,0 +1,78 @@
+import concurrent.futures
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.async_views import ASYNC_ENDPOINTS
+
+
+class Command(BaseCommand):
+    help = (
+        "Навантажувальний тест /api/analytics/*: порівнює пропускну здатність WSGI та ASGI розгортань. "
+        "Наприклад: gunicorn lab32.wsgi -w 4 -b :8000 та uvicorn lab32.asgi:application --workers 4 --port 8001."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://127.0.0.1:8000',
+                            help="Базовий URL WSGI-сервера (синхронні /api/analytics/<name>/).")
+        parser.add_argument('--asgi', default='http://127.0.0.1:8001',
+                            help="Базовий URL ASGI-сервера (асинхронні /api/async/analytics/<name>/).")
+        parser.add_argument('--endpoints', nargs='+', choices=sorted(ASYNC_ENDPOINTS), default=sorted(ASYNC_ENDPOINTS))
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+        parser.add_argument('--requests', type=int, default=200, help="Запитів на кожен рівень конкурентності.")
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--skip-wsgi', action='store_true')
+        parser.add_argument('--skip-asgi', action='store_true')
+
+    @staticmethod
+    def _request(url, timeout):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                response.read()
+                ok = 200 <= response.status < 300
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return ok, time.perf_counter() - start
+
+    def _burst(self, urls, concurrency, total, timeout):
+        plan = [urls[i % len(urls)] for i in range(total)]
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda url: self._request(url, timeout), plan))
+        wall = time.perf_counter() - start
+
+        latencies = np.array([latency for ok, latency in results if ok]) * 1000
+        errors = sum(1 for ok, _ in results if not ok)
+        return {
+            'throughput': (total - errors) / wall if wall > 0 else 0.0,
+            'p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p95': float(np.percentile(latencies, 95)) if len(latencies) else None,
+            'errors': errors,
+        }
+
+    def handle(self, *args, **options):
+        targets = []
+        if not options['skip_wsgi']:
+            targets.append(('WSGI', options['wsgi'].rstrip('/') + '/api/analytics/{}/'))
+        if not options['skip_asgi']:
+            targets.append(('ASGI', options['asgi'].rstrip('/') + '/api/async/analytics/{}/'))
+        if not targets:
+            raise CommandError("Nothing to test: both deployments are skipped.")
+
+        self.stdout.write(f"{'target':<6} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+        for label, template in targets:
+            urls = [template.format(name) for name in options['endpoints']]
+            # прогрів: кеші, з'єднання воркерів
+            self._burst(urls, 1, len(urls), options['timeout'])
+
+            for concurrency in options['concurrency']:
+                result = self._burst(urls, concurrency, options['requests'], options['timeout'])
+                p50 = f"{result['p50']:.1f}" if result['p50'] is not None else '-'
+                p95 = f"{result['p95']:.1f}" if result['p95'] is not None else '-'
+                self.stdout.write(
+                    f"{label:<6} {concurrency:>5} {result['throughput']:>9.1f} {p50:>9} {p95:>9} {result['errors']:>7}"
+                )
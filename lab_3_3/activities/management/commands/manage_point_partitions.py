@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from activities.partitions import PointArchive, PointPartitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Обслуговує розділи ActivityPoint (лише PostgreSQL): створює наступні діапазони activity_id, "
+        "від'єднує холодні розділи та архівує їх у Parquet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help="Лише показати підключені та від'єднані розділи.")
+        parser.add_argument('--ahead', type=int, default=2,
+                            help="Скільки порожніх діапазонів тримати наперед після найбільшого id активності.")
+        parser.add_argument('--detach-older-than', type=int, metavar='DAYS',
+                            help="Від'єднати розділи, у яких жодна активність не новіша за DAYS днів.")
+        parser.add_argument('--archive', action='store_true',
+                            help="Записати від'єднані розділи у Parquet і видалити їхні таблиці.")
+        parser.add_argument('--archive-dir', help="Каталог архіву (за замовчуванням ACTIVITY_POINT_ARCHIVE_DIR).")
+
+    def handle(self, *args, **options):
+        if not PointPartitions.is_partitioned():
+            self.stdout.write(self.style.WARNING(
+                "activities_activitypoint is not partitioned (PostgreSQL with migration 0013 required), nothing to do"
+            ))
+            return
+
+        if options['list']:
+            for name, lo, hi, rows in PointPartitions.attached():
+                self.stdout.write(f"{name}: activity_id [{lo}, {hi}), ~{rows} rows")
+            for name in PointPartitions.detached():
+                self.stdout.write(f"{name}: detached")
+            for path in PointArchive.files(directory=options['archive_dir']):
+                self.stdout.write(f"{path}: archived")
+            return
+
+        start = time.perf_counter()
+        created = PointPartitions.ensure(ahead=options['ahead'])
+
+        detached = []
+        if options['detach_older_than'] is not None:
+            for name in PointPartitions.cold(timedelta(days=options['detach_older_than'])):
+                packed = PointPartitions.detach(name)
+                self.stdout.write(f"{name}: detached, {packed} tracks packed into ActivityTrack")
+                detached.append(name)
+
+        archived = rows = 0
+        if options['archive']:
+            for name in PointPartitions.detached():
+                path, written = PointPartitions.archive(name, options['archive_dir'])
+                self.stdout.write(f"{name} -> {path} ({written} points)")
+                archived, rows = archived + 1, rows + written
+        duration = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(created)}, detached {len(detached)}, archived {archived} partitions "
+            f"({rows} points) in {duration:.2f} s"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from activities.segments import SegmentService
+
+
+class Command(BaseCommand):
+    help = "Шукає проходження сегментів в історичних активностях і перезаписує SegmentEffort (пакетами, у пулі процесів)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('activity_ids', nargs='*', type=int, help="Лише ці активності (за замовчуванням — усі з треком).")
+        parser.add_argument('--segments', nargs='+', type=int, default=None, help="Лише ці сегменти.")
+        parser.add_argument('--workers', type=int, default=1, help="Кількість процесів.")
+        parser.add_argument('--chunk-size', type=int, default=SegmentService.CHUNK_SIZE,
+                            help="Активностей на один пакет (одне завантаження треків).")
+
+    def handle(self, *args, **options):
+        result = SegmentService.match(
+            activity_ids=options['activity_ids'] or None,
+            segment_ids=options['segments'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {result['activities']} activities ({result['points']} points) against {result['segments']} segments: "
+            f"{result['candidates']} candidate pairs, {result['efforts']} efforts in {result['seconds']:.2f} s "
+            f"({result['activities_per_sec'] or 0:.1f} activities/s)"
+        ))
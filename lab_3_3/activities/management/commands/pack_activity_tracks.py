@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.models import ActivityPoint, ActivityTrack
+from activities.tracks import TrackStore
+
+
+class Command(BaseCommand):
+    help = "Переносить GPS-точки з ActivityPoint у стиснені колонкові треки ActivityTrack."
+
+    def add_arguments(self, parser):
+        parser.add_argument('activity_ids', nargs='*', type=int)
+        parser.add_argument('--delete-points', action='store_true',
+                            help="Видалити рядки ActivityPoint після упаковки.")
+        parser.add_argument('--repack', action='store_true',
+                            help="Перепакувати активності, що вже мають ActivityTrack.")
+
+    def handle(self, *args, **options):
+        activity_ids = ActivityPoint.objects.values_list('activity_id', flat=True).distinct().order_by('activity_id')
+        if options['activity_ids']:
+            activity_ids = activity_ids.filter(activity_id__in=options['activity_ids'])
+        if not options['repack']:
+            activity_ids = activity_ids.exclude(activity_id__in=ActivityTrack.objects.values('activity_id'))
+
+        start = time.perf_counter()
+        packed = points = blob_bytes = 0
+
+        for activity_id in list(activity_ids):
+            n, size = TrackStore.pack(activity_id, delete_points=options['delete_points'])
+            packed += 1
+            points += n
+            blob_bytes += size
+
+        duration = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Packed {packed} activities ({points} points, {blob_bytes / 1024:.1f} KiB) in {duration:.2f} s"
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.feeds import FeedService
+
+
+class Command(BaseCommand):
+    help = "Перераховує стрічки (fan-out-on-write) і список знаменитостей з нуля або лише обрізає стрічки."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trim', action='store_true', help="Лише обрізати стрічки до FEED_MAX_LENGTH.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['trim']:
+            message = f"Trimmed {FeedService.trim()} feed entries"
+        else:
+            message = f"Rebuilt {FeedService.rebuild()} feed entries"
+        duration = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(f"{message} in {duration:.2f} s"))
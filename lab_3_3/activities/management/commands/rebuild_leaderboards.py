@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.leaderboards import LeaderboardRollup
+
+
+class Command(BaseCommand):
+    help = "Перераховує таблиці лідерів (усі вікна й типи активностей) з нуля пакетними вставками."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=LeaderboardRollup.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = LeaderboardRollup.rebuild(batch_size=options['batch_size'])
+        duration = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {created} leaderboard rows in {duration:.2f} s"
+        ))
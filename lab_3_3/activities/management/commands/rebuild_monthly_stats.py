@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.rollups import MonthlyStatsRollup
+
+
+class Command(BaseCommand):
+    help = "Перераховує UserMonthlyStats з нуля пакетними вставками."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=MonthlyStatsRollup.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = MonthlyStatsRollup.rebuild(batch_size=options['batch_size'])
+        duration = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {created} user-month rows in {duration:.2f} s"
+        ))
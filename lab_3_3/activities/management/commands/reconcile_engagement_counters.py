@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.counters import EngagementCounters
+
+
+class Command(BaseCommand):
+    help = "Звіряє kudos_count/comments_count з фактичними Kudos/Comment і виправляє розбіжності."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Лише порахувати розбіжності, нічого не змінюючи.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        drifted = EngagementCounters.reconcile(dry_run=options['dry_run'])
+        duration = time.perf_counter() - start
+
+        action = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {drifted} activities with drifted counters in {duration:.2f} s"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from activities.cohorts import CohortAnalytics
+
+
+class Command(BaseCommand):
+    help = (
+        "Оновлює матеріалізовані когортні представлення (REFRESH MATERIALIZED VIEW CONCURRENTLY), "
+        "якщо вони застарілі. Призначена для запуску за розкладом (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Оновити без перевірки застарілості.")
+        parser.add_argument('--max-age', type=int, metavar='SECONDS',
+                            help="Оновити, якщо з останнього оновлення минуло більше (за замовчуванням COHORT_VIEWS_MAX_AGE).")
+
+    def handle(self, *args, **options):
+        refresh = CohortAnalytics.refresh(force=options['force'], max_age=options['max_age'])
+        if refresh.mode == 'skipped':
+            refreshed_at = CohortAnalytics.state().created_at
+            self.stdout.write(f"Cohort views are fresh (sources unchanged since {refreshed_at:%Y-%m-%d %H:%M:%S}), skipped")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{refresh.mode.title()} refresh: {refresh.activity_rows} activity cohorts, "
+            f"{refresh.profile_rows} profile cohorts from {refresh.activities} activities and "
+            f"{refresh.profiles} profiles in {refresh.duration_ms / 1000:.2f} s"
+        ))
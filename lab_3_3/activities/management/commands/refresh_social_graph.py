@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from activities.graph import SocialGraphAnalytics
+
+
+class Command(BaseCommand):
+    help = "Перераховує PageRank, взаємні підписки, спільноти та рекомендації підписок (інкрементально, якщо можливо)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Повний перерахунок без теплого старту.")
+
+    def handle(self, *args, **options):
+        refresh = SocialGraphAnalytics.refresh(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{refresh.mode.title()} refresh: {refresh.nodes} users, {refresh.edges} edges, "
+            f"{refresh.pagerank_iterations} PageRank iterations, {refresh.communities} communities, "
+            f"{refresh.users_updated} metrics and {refresh.suggestions_updated} suggestions written "
+            f"in {refresh.duration_ms / 1000:.2f} s"
+        ))
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from activities.benchmarks import (
+    BenchmarkSuite, CONNECTION_MODES, ENDPOINTS, MODES, TARGETS,
+    compare_reports, load_report_file, save_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк реального навантаження: запити AnalyticsRepository та API-ендпоінти у потоках, "
+        "процесах або asyncio; p50/p95/p99, пропускна здатність, перевикористання з'єднань. "
+        "Результат зберігається у JSON для порівняння між комітами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--targets', nargs='+', choices=TARGETS, default=['queries'])
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=['threads'])
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+        parser.add_argument('--connections', nargs='+', choices=CONNECTION_MODES, default=list(CONNECTION_MODES))
+        parser.add_argument('--databases', nargs='+', choices=list(settings.DATABASES), default=[DEFAULT_DB_ALIAS],
+                            help="Alias-и БД, напр. default unpooled — порівняння з пулом і без.")
+        parser.add_argument('--endpoints', nargs='+', choices=sorted(ENDPOINTS), default=None)
+        parser.add_argument('--requests', type=int, default=200, help="Викликів на один повтор сценарію.")
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--repetitions', type=int, default=3)
+        parser.add_argument('--output', default=None, help="Шлях JSON (за замовчуванням — BENCHMARK_RESULTS_DIR).")
+        parser.add_argument('--no-save', action='store_true')
+        parser.add_argument('--compare', default=None, help="Базовий JSON-звіт для порівняння.")
+
+    def _print(self, result):
+        p50 = result['p50_ms'] if result['p50_ms'] is not None else '-'
+        p95 = result['p95_ms'] if result['p95_ms'] is not None else '-'
+        p99 = result['p99_ms'] if result['p99_ms'] is not None else '-'
+        self.stdout.write(
+            f"{result['database']:<10} {result['target']:<8} {result['mode']:<10} {result['connections']:<12} {result['concurrency']:>5} "
+            f"{result['throughput']:>9} {p50:>9} {p95:>9} {p99:>9} {result['errors']:>6}"
+        )
+        pool = result.get('pool')
+        if pool:
+            self.stdout.write(
+                f"{'':<10} pool: size {pool['size']}/{pool['max_size']}, waiting {pool['waiting']}, "
+                f"avg checkout {pool['avg_checkout_ms']} ms, timeouts {pool['timeouts']}"
+            )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = load_report_file(options['compare'])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline report: {exc}")
+
+        try:
+            suite = BenchmarkSuite(
+                targets=options['targets'],
+                modes=options['modes'],
+                concurrency=options['concurrency'],
+                connection_modes=options['connections'],
+                requests=options['requests'],
+                warmup=options['warmup'],
+                repetitions=options['repetitions'],
+                endpoints=options['endpoints'],
+                databases=options['databases'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{'database':<10} {'target':<8} {'mode':<10} {'connections':<12} {'conc':>5} "
+            f"{'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}"
+        )
+        report = suite.run(progress=self._print)
+
+        if not options['no_save']:
+            path = save_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Saved {path}"))
+
+        if baseline is not None:
+            changes = compare_reports(baseline, report)
+            self.stdout.write(f"\nChange vs {baseline['meta'].get('commit') or options['compare']}:")
+            if not changes:
+                self.stdout.write("No scenarios in common with the baseline.")
+            for row in changes:
+                self.stdout.write(
+                    f"{' / '.join(map(str, row['scenario'])):<40} "
+                    f"throughput {row['throughput_change_pct']}%  p95 {row['p95_change_pct']}%"
+                )
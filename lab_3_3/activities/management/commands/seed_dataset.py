@@ -0,0 +1,55 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.seeding import DatasetSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерує відтворюваний синтетичний набір даних (користувачі, профілі, підписки, активності, "
+        "GPS-треки, коментарі, kudos) пакетними вставками/COPY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--activities-per-user', type=float, default=20, help="Середня кількість активностей.")
+        parser.add_argument('--points-per-activity', type=int, default=200,
+                            help="Точок GPS на активність з дистанцією (0 — без треків).")
+        parser.add_argument('--followers-per-user', type=float, default=15, help="Середня кількість підписок.")
+        parser.add_argument('--kudos-per-activity', type=float, default=3.0)
+        parser.add_argument('--comments-per-activity', type=float, default=1.5)
+        parser.add_argument('--reply-probability', type=float, default=0.4)
+        parser.add_argument('--days', type=int, default=365, help="Глибина історії активностей.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='seed_', help="Префікс username згенерованих користувачів.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--storage', choices=('rows', 'packed'), default='rows')
+
+    def handle(self, *args, **options):
+        try:
+            seeder = DatasetSeeder(
+                users=options['users'],
+                activities_per_user=options['activities_per_user'],
+                points_per_activity=options['points_per_activity'],
+                followers_per_user=options['followers_per_user'],
+                kudos_per_activity=options['kudos_per_activity'],
+                comments_per_activity=options['comments_per_activity'],
+                reply_probability=options['reply_probability'],
+                days=options['days'],
+                seed=options['seed'],
+                prefix=options['prefix'],
+                batch_size=options['batch_size'],
+                storage=options['storage'],
+                stdout=self.stdout,
+            )
+            started = time.perf_counter()
+            timings = seeder.run()
+        except ValidationError as exc:
+            raise CommandError('; '.join(exc.messages))
+
+        rows = sum(phase['rows'] for phase in timings.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {rows} rows in {time.perf_counter() - started:.2f} s (seed={options['seed']})"
+        ))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.models import Activity, ActivityPoint, ActivityTrack
+from activities.track_metrics import compute_for_activities
+
+
+class Command(BaseCommand):
+    help = "Перераховує distance_m, elevation_gain_m та duration_sec активностей з їхніх GPS-треків."
+
+    def add_arguments(self, parser):
+        parser.add_argument('activity_ids', nargs='*', type=int)
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Скільки активностей обробляти за один векторизований прохід.")
+
+    def handle(self, *args, **options):
+        if options['activity_ids']:
+            activity_ids = sorted(set(options['activity_ids']))
+        else:
+            activity_ids = sorted(
+                set(ActivityPoint.objects.values_list('activity_id', flat=True).distinct())
+                | set(ActivityTrack.objects.values_list('activity_id', flat=True))
+            )
+
+        batch_size = options['batch_size']
+        start = time.perf_counter()
+        updated = points = 0
+
+        for offset in range(0, len(activity_ids), batch_size):
+            batch = activity_ids[offset:offset + batch_size]
+            metrics = compute_for_activities(batch)
+            activities = Activity.objects.in_bulk(list(metrics))
+
+            for activity_id, values in metrics.items():
+                activity = activities[activity_id]
+                activity.distance_m = values['distance_m']
+                activity.elevation_gain_m = int(round(values['elevation_gain_m']))
+                if values['elapsed_time_sec']:
+                    activity.duration_sec = values['elapsed_time_sec']
+                # save() замість bulk_update, щоб сигнали оновили місячні агрегати
+                activity.save(update_fields=['distance_m', 'elevation_gain_m', 'duration_sec'])
+                points += values['points']
+            updated += len(metrics)
+
+        duration = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} activities ({points} points) in {duration:.2f} s"
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.1 on 2026-10-17 04:13
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usermonthlystats',
+            name='activities_count',
+            field=models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddConstraint(
+            model_name='usermonthlystats',
+            constraint=models.CheckConstraint(condition=models.Q(('activities_count__gte', 0)), name='stats_activities_count_positive'),
+        ),
+    ]
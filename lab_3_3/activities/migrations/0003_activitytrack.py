@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-17 04:14
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0002_usermonthlystats_activities_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityTrack',
+            fields=[
+                ('activity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='track', serialize=False, to='activities.activity')),
+                ('points_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('encoding_version', models.SmallIntegerField(default=1)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('points_count__gte', 0)), name='activitytrack_points_count_positive')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1 on 2026-10-17 04:23
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Activity = apps.get_model('activities', 'Activity')
+    Kudos = apps.get_model('activities', 'Kudos')
+    Comment = apps.get_model('activities', 'Comment')
+
+    def count_of(model):
+        return Coalesce(Subquery(
+            model.objects.filter(activity=OuterRef('pk')).order_by()
+            .values('activity').annotate(n=Count('id')).values('n')
+        ), 0)
+
+    Activity.objects.update(kudos_count=count_of(Kudos), comments_count=count_of(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0003_activitytrack'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='comments_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='kudos_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='activity',
+            constraint=models.CheckConstraint(condition=models.Q(('kudos_count__gte', 0)), name='activity_kudos_count_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='activity',
+            constraint=models.CheckConstraint(condition=models.Q(('comments_count__gte', 0)), name='activity_comments_count_positive'),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='engagement_score',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('kudos_count'), '+', models.F('comments_count')), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('engagement_score__gt', 0)), fields=['-engagement_score', '-id'], name='activity_engagement_idx'),
+        ),
+    ]
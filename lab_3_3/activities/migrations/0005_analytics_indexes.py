@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-17 04:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0004_activity_engagement_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['user', 'start_time'], name='activity_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['start_time'], name='activity_start_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['activity_type'], include=('distance_m', 'elevation_gain_m'), name='activity_type_perf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermonthlystats',
+            index=models.Index(fields=['year', 'month'], include=('activities_count', 'total_distance_m', 'total_duration_sec'), name='stats_year_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermonthlystats',
+            index=models.Index(fields=['user'], include=('total_distance_m',), name='stats_user_distance_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-17 04:35
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0005_analytics_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('week', 'Week'), ('month', 'Month'), ('year', 'Year'), ('all', 'All time')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('activity_type', models.CharField(default='all', max_length=50)),
+                ('total_distance_m', models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0.0)])),
+                ('total_duration_sec', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('activities_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', 'period_start', 'activity_type', '-total_distance_m', 'user'], name='leaderboard_rank_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('total_distance_m__gte', 0)), name='leaderboard_distance_m_positive'), models.CheckConstraint(condition=models.Q(('total_duration_sec__gte', 0)), name='leaderboard_duration_sec_positive'), models.CheckConstraint(condition=models.Q(('activities_count__gte', 0)), name='leaderboard_activities_count_positive'), models.CheckConstraint(condition=models.Q(('window__in', ['week', 'month', 'year', 'all'])), name='leaderboard_window_valid_choice')],
+                'unique_together': {('window', 'period_start', 'activity_type', 'user')},
+            },
+        ),
+    ]
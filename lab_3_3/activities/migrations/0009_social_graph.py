@@ -0,0 +1,65 @@
+# Generated by Django 5.1 on 2026-10-17 04:44
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0008_comment_thread_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SocialGraphRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', 'Full'), ('incremental', 'Incremental'), ('skipped', 'Skipped')], max_length=20)),
+                ('nodes', models.IntegerField(default=0)),
+                ('edges', models.IntegerField(default=0)),
+                ('last_follower_id', models.BigIntegerField(blank=True, null=True)),
+                ('pagerank_iterations', models.IntegerField(default=0)),
+                ('communities', models.IntegerField(default=0)),
+                ('users_updated', models.IntegerField(default=0)),
+                ('suggestions_updated', models.IntegerField(default=0)),
+                ('duration_ms', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserGraphMetrics',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='graph_metrics', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('following_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('mutual_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('pagerank', models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0.0)])),
+                ('community_id', models.BigIntegerField()),
+                ('community_size', models.IntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-pagerank'], name='graph_pagerank_idx'), models.Index(fields=['community_id'], name='graph_community_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('followers_count__gte', 0), ('following_count__gte', 0), ('mutual_count__gte', 0)), name='graph_counts_positive'), models.CheckConstraint(condition=models.Q(('pagerank__gte', 0)), name='graph_pagerank_positive')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mutual_connections', models.IntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('rank', models.SmallIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('suggested', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'rank'], name='suggestion_user_rank_idx')],
+                'unique_together': {('user', 'suggested')},
+            },
+        ),
+    ]
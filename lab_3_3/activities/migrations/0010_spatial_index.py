@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-17 04:46
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0009_social_graph'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityBounds',
+            fields=[
+                ('activity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bounds', serialize=False, to='activities.activity')),
+                ('min_lat', models.FloatField()),
+                ('max_lat', models.FloatField()),
+                ('min_lon', models.FloatField()),
+                ('max_lon', models.FloatField()),
+                ('points_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('min_lat__lte', models.F('max_lat')), ('min_lon__lte', models.F('max_lon'))), name='activitybounds_min_lte_max')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ActivityCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.BigIntegerField()),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cells', to='activities.activity')),
+            ],
+            options={
+                'unique_together': {('cell', 'activity')},
+            },
+        ),
+    ]
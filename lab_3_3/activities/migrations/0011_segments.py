@@ -0,0 +1,75 @@
+# Generated by Django 5.1 on 2026-10-17 04:53
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0010_spatial_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Segment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('activity_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('polyline', models.BinaryField()),
+                ('points_count', models.IntegerField(validators=[django.core.validators.MinValueValidator(2)])),
+                ('distance_m', models.FloatField(validators=[django.core.validators.MinValueValidator(0.0)])),
+                ('min_lat', models.FloatField()),
+                ('max_lat', models.FloatField()),
+                ('min_lon', models.FloatField()),
+                ('max_lon', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='segments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SegmentEffort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_index', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('end_index', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('started_at', models.DateTimeField()),
+                ('elapsed_sec', models.FloatField(validators=[django.core.validators.MinValueValidator(0.0)])),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_efforts', to='activities.activity')),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='efforts', to='activities.segment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_efforts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='segment',
+            index=models.Index(fields=['min_lat', 'max_lat', 'min_lon', 'max_lon'], name='segment_bounds_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='segment',
+            constraint=models.CheckConstraint(condition=models.Q(('min_lat__lte', models.F('max_lat')), ('min_lon__lte', models.F('max_lon'))), name='segment_min_lte_max'),
+        ),
+        migrations.AddConstraint(
+            model_name='segment',
+            constraint=models.CheckConstraint(condition=models.Q(('distance_m__gt', 0)), name='segment_distance_m_positive'),
+        ),
+        migrations.AddIndex(
+            model_name='segmenteffort',
+            index=models.Index(fields=['segment', 'elapsed_sec', 'user'], name='segment_effort_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='segmenteffort',
+            constraint=models.CheckConstraint(condition=models.Q(('elapsed_sec__gte', 0)), name='segmenteffort_elapsed_sec_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='segmenteffort',
+            constraint=models.CheckConstraint(condition=models.Q(('start_index__lte', models.F('end_index'))), name='segmenteffort_start_lte_end'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='segmenteffort',
+            unique_together={('segment', 'activity', 'start_index')},
+        ),
+    ]
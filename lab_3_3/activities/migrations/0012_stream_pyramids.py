@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-17 04:57
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0011_segments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityStreamLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.SmallIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('points_count', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('source_points', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('data', models.BinaryField()),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stream_levels', to='activities.activity')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('points_count__lte', models.F('source_points'))), name='activitystreamlevel_points_lte_source')],
+                'unique_together': {('activity', 'level')},
+            },
+        ),
+    ]
@@ -0,0 +1,198 @@
+"""
+Postgres: activities_activitypoint стає таблицею, розбитою на діапазони activity_id
+(PARTITION BY RANGE) з DEFAULT-розділом; наступні розділи створює manage_point_partitions.
+
+Первинний ключ розбитої таблиці мусить містити ключ розбиття, тому в БД він (activity_id, id) під
+звичною назвою activities_activitypoint_pkey; Django і далі вважає pk полем id (унікальність id
+гарантує послідовність). Postgres 16 не підтримує identity-колонки на розбитих таблицях, тож id бере
+значення з activities_activitypoint_id_seq (OWNED BY, як у serial). Зовнішній ключ та індекс activity_id
+мають ті самі назви, що створив би Django, тож стан міграцій не змінюється, крім activitypoint_track_idx.
+
+Перенесення онлайн (міграція не атомарна): тригер записує id змінених рядків старої таблиці,
+рядки копіюються пакетами по BATCH_SIZE id, кожен пакет у своїй транзакції, поки застосунок
+читає й пише стару таблицю. Під ACCESS EXCLUSIVE лишається коротка фінальна транзакція: повтор
+змінених рядків, перевірка зовнішнього ключа (скан нової таблиці — Postgres 16 не вміє NOT VALID
+для розбитих таблиць), DROP старої таблиці й перейменування. Перерваний прогін можна повторити:
+незавершена нова таблиця перестворюється. На інших СУБД додається лише індекс.
+"""
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+TABLE = 'activities_activitypoint'
+BUILD = f'{TABLE}_partitioned'
+SEQUENCE = f'{TABLE}_id_seq'
+BUILD_SEQUENCE = f'{BUILD}_id_seq'
+CHANGES = f'{TABLE}_changes'
+LOG_CHANGE = f'{TABLE}_log_change'
+COLUMNS = ('id', 'activity_id', 'recorded_at', 'lat', 'lon', 'ele', 'speed', 'cadence')
+BATCH_SIZE = 50000
+
+TRACK_INDEX = models.Index(fields=['activity', 'recorded_at', 'id'], name='activitypoint_track_idx')
+
+
+def _names(apps, schema_editor):
+    """Назви первинного ключа, зовнішнього ключа та індексу activity_id, які створює Django."""
+    model = apps.get_model('activities', 'ActivityPoint')
+    field = model._meta.get_field('activity')
+    fk = str(schema_editor._fk_constraint_name(model, field, '_fk_%(to_table)s_%(to_column)s')).strip('"')
+    return model, field, f'{TABLE}_pkey', fk, schema_editor._create_index_name(TABLE, [field.column])
+
+
+def _is_partitioned(cursor):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE])
+    return cursor.fetchone() is not None
+
+
+def partition(apps, schema_editor):
+    connection = schema_editor.connection
+    model, field, pkey, fk, fk_index = _names(apps, schema_editor)
+    if connection.vendor != 'postgresql':
+        schema_editor.add_index(model, TRACK_INDEX)
+        return
+
+    size = getattr(settings, 'ACTIVITY_POINT_PARTITION_SIZE', 100000)
+    quote = schema_editor.quote_name
+    table, build, changes = quote(TABLE), quote(BUILD), quote(CHANGES)
+    columns = ', '.join(quote(column) for column in COLUMNS)
+    alias = connection.alias
+
+    with connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            return
+
+    # 1. Журнал змін: після цієї транзакції кожен INSERT/UPDATE/DELETE старої таблиці лишає свій id.
+    #    CREATE TRIGGER чекає на відкриті транзакції запису, тож усе, що було до нього, уже видно.
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {build} CASCADE")
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {quote(BUILD_SEQUENCE)}")
+        cursor.execute(f"DROP TRIGGER IF EXISTS {quote(LOG_CHANGE)} ON {table}")
+        cursor.execute(f"DROP TABLE IF EXISTS {changes}")
+        cursor.execute(f"CREATE UNLOGGED TABLE {changes} (id bigint NOT NULL)")
+        cursor.execute(
+            f"CREATE OR REPLACE FUNCTION {quote(LOG_CHANGE)}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            f"INSERT INTO {changes} (id) VALUES (CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END); "
+            f"IF TG_OP = 'UPDATE' AND OLD.id <> NEW.id THEN INSERT INTO {changes} (id) VALUES (OLD.id); END IF; "
+            f"RETURN NULL; END $$"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {quote(LOG_CHANGE)} AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {quote(LOG_CHANGE)}()"
+        )
+
+    # 2. Порожня розбита таблиця з тими самими колонками й CHECK-обмеженнями, розділи та індекси
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM activities_activity")
+        top = cursor.fetchone()[0]
+        cursor.execute(f"SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM {table}")
+        first_id, last_id = cursor.fetchone()
+
+        for sql in [
+            f"CREATE SEQUENCE {quote(BUILD_SEQUENCE)} AS bigint",
+            f"CREATE TABLE {build} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (activity_id)",
+            f"ALTER TABLE {build} ALTER COLUMN id SET DEFAULT nextval('{BUILD_SEQUENCE}')",
+            f"ALTER SEQUENCE {quote(BUILD_SEQUENCE)} OWNED BY {build}.id",
+            f"CREATE TABLE {quote(TABLE + '_default')} PARTITION OF {build} DEFAULT",
+        ]:
+            cursor.execute(sql)
+        # Розділи для наявних активностей і ще один діапазон наперед
+        for lo in range(0, top + size + 1, size):
+            cursor.execute(
+                f"CREATE TABLE {quote(f'{TABLE}_p{lo}_{lo + size}')} PARTITION OF {build} "
+                f"FOR VALUES FROM ({lo}) TO ({lo + size})"
+            )
+        # Тимчасові назви: постійні ще зайняті індексами старої таблиці
+        cursor.execute(f"ALTER TABLE {build} ADD CONSTRAINT {quote(BUILD + '_pkey')} PRIMARY KEY (activity_id, id)")
+        cursor.execute(f"CREATE INDEX {quote(BUILD + '_activity_id')} ON {build} (activity_id)")
+        cursor.execute(
+            f"CREATE INDEX {quote(TRACK_INDEX.name)} ON {build} (activity_id, recorded_at, id)"
+        )
+
+    # 3. Пакетне копіювання; змінені під час копіювання рядки повторюються на кроці 4
+    for lo in range(first_id - 1, last_id, BATCH_SIZE):
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {build} ({columns}) SELECT {columns} FROM {table} WHERE id > %s AND id <= %s",
+                [lo, lo + BATCH_SIZE],
+            )
+
+    # 4. Коротка фінальна транзакція під блокуванням
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"DELETE FROM {build} WHERE id IN (SELECT id FROM {changes})")
+        cursor.execute(
+            f"INSERT INTO {build} ({columns}) SELECT {columns} FROM {table} WHERE id IN (SELECT id FROM {changes})"
+        )
+        # Наступний id — не менший за вже виданий старою послідовністю (включно з видаленими рядками)
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        cursor.execute(f"SELECT last_value FROM {cursor.fetchone()[0]}")
+        next_id = max(cursor.fetchone()[0], last_id) + 1
+
+        for sql in [
+            f"ALTER TABLE {build} ADD CONSTRAINT {quote(fk)} FOREIGN KEY (activity_id) "
+            f"REFERENCES activities_activity (id) DEFERRABLE INITIALLY DEFERRED",
+            f"DROP TABLE {table}",
+            f"DROP TABLE {changes}",
+            f"DROP FUNCTION {quote(LOG_CHANGE)}()",
+            f"ALTER TABLE {build} RENAME TO {table}",
+            f"ALTER TABLE {table} RENAME CONSTRAINT {quote(BUILD + '_pkey')} TO {quote(pkey)}",
+            f"ALTER INDEX {quote(BUILD + '_activity_id')} RENAME TO {quote(fk_index)}",
+            f"ALTER SEQUENCE {quote(BUILD_SEQUENCE)} RENAME TO {quote(SEQUENCE)}",
+        ]:
+            cursor.execute(sql)
+        cursor.execute("SELECT setval(%s, %s, false)", [SEQUENCE, next_id])
+
+
+def unpartition(apps, schema_editor):
+    """
+    Зворотно — звичайна таблиця з підключених розділів, створена Django (ті самі назви й identity-id),
+    в одній транзакції. Від'єднані та заархівовані розділи не повертаються.
+    """
+    connection = schema_editor.connection
+    model, field, pkey, fk, fk_index = _names(apps, schema_editor)
+    if connection.vendor != 'postgresql':
+        schema_editor.remove_index(model, TRACK_INDEX)
+        return
+
+    quote = schema_editor.quote_name
+    table, build = quote(TABLE), quote(BUILD)
+    columns = ', '.join(quote(column) for column in COLUMNS)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if not _is_partitioned(cursor):
+            return
+        for sql in [
+            f"ALTER TABLE {table} RENAME TO {build}",
+            f"ALTER TABLE {build} RENAME CONSTRAINT {quote(pkey)} TO {quote(BUILD + '_pkey')}",
+            f"ALTER INDEX {quote(fk_index)} RENAME TO {quote(BUILD + '_activity_id')}",
+            f"ALTER SEQUENCE {quote(SEQUENCE)} RENAME TO {quote(BUILD_SEQUENCE)}",
+        ]:
+            cursor.execute(sql)
+        # Таблиця, індекс і зовнішній ключ — так, як їх створює Django для стану 0012
+        schema_editor.create_model(model)
+        for sql in schema_editor.deferred_sql:
+            schema_editor.execute(sql)
+        schema_editor.deferred_sql.clear()
+        cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {build}")
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f"(SELECT GREATEST(COALESCE(MAX(id), 0), (SELECT last_value FROM {quote(BUILD_SEQUENCE)})) FROM {table}) + 1, false)",
+            [TABLE],
+        )
+        cursor.execute(f"DROP TABLE {build} CASCADE")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('activities', '0012_stream_pyramids'),
+    ]
+
+    operations = [
+        # Схему в БД змінює лише RunPython; стан Django отримує тільки індекс треку
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(partition, unpartition)],
+            state_operations=[migrations.AddIndex(model_name='activitypoint', index=TRACK_INDEX)],
+        ),
+    ]
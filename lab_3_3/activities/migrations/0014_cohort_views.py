@@ -0,0 +1,159 @@
+# Generated by Django 5.1 on 2026-10-17 05:04
+"""
+Когортні представлення над Profile x Activity. На Postgres — MATERIALIZED VIEW з унікальним індексом
+за вимірами (потрібен для REFRESH ... CONCURRENTLY), створені WITH NO DATA: перше наповнення робить
+refresh_cohort_views. На інших СУБД — звичайні VIEW, що рахуються під час запиту.
+"""
+
+from django.db import migrations, models
+
+# Атрибути профілю користувача; без профілю чи з порожнім полем — 'unknown'
+COHORT = """
+    COALESCE(NULLIF(TRIM(p.country), ''), 'unknown') AS country,
+    CASE
+        WHEN p.age IS NULL THEN 'unknown'
+        WHEN p.age < 18 THEN '<18'
+        WHEN p.age < 25 THEN '18-24'
+        WHEN p.age < 35 THEN '25-34'
+        WHEN p.age < 45 THEN '35-44'
+        WHEN p.age < 55 THEN '45-54'
+        WHEN p.age < 65 THEN '55-64'
+        ELSE '65+'
+    END AS age_band,
+    COALESCE(NULLIF(p.gender, ''), 'unknown') AS gender
+"""
+
+ACTIVITY_TOTALS = """
+    COUNT(DISTINCT a.user_id) AS athletes,
+    COUNT(*) AS activities_count,
+    COALESCE(SUM(a.distance_m), 0) AS total_distance_m,
+    COALESCE(SUM(a.duration_sec), 0) AS total_duration_sec,
+    COALESCE(SUM(a.elevation_gain_m), 0) AS total_elevation_gain_m
+"""
+
+# Рядки 'all' рахуються окремо, а не сумою типів: інакше athletes врахував би користувача кілька разів
+COHORT_ACTIVITY_STATS = f"""
+SELECT row_number() OVER (ORDER BY country, age_band, gender, activity_type) AS id, cohorts.*
+FROM (
+    SELECT {COHORT}, a.activity_type, {ACTIVITY_TOTALS}
+    FROM activities_activity a LEFT JOIN activities_profile p ON p.user_id = a.user_id
+    GROUP BY 1, 2, 3, 4
+    UNION ALL
+    SELECT {COHORT}, 'all' AS activity_type, {ACTIVITY_TOTALS}
+    FROM activities_activity a LEFT JOIN activities_profile p ON p.user_id = a.user_id
+    GROUP BY 1, 2, 3
+) cohorts
+"""
+
+BMI = "CASE WHEN p.height_cm > 0 THEN p.weight_kg / ((p.height_cm / 100.0) * (p.height_cm / 100.0)) END"
+
+COHORT_PROFILE_STATS = f"""
+SELECT row_number() OVER (ORDER BY country, age_band, gender) AS id, cohorts.*
+FROM (
+    SELECT {COHORT},
+        COUNT(*) AS athletes,
+        COALESCE(SUM(p.age), 0) AS age_sum,
+        COUNT(p.age) AS age_count,
+        COALESCE(SUM(p.weight_kg), 0) AS weight_kg_sum,
+        COUNT(p.weight_kg) AS weight_kg_count,
+        COALESCE(SUM(p.height_cm), 0) AS height_cm_sum,
+        COUNT(p.height_cm) AS height_cm_count,
+        COALESCE(SUM({BMI}), 0) AS bmi_sum,
+        COUNT({BMI}) AS bmi_count
+    FROM auth_user u LEFT JOIN activities_profile p ON p.user_id = u.id
+    GROUP BY 1, 2, 3
+) cohorts
+"""
+
+VIEWS = [
+    ('activities_cohortactivitystats', COHORT_ACTIVITY_STATS, ('country', 'age_band', 'gender', 'activity_type')),
+    ('activities_cohortprofilestats', COHORT_PROFILE_STATS, ('country', 'age_band', 'gender')),
+]
+
+
+def create_views(apps, schema_editor):
+    quote = schema_editor.quote_name
+    materialized = schema_editor.connection.vendor == 'postgresql'
+    for name, sql, dimensions in VIEWS:
+        if not materialized:
+            schema_editor.execute(f"CREATE VIEW {quote(name)} AS {sql}")
+            continue
+
+        schema_editor.execute(f"CREATE MATERIALIZED VIEW {quote(name)} AS {sql} WITH NO DATA")
+        schema_editor.execute(f"CREATE UNIQUE INDEX {quote(name + '_pk')} ON {quote(name)} (id)")
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX {quote(name + '_cohort_uniq')} ON {quote(name)} ({', '.join(dimensions)})"
+        )
+
+
+def drop_views(apps, schema_editor):
+    kind = 'MATERIALIZED VIEW' if schema_editor.connection.vendor == 'postgresql' else 'VIEW'
+    for name, _, _ in VIEWS:
+        schema_editor.execute(f"DROP {kind} IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0013_partition_activity_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortActivityStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('age_band', models.CharField(max_length=20)),
+                ('gender', models.CharField(max_length=50)),
+                ('activity_type', models.CharField(max_length=50)),
+                ('athletes', models.IntegerField()),
+                ('activities_count', models.IntegerField()),
+                ('total_distance_m', models.FloatField()),
+                ('total_duration_sec', models.FloatField()),
+                ('total_elevation_gain_m', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'activities_cohortactivitystats',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CohortProfileStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('age_band', models.CharField(max_length=20)),
+                ('gender', models.CharField(max_length=50)),
+                ('athletes', models.IntegerField()),
+                ('age_sum', models.BigIntegerField()),
+                ('age_count', models.IntegerField()),
+                ('weight_kg_sum', models.FloatField()),
+                ('weight_kg_count', models.IntegerField()),
+                ('height_cm_sum', models.FloatField()),
+                ('height_cm_count', models.IntegerField()),
+                ('bmi_sum', models.FloatField()),
+                ('bmi_count', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'activities_cohortprofilestats',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CohortViewRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', 'Full'), ('concurrent', 'Concurrent'), ('live', 'Live view'), ('skipped', 'Skipped')], max_length=20)),
+                ('activities', models.BigIntegerField(default=0)),
+                ('last_activity_id', models.BigIntegerField(blank=True, null=True)),
+                ('profiles', models.BigIntegerField(default=0)),
+                ('last_profile_id', models.BigIntegerField(blank=True, null=True)),
+                ('activity_rows', models.IntegerField(default=0)),
+                ('profile_rows', models.IntegerField(default=0)),
+                ('duration_ms', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(create_views, drop_views),
+    ]
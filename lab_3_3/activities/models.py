@@ -100,6 +100,16 @@ class Activity(models.Model):
     start_time = models.DateTimeField(null=True, blank=True)
     end_time = models.DateTimeField(null=True, blank=True)
 
+    # Денормалізовані лічильники: змінюються лише атомарними F()-оновленнями (див. counters.py)
+    kudos_count = models.IntegerField(default=0, editable=False)
+    comments_count = models.IntegerField(default=0, editable=False)
+    engagement_score = models.GeneratedField(
+        expression=F('kudos_count') + F('comments_count'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+
+    COUNTER_FIELDS = ('kudos_count', 'comments_count')
 
     def clean(self):
         if self.start_time and self.end_time:
@@ -110,9 +120,31 @@ class Activity(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Не перезаписуємо лічильники застарілими значеннями з екземпляра
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
 
     class Meta:
+        indexes = [
+            # Стрічка/історія користувача та фільтри за періодом
+            models.Index(fields=['user', 'start_time'], name='activity_user_start_idx'),
+            models.Index(fields=['start_time'], name='activity_start_time_idx'),
+            # Покриваючий індекс для get_activity_type_performance (index-only scan)
+            models.Index(
+                fields=['activity_type'],
+                include=['distance_m', 'elevation_gain_m'],
+                name='activity_type_perf_idx'
+            ),
+            models.Index(
+                fields=['-engagement_score', '-id'],
+                condition=models.Q(engagement_score__gt=0),
+                name='activity_engagement_idx'
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(duration_sec__gte=0),
@@ -126,6 +158,14 @@ class Activity(models.Model):
                 check=models.Q(elevation_gain_m__gte=0),
                 name='activity_elevation_gain_m_positive'
             ),
+            models.CheckConstraint(
+                check=models.Q(kudos_count__gte=0),
+                name='activity_kudos_count_positive'
+            ),
+            models.CheckConstraint(
+                check=models.Q(comments_count__gte=0),
+                name='activity_comments_count_positive'
+            ),
             models.CheckConstraint(
                 check=models.Q(end_time__gte=F('start_time')),
                 name='activity_end_time_gte_start_time'
@@ -145,6 +185,11 @@ class Activity(models.Model):
 
 
 class ActivityPoint(models.Model):
+    """
+    GPS-точка треку. На Postgres таблиця розбита на діапазони activity_id (міграція 0013, partitions.py):
+    старі розділи від'єднуються й архівуються в Parquet, а видалення активності зачіпає лише її розділ.
+    """
+
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="points")
 
     lat = models.FloatField()
@@ -162,6 +207,10 @@ class ActivityPoint(models.Model):
     )
 
     class Meta:
+        indexes = [
+            # Читання треку: точки однієї активності в порядку часу (у межах одного розділу)
+            models.Index(fields=['activity', 'recorded_at', 'id'], name='activitypoint_track_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(speed__gte=0),
@@ -177,6 +226,105 @@ class ActivityPoint(models.Model):
         return f"Point at ({self.lat}, {self.lon})"
 
 
+class ActivityTrack(models.Model):
+    """Стиснений колонковий трек активності (альтернатива рядкам ActivityPoint)."""
+
+    activity = models.OneToOneField(
+        Activity,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="track"
+    )
+    points_count = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
+    encoding_version = models.SmallIntegerField(default=1)
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(points_count__gte=0),
+                name='activitytrack_points_count_positive'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Track of Activity {self.activity_id} ({self.points_count} points)"
+
+
+class ActivityStreamLevel(models.Model):
+    """
+    Рівень піраміди потоків (speed/ele/cadence): трек, проріджений LTTB до points_count точок,
+    у форматі TrackCodec. Рівень 1 — у LEVEL_FACTOR разів менше за вихідний трек, далі кожен наступний.
+    """
+
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="stream_levels")
+    level = models.SmallIntegerField(validators=[MinValueValidator(1)])
+    points_count = models.IntegerField(validators=[MinValueValidator(0)])
+    # Кількість точок вихідного треку, з якого побудовано рівень
+    source_points = models.IntegerField(validators=[MinValueValidator(0)])
+    data = models.BinaryField()
+
+    class Meta:
+        unique_together = ('activity', 'level')
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(points_count__lte=F('source_points')),
+                name='activitystreamlevel_points_lte_source'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Stream level {self.level} of Activity {self.activity_id} ({self.points_count} points)"
+
+
+class ActivityBounds(models.Model):
+    """Прямокутник, що містить усі GPS-точки активності (грубий фільтр просторового пошуку)."""
+
+    activity = models.OneToOneField(
+        Activity,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="bounds"
+    )
+    min_lat = models.FloatField()
+    max_lat = models.FloatField()
+    min_lon = models.FloatField()
+    max_lon = models.FloatField()
+    points_count = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(min_lat__lte=F('max_lat')) & models.Q(min_lon__lte=F('max_lon')),
+                name='activitybounds_min_lte_max'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Bounds of Activity {self.activity_id}: ({self.min_lat}, {self.min_lon}) - ({self.max_lat}, {self.max_lon})"
+
+
+class ActivityCell(models.Model):
+    """Комірка сітки (див. spatial.py), через яку проходить трек: одна пара (комірка, активність)."""
+
+    cell = models.BigIntegerField()
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="cells")
+
+    class Meta:
+        # Індекс (cell, activity): діапазон комірок одного рядка сітки -> id активностей без читання таблиці
+        unique_together = ('cell', 'activity')
+
+    def __str__(self):
+        return f"Cell {self.cell} of Activity {self.activity_id}"
+
+
 class Comment(models.Model):
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="comments")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
@@ -191,8 +339,19 @@ class Comment(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Корені дерева коментарів активності (див. threads.py); відповіді — по індексу parent_comment
+            models.Index(
+                fields=['activity', 'created_at'],
+                condition=models.Q(parent_comment__isnull=True),
+                name='comment_thread_root_idx'
+            ),
+        ]
+
     def __str__(self):
-        return f"Comment by {self.user.username} on Activity {self.activity.id}"
+        # activity_id замість self.activity: без додаткового запиту на кожен рядок
+        return f"Comment by {self.user.username} on Activity {self.activity_id}"
 
 
 class Kudos(models.Model):
@@ -204,7 +363,7 @@ class Kudos(models.Model):
         unique_together = ('activity', 'user')
 
     def __str__(self):
-        return f"Kudos from {self.user.username} to Activity {self.activity.id}"
+        return f"Kudos from {self.user.username} to Activity {self.activity_id}"
 
 
 class Follower(models.Model):
@@ -232,9 +391,26 @@ class UserMonthlyStats(models.Model):
         default=0,
         validators=[MinValueValidator(0)]
     )
+    activities_count = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
 
     class Meta:
         unique_together = ('user', 'year', 'month')
+        indexes = [
+            # Місячна динаміка та лідерборд читаються лише з індексу
+            models.Index(
+                fields=['year', 'month'],
+                include=['activities_count', 'total_distance_m', 'total_duration_sec'],
+                name='stats_year_month_idx'
+            ),
+            models.Index(
+                fields=['user'],
+                include=['total_distance_m'],
+                name='stats_user_distance_idx'
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(total_distance_m__gte=0),
@@ -244,7 +420,345 @@ class UserMonthlyStats(models.Model):
                 check=models.Q(total_duration_sec__gte=0),
                 name='stats_duration_sec_positive'
             ),
+            models.CheckConstraint(
+                check=models.Q(activities_count__gte=0),
+                name='stats_activities_count_positive'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.user.username} - {self.year}/{self.month}"
+
+
+class LeaderboardEntry(models.Model):
+    """Підсумок користувача в одній таблиці лідерів: вікно (тиждень/місяць/рік/весь час) x тип активності."""
+
+    WINDOWS = [
+        ('week', 'Week'),
+        ('month', 'Month'),
+        ('year', 'Year'),
+        ('all', 'All time'),
+    ]
+    ALL_TYPES = 'all'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="leaderboard_entries")
+    window = models.CharField(max_length=10, choices=WINDOWS)
+    # Початок календарного періоду (понеділок / 1-ше число / 1 січня); для 'all' — 1970-01-01
+    period_start = models.DateField()
+    activity_type = models.CharField(max_length=50, default=ALL_TYPES)
+
+    total_distance_m = models.FloatField(
+        default=0.0,
+        validators=[MinValueValidator(0.0)]
+    )
+    total_duration_sec = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
+    activities_count = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
+
+    class Meta:
+        unique_together = ('window', 'period_start', 'activity_type', 'user')
+        indexes = [
+            # Top-N і ранг: діапазон по одній таблиці лідерів у порядку рейтингу
+            models.Index(
+                fields=['window', 'period_start', 'activity_type', '-total_distance_m', 'user'],
+                name='leaderboard_rank_idx'
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(total_distance_m__gte=0),
+                name='leaderboard_distance_m_positive'
+            ),
+            models.CheckConstraint(
+                check=models.Q(total_duration_sec__gte=0),
+                name='leaderboard_duration_sec_positive'
+            ),
+            models.CheckConstraint(
+                check=models.Q(activities_count__gte=0),
+                name='leaderboard_activities_count_positive'
+            ),
+            models.CheckConstraint(
+                check=models.Q(window__in=['week', 'month', 'year', 'all']),
+                name='leaderboard_window_valid_choice'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.window} {self.period_start} ({self.activity_type})"
+
+
+class FeedEntry(models.Model):
+    """
+    Рядок матеріалізованої стрічки: активність, розіслана підписнику при збереженні (fan-out-on-write).
+    published_at — копія Activity.start_time, щоб сторінка стрічки читалася одним діапазоном індексу.
+    """
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="feed_entries")
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="feed_entries")
+    published_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'activity')
+        indexes = [
+            models.Index(fields=['owner', '-published_at', '-activity'], name='feed_owner_time_idx'),
         ]
 
     def __str__(self):
-        return f"Stats for {self.user.username} - {self.year}/{self.month}"
\ No newline at end of file
+        return f"Activity {self.activity_id} in feed of user {self.owner_id}"
+
+
+class FeedCelebrity(models.Model):
+    """
+    Автор із надто великою кількістю підписників для fan-out: його активності не розсилаються,
+    а дочитуються підписниками під час читання стрічки (fan-out-on-read).
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="feed_celebrity")
+    followers_count = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
+    marked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(followers_count__gte=0),
+                name='feedcelebrity_followers_count_positive'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} ({self.followers_count} followers, fan-out-on-read)"
+
+
+class UserGraphMetrics(models.Model):
+    """Метрики користувача в графі підписок, пораховані activities/graph.py (refresh_social_graph)."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="graph_metrics")
+    followers_count = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    following_count = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    mutual_count = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    pagerank = models.FloatField(default=0.0, validators=[MinValueValidator(0.0)])
+    # Спільнота (label propagation) позначається id одного з користувачів
+    community_id = models.BigIntegerField()
+    community_size = models.IntegerField(default=1, validators=[MinValueValidator(1)])
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-pagerank'], name='graph_pagerank_idx'),
+            models.Index(fields=['community_id'], name='graph_community_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(followers_count__gte=0) & models.Q(following_count__gte=0) & models.Q(mutual_count__gte=0),
+                name='graph_counts_positive'
+            ),
+            models.CheckConstraint(
+                check=models.Q(pagerank__gte=0),
+                name='graph_pagerank_positive'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Graph metrics of user {self.user_id} (pagerank {self.pagerank:.6f})"
+
+
+class FollowSuggestion(models.Model):
+    """«Люди, яких ви можете знати»: кандидати за кількістю двокрокових шляхів через підписки."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="follow_suggestions")
+    suggested = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    mutual_connections = models.IntegerField(validators=[MinValueValidator(1)])
+    rank = models.SmallIntegerField(validators=[MinValueValidator(1)])
+
+    class Meta:
+        unique_together = ('user', 'suggested')
+        indexes = [
+            models.Index(fields=['user', 'rank'], name='suggestion_user_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Suggest user {self.suggested_id} to user {self.user_id} (#{self.rank})"
+
+
+class SocialGraphRefresh(models.Model):
+    """Журнал перерахунків графа; останній повний/інкрементальний запис — стан для наступного refresh."""
+
+    MODES = [
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+        ('skipped', 'Skipped'),
+    ]
+
+    mode = models.CharField(max_length=20, choices=MODES)
+    nodes = models.IntegerField(default=0)
+    edges = models.IntegerField(default=0)
+    # Найбільший Follower.id на момент перерахунку: нові підписки мають більший id
+    last_follower_id = models.BigIntegerField(null=True, blank=True)
+    pagerank_iterations = models.IntegerField(default=0)
+    communities = models.IntegerField(default=0)
+    users_updated = models.IntegerField(default=0)
+    suggestions_updated = models.IntegerField(default=0)
+    duration_ms = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.mode} graph refresh at {self.created_at:%Y-%m-%d %H:%M} ({self.edges} edges)"
+
+
+class Segment(models.Model):
+    """
+    Заданий відрізок маршруту. Полілінія зберігається блобом TrackCodec (лише lat/lon),
+    bbox — колонками для просторового фільтра кандидатів (див. segments.py).
+    """
+
+    name = models.CharField(max_length=255)
+    # None — сегмент рахується для активностей будь-якого типу
+    activity_type = models.CharField(max_length=50, null=True, blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="segments"
+    )
+    polyline = models.BinaryField()
+    points_count = models.IntegerField(validators=[MinValueValidator(2)])
+    distance_m = models.FloatField(validators=[MinValueValidator(0.0)])
+    min_lat = models.FloatField()
+    max_lat = models.FloatField()
+    min_lon = models.FloatField()
+    max_lon = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['min_lat', 'max_lat', 'min_lon', 'max_lon'], name='segment_bounds_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(min_lat__lte=F('max_lat')) & models.Q(min_lon__lte=F('max_lon')),
+                name='segment_min_lte_max'
+            ),
+            models.CheckConstraint(
+                check=models.Q(distance_m__gt=0),
+                name='segment_distance_m_positive'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.distance_m:.0f} m)"
+
+
+class SegmentEffort(models.Model):
+    """Одне проходження сегмента в активності; рейтинг сегмента — діапазон індексу за elapsed_sec."""
+
+    segment = models.ForeignKey(Segment, on_delete=models.CASCADE, related_name="efforts")
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="segment_efforts")
+    # Копія Activity.user: рейтинг (найкраще проходження кожного користувача) без JOIN з Activity
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="segment_efforts")
+    # Індекси точок треку, між якими пройдено сегмент
+    start_index = models.IntegerField(validators=[MinValueValidator(0)])
+    end_index = models.IntegerField(validators=[MinValueValidator(0)])
+    started_at = models.DateTimeField()
+    elapsed_sec = models.FloatField(validators=[MinValueValidator(0.0)])
+
+    class Meta:
+        unique_together = ('segment', 'activity', 'start_index')
+        indexes = [
+            models.Index(fields=['segment', 'elapsed_sec', 'user'], name='segment_effort_rank_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(elapsed_sec__gte=0),
+                name='segmenteffort_elapsed_sec_positive'
+            ),
+            models.CheckConstraint(
+                check=models.Q(start_index__lte=F('end_index')),
+                name='segmenteffort_start_lte_end'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Effort on Segment {self.segment_id} in Activity {self.activity_id}: {self.elapsed_sec:.1f} s"
+
+
+class CohortActivityStats(models.Model):
+    """
+    Рядок матеріалізованого представлення activities_cohortactivitystats: підсумки активностей когорти
+    країна x вікова група x стать x тип активності. Для activity_type = 'all' — усі типи разом, тож athletes
+    у цих рядках рахує кожного користувача один раз. Порожні атрибути профілю — 'unknown'.
+    Дані оновлює refresh_cohort_views (activities/cohorts.py); id перенумеровується при кожному оновленні.
+    """
+
+    ALL_TYPES = 'all'
+
+    country = models.CharField(max_length=100)
+    age_band = models.CharField(max_length=20)
+    gender = models.CharField(max_length=50)
+    activity_type = models.CharField(max_length=50)
+    athletes = models.IntegerField()
+    activities_count = models.IntegerField()
+    total_distance_m = models.FloatField()
+    total_duration_sec = models.FloatField()
+    total_elevation_gain_m = models.BigIntegerField()
+
+    class Meta:
+        managed = False
+        db_table = 'activities_cohortactivitystats'
+
+    def __str__(self):
+        return f"{self.country}/{self.age_band}/{self.gender}/{self.activity_type}: {self.total_distance_m:.0f} m"
+
+
+class CohortProfileStats(models.Model):
+    """Рядок матеріалізованого представлення activities_cohortprofilestats: склад когорти за профілями всіх користувачів."""
+
+    country = models.CharField(max_length=100)
+    age_band = models.CharField(max_length=20)
+    gender = models.CharField(max_length=50)
+    athletes = models.IntegerField()
+    # Суми та кількості заповнених значень, а не середні: середнє кількох когорт — Sum(sum) / Sum(count)
+    age_sum = models.BigIntegerField()
+    age_count = models.IntegerField()
+    weight_kg_sum = models.FloatField()
+    weight_kg_count = models.IntegerField()
+    height_cm_sum = models.FloatField()
+    height_cm_count = models.IntegerField()
+    bmi_sum = models.FloatField()
+    bmi_count = models.IntegerField()
+
+    class Meta:
+        managed = False
+        db_table = 'activities_cohortprofilestats'
+
+    def __str__(self):
+        return f"{self.country}/{self.age_band}/{self.gender}: {self.athletes} athletes"
+
+
+class CohortViewRefresh(models.Model):
+    """Журнал оновлень когортних представлень; останній запис визначає їхню свіжість."""
+
+    MODES = [
+        ('full', 'Full'),
+        ('concurrent', 'Concurrent'),
+        ('live', 'Live view'),
+        ('skipped', 'Skipped'),
+    ]
+
+    mode = models.CharField(max_length=20, choices=MODES)
+    # Знімок джерел: вставка чи видалення активності або профілю змінює його
+    activities = models.BigIntegerField(default=0)
+    last_activity_id = models.BigIntegerField(null=True, blank=True)
+    profiles = models.BigIntegerField(default=0)
+    last_profile_id = models.BigIntegerField(null=True, blank=True)
+    activity_rows = models.IntegerField(default=0)
+    profile_rows = models.IntegerField(default=0)
+    duration_ms = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.mode} cohort refresh at {self.created_at:%Y-%m-%d %H:%M} ({self.activity_rows} rows)"
@@ -0,0 +1,283 @@
+import re
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import Activity, ActivityPoint, ActivityTrack
+from .tracks import TrackStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BOUNDS = re.compile(r"FROM \('?(-?\d+)'?\) TO \('?(-?\d+)'?\)")
+ARCHIVE_COLUMNS = ('id', 'activity_id', 'recorded_at', 'lat', 'lon', 'ele', 'speed', 'cadence')
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+class PointPartitions:
+    """
+    Розділи ActivityPoint на Postgres: діапазони [lo, hi) за activity_id плюс DEFAULT-розділ.
+
+    id активностей зростають з часом, тож старі діапазони — це старі активності: читання треку
+    торкається одного розділу, а холодний розділ від'єднується (DETACH) без DELETE по всій таблиці.
+    Назва розділу містить межі: activities_activitypoint_p<lo>_<hi>.
+    """
+
+    @staticmethod
+    def table():
+        return ActivityPoint._meta.db_table
+
+    @staticmethod
+    def size():
+        return getattr(settings, 'ACTIVITY_POINT_PARTITION_SIZE', 100000)
+
+    @classmethod
+    def name(cls, lo, hi):
+        return f"{cls.table()}_p{lo}_{hi}"
+
+    @classmethod
+    def bounds(cls, name):
+        match = re.fullmatch(rf"{re.escape(cls.table())}_p(\d+)_(\d+)", name)
+        return (int(match[1]), int(match[2])) if match else None
+
+    @classmethod
+    def is_partitioned(cls):
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [cls.table()])
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def attached(cls):
+        """[(назва, lo, hi, оцінка рядків)] підключених діапазонних розділів за зростанням меж."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)",
+                [cls.table()]
+            )
+            rows = cursor.fetchall()
+
+        partitions = []
+        for name, bound, rows_estimate in rows:
+            match = BOUNDS.search(bound)
+            if match:
+                partitions.append((name, int(match[1]), int(match[2]), max(rows_estimate, 0)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @classmethod
+    def detached(cls):
+        """Назви від'єднаних розділів (таблиць за шаблоном назви, що не є розділами) — чекають на архівацію."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = current_schema() AND c.relkind = 'r' AND NOT c.relispartition",
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        return sorted((name for name in names if cls.bounds(name)), key=lambda name: cls.bounds(name))
+
+    @classmethod
+    def create(cls, lo, hi):
+        """
+        Розділ [lo, hi). Рядки цього діапазону, що встигли потрапити в DEFAULT, переносяться в нову
+        таблицю до ATTACH — інакше Postgres відмовить у підключенні.
+        """
+        lo, hi = int(lo), int(hi)
+        table, name, default = _quote(cls.table()), _quote(cls.name(lo, hi)), _quote(f"{cls.table()}_default")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {default} WHERE activity_id >= {lo} AND activity_id < {hi} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            )
+            cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({lo}) TO ({hi})")
+        return cls.name(lo, hi)
+
+    @classmethod
+    def ensure(cls, ahead=2):
+        """Створює розділи, щоб покрити найбільший id активності та ще ahead діапазонів наперед."""
+        size = cls.size()
+        top = (Activity.objects.aggregate(top=Max('id'))['top'] or 0) + ahead * size
+        partitions = cls.attached()
+        lo = partitions[-1][2] if partitions else 0
+
+        created = []
+        while lo <= top:
+            created.append(cls.create(lo, lo + size))
+            lo += size
+        return created
+
+    @classmethod
+    def cold(cls, older_than):
+        """
+        Розділи, у діапазоні яких уже не з'явиться нових активностей і жодна не стартувала пізніше
+        за now - older_than (timedelta). Активності без start_time розділ не утримують.
+        """
+        cutoff = timezone.now() - older_than
+        newest = Activity.objects.aggregate(top=Max('id'))['top'] or 0
+        return [
+            name for name, lo, hi, _ in cls.attached()
+            if hi <= newest and not Activity.objects.filter(id__gte=lo, id__lt=hi, start_time__gte=cutoff).exists()
+        ]
+
+    @classmethod
+    def pack(cls, name):
+        """
+        Пакує в ActivityTrack активності розділу, що ще не мають упакованого треку: після DETACH
+        TrackStore, потоки, сегменти й просторовий індекс читають їх звідти, а не з порожнього ActivityPoint.
+        """
+        lo, hi = cls.bounds(name)
+        activity_ids = ActivityPoint.objects.filter(activity_id__gte=lo, activity_id__lt=hi).exclude(
+            Exists(ActivityTrack.objects.filter(activity_id=OuterRef('activity_id')))
+        ).values_list('activity_id', flat=True).distinct().order_by('activity_id')
+        packed = 0
+        for activity_id in activity_ids.iterator():
+            TrackStore.pack(activity_id)
+            packed += 1
+        return packed
+
+    @classmethod
+    def detach(cls, name):
+        """
+        Спершу pack(), далі DETACH — зміна метаданих без перегляду рядків. Зовнішній ключ від'єднаної
+        таблиці знімається: старі активності видаляються, не чекаючи на архівацію їхніх точок.
+        Повертає кількість щойно упакованих треків.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            packed = cls.pack(name)
+            cursor.execute(f"ALTER TABLE {_quote(cls.table())} DETACH PARTITION {_quote(name)}")
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'", [name]
+            )
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f"ALTER TABLE {_quote(name)} DROP CONSTRAINT {_quote(constraint)}")
+        return packed
+
+    @classmethod
+    def archive(cls, name, directory=None):
+        """Від'єднаний розділ -> Parquet у PointArchive.directory(), після успішного запису таблиця видаляється."""
+        path = PointArchive.directory(directory) / f"{name}.parquet"
+        columns = ', '.join(_quote(column) for column in ARCHIVE_COLUMNS)
+        with transaction.atomic():
+            # Серверний курсор: розділ читається пакетами, а не цілком у пам'ять
+            server_side = not connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS')
+            cursor = connection.chunked_cursor() if server_side else connection.cursor()
+            try:
+                cursor.execute(f"SELECT {columns} FROM {_quote(name)} ORDER BY activity_id, recorded_at, id")
+                rows = PointArchive.write(
+                    path, iter(lambda: cursor.fetchmany(PointArchive.ROW_GROUP_SIZE), []), cls.bounds(name)
+                )
+            finally:
+                cursor.close()
+            with connection.cursor() as ddl:
+                ddl.execute(f"DROP TABLE {_quote(name)}")
+        return path, rows
+
+
+class PointArchive:
+    """
+    Архів точок від'єднаних розділів: один Parquet (zstd) на розділ, рядки впорядковані за
+    (activity_id, recorded_at), тож min/max статистика row group-ів відсікає непотрібні активності.
+    Читання — через memory map, без копіювання файлу в пам'ять процесу.
+    """
+
+    ROW_GROUP_SIZE = 100000
+
+    @staticmethod
+    def _require_pyarrow():
+        if pa is None:
+            raise ImproperlyConfigured("Архів точок потребує pyarrow (pip install pyarrow).")
+
+    @staticmethod
+    def directory(directory=None):
+        default = getattr(settings, 'ACTIVITY_POINT_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'point_archive')
+        return Path(directory or default)
+
+    @classmethod
+    def schema(cls):
+        cls._require_pyarrow()
+        return pa.schema([
+            ('id', pa.int64()),
+            ('activity_id', pa.int64()),
+            ('recorded_at', pa.timestamp('us', tz='UTC')),
+            ('lat', pa.float64()),
+            ('lon', pa.float64()),
+            ('ele', pa.float64()),
+            ('speed', pa.float64()),
+            ('cadence', pa.int32()),
+        ])
+
+    @classmethod
+    def write(cls, path, batches, bounds=None):
+        """batches — ітератор списків кортежів у порядку ARCHIVE_COLUMNS. Файл з'являється лише після запису."""
+        schema = cls.schema()
+        if bounds is not None:
+            schema = schema.with_metadata({'activity_id_from': str(bounds[0]), 'activity_id_to': str(bounds[1])})
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + '.partial')
+        written = 0
+        with pq.ParquetWriter(partial, schema, compression='zstd') as writer:
+            for rows in batches:
+                arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema), row_group_size=cls.ROW_GROUP_SIZE)
+                written += len(rows)
+        partial.replace(path)
+        return written
+
+    @classmethod
+    def files(cls, activity_ids=None, directory=None):
+        """Файли архіву, чиї діапазони (з назви) містять хоч один з activity_ids."""
+        paths = []
+        for path in sorted(cls.directory(directory).glob(f"{PointPartitions.table()}_p*.parquet")):
+            bounds = PointPartitions.bounds(path.stem)
+            if bounds is None:
+                continue
+            if activity_ids is None or any(bounds[0] <= activity_id < bounds[1] for activity_id in activity_ids):
+                paths.append(path)
+        return paths
+
+    @classmethod
+    def read(cls, activity_ids=None, columns=None, directory=None):
+        """pyarrow.Table заархівованих точок (memory map); фільтр activity_ids застосовується до row group-ів."""
+        schema = cls.schema()
+        activity_ids = sorted(set(activity_ids)) if activity_ids is not None else None
+        filters = [('activity_id', 'in', activity_ids)] if activity_ids is not None else None
+        tables = [
+            pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+            for path in cls.files(activity_ids, directory)
+        ]
+        if not tables:
+            fields = [schema.field(name) for name in (columns or schema.names)]
+            return pa.schema(fields).empty_table()
+        return pa.concat_tables(tables)
+
+    @classmethod
+    def load_track(cls, activity_id, directory=None):
+        """Заархівований трек у форматі TrackStore (dict NumPy-колонок) або None, якщо його немає в архіві."""
+        table = cls.read([activity_id], columns=list(TrackStore.POINT_FIELDS), directory=directory)
+        if not table.num_rows:
+            return None
+
+        track = {}
+        for name in TrackStore.POINT_FIELDS:
+            column = table.column(name)
+            if name == 'recorded_at':
+                # Naive UTC, як у TrackStore.arrays_from_rows
+                track[name] = column.cast(pa.timestamp('us')).to_numpy().astype('datetime64[us]')
+            else:
+                track[name] = column.cast(pa.float64()).fill_null(np.nan).to_numpy()
+        return track
@@ -0,0 +1,68 @@
+import multiprocessing
+
+import django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def is_pooled(alias=DEFAULT_DB_ALIAS):
+    return bool(settings.DATABASES[alias].get('OPTIONS', {}).get('pool'))
+
+
+def pool_for(alias=DEFAULT_DB_ALIAS):
+    if not is_pooled(alias):
+        return None
+    return getattr(connections[alias], 'pool', None)
+
+
+def pool_stats(alias=DEFAULT_DB_ALIAS, reset=False):
+    """
+    Метрики psycopg_pool: розмір, вільні з'єднання, клієнти в черзі, середній час
+    очікування видачі з'єднання (checkout) та встановлення нового з'єднання.
+    """
+    pool = pool_for(alias)
+    if pool is None:
+        return {'alias': alias, 'pooled': False}
+
+    stats = pool.pop_stats() if reset else pool.get_stats()
+    requests = stats.get('requests_num', 0)
+    opened = stats.get('connections_num', 0)
+    return {
+        'alias': alias,
+        'pooled': True,
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'size': stats.get('pool_size'),
+        'available': stats.get('pool_available'),
+        'waiting': stats.get('requests_waiting', 0),
+        'requests': requests,
+        'queued': stats.get('requests_queued', 0),
+        'avg_checkout_ms': round(stats.get('requests_wait_ms', 0) / requests, 3) if requests else None,
+        'timeouts': stats.get('requests_errors', 0),
+        'connections_opened': opened,
+        'avg_connect_ms': round(stats.get('connections_ms', 0) / opened, 3) if opened else None,
+        'connections_lost': stats.get('connections_lost', 0),
+        'returns_bad': stats.get('returns_bad', 0),
+    }
+
+
+def all_pool_stats():
+    return [pool_stats(alias) for alias in settings.DATABASES]
+
+
+def close_pools():
+    """Закриває пули цього процесу (потрібно перед fork: потоки пулу не переживають fork)."""
+    for alias in settings.DATABASES:
+        if is_pooled(alias):
+            connections[alias].close_pool()
+
+
+def process_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+
+def init_process():
+    # fork успадковує вже налаштований Django; для spawn/forkserver налаштовуємо заново
+    if not django.apps.apps.ready:
+        django.setup()
@@ -0,0 +1,114 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Формати, для яких рядки даних — це і є вміст відповіді
+EXPORT_FORMATS = ('columnar', 'arrow', 'parquet')
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(data):
+    """Серіалізація в bytes: orjson, якщо встановлено, інакше json з DRF JSONEncoder."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def columnar_payload(data):
+    """Замінює dataset (список рядків або dict колонок) на {"columns": [...], "data": {колонка: [значення]}}."""
+    if not isinstance(data, dict) or 'dataset' not in data:
+        return data
+
+    rows = data['dataset']
+    payload = {key: value for key, value in data.items() if key != 'dataset'}
+    if isinstance(rows, dict):
+        # dataset уже колонковий (наприклад, NumPy-масиви потоків)
+        payload['columns'] = list(rows)
+        payload['data'] = rows
+        return payload
+
+    columns = list(rows[0].keys()) if rows else []
+    payload['columns'] = columns
+    payload['data'] = {column: [row[column] for row in rows] for column in columns}
+    return payload
+
+
+def arrow_table(data):
+    """Рядки dataset як pyarrow.Table; решта відповіді (статистика, курсор, помилка) — у метаданих схеми."""
+    rows = data.get('dataset', []) if isinstance(data, dict) else []
+    if isinstance(rows, dict):
+        # Колонки NumPy передаються без копіювання в Python-об'єкти; NaN стає null
+        table = pa.table({name: pa.array(values, from_pandas=True) for name, values in rows.items()})
+    else:
+        table = pa.Table.from_pylist(rows)
+    extra = {key: value for key, value in data.items() if key != 'dataset'} if isinstance(data, dict) else {}
+    return table.replace_schema_metadata({key: dumps(value) for key, value in extra.items()})
+
+
+class ColumnarJSONRenderer(BaseRenderer):
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(columnar_payload(data))
+
+
+class ArrowRenderer(BaseRenderer):
+    """Apache Arrow IPC stream (pyarrow.ipc.open_stream на стороні клієнта)."""
+
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        table = arrow_table(data or {})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+class ParquetRenderer(BaseRenderer):
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        buffer = io.BytesIO()
+        pq.write_table(arrow_table(data or {}), buffer, compression='zstd')
+        return buffer.getvalue()
+
+
+def analytics_renderers():
+    """Рендерери аналітичних ендпоінтів; Arrow/Parquet — лише з встановленим pyarrow (інакше 406)."""
+    renderers = [JSONRenderer, BrowsableAPIRenderer, ColumnarJSONRenderer]
+    if pa is not None:
+        renderers += [ArrowRenderer, ParquetRenderer]
+    return renderers
@@ -1,41 +1,104 @@
+from datetime import datetime
+
 from django.contrib.auth.models import User
-from .models import Activity
-from django.db.models import Sum, Count, Avg, Max, F
+from django.utils import timezone
+from .cache import AnalyticsCache, CachedAnalyticsRepository
+from .cohorts import CohortAnalytics
+from .leaderboards import ALL_TYPES, LeaderboardRollup
+from .models import Activity, FollowSuggestion, UserGraphMetrics, UserMonthlyStats
+from .spatial import SpatialIndex
+from django.db.models import F, Sum, Count, Avg, Max, Q
 
 from django.db.models import Case, When, Value, CharField
-from django.db.models.functions import TruncMonth
+
+
+def social_cursor_key(cursor_values):
+    """(engagement_score, id) з курсора social_engagement -> ключ keyset-пагінації."""
+    if cursor_values is None:
+        return None
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in cursor_values):
+        raise ValueError("Invalid cursor")
+    return tuple(cursor_values)
 
 
 class AnalyticsRepository:
 
     def get_top_distance_users(self):
-        return User.objects.annotate(
-            total_distance=Sum('activities__distance_m')
-        ).filter(total_distance__gt=0).order_by('-total_distance').values('username', 'total_distance')[:10]
+        return self.get_leaderboard()
+
+    def get_leaderboard(self, window='all', activity_type=ALL_TYPES, top_n=10, min_distance=0):
+        return LeaderboardRollup.top(window, activity_type, top_n=top_n, min_distance=min_distance)
+
+    def leaderboard_rank(self, user_id, window='all', activity_type=ALL_TYPES):
+        return LeaderboardRollup.rank(user_id, window, activity_type)
 
     def get_social_activities(self):
-        return Activity.objects.annotate(
-            comments_count=Count('comments', distinct=True),
-            kudos_count=Count('kudos', distinct=True)
-        ).annotate(
-            engagement_score=F('comments_count') + F('kudos_count')
-        ).filter(engagement_score__gt=0).order_by('-engagement_score').values(
-            'user__username', 'comments_count', 'kudos_count', 'engagement_score'
+        # Лічильники підтримуються сигналами (EngagementCounters), тож це індексний ORDER BY без JOIN
+        return Activity.objects.filter(engagement_score__gt=0).order_by('-engagement_score', '-id').values(
+            'id', 'user__username', 'comments_count', 'kudos_count', 'engagement_score'
         )
 
+    def get_social_activities_page(self, after=None, limit=100):
+        """Keyset-пагінація за (engagement_score, id) у спадному порядку; повертає до limit + 1 рядків."""
+        qs = self.get_social_activities().order_by('-engagement_score', '-id')
+        if after is not None:
+            score, last_id = after
+            qs = qs.filter(Q(engagement_score__lt=score) | Q(engagement_score=score, id__lt=last_id))
+        return qs[:limit + 1]
+
+    def monthly_rollup_queryset(self):
+        return UserMonthlyStats.objects.values('year', 'month').annotate(
+            total_activities=Sum('activities_count'),
+            total_distance=Sum('total_distance_m'),
+            total_duration=Sum('total_duration_sec')
+        ).filter(total_activities__gt=0).order_by('year', 'month')
+
+    @staticmethod
+    def monthly_rows(rows):
+        tz = timezone.get_current_timezone()
+        return [
+            {
+                'month': datetime(row['year'], row['month'], 1, tzinfo=tz),
+                'total_activities': row['total_activities'],
+                'total_distance': row['total_distance'],
+                'avg_duration': row['total_duration'] / row['total_activities'],
+            }
+            for row in rows
+        ]
+
     def get_monthly_activity_stats(self):
-        return Activity.objects.annotate(
-            month=TruncMonth('start_time')
-        ).values('month').annotate(
-            total_activities=Count('id'),
-            total_distance=Sum('distance_m'),
-            avg_duration=Avg('duration_sec')
-        ).order_by('month')
-
-    def get_influential_users(self):
-        return User.objects.annotate(
-            followers_count=Count('followers')
-        ).filter(followers_count__gte=2).order_by('-followers_count').values('username', 'followers_count')
+        return self.monthly_rows(self.monthly_rollup_queryset())
+
+    def get_influential_users(self, top_n=100):
+        # Метрики графа рахує refresh_social_graph (activities/graph.py); тут лише індексний top-N за PageRank
+        return UserGraphMetrics.objects.filter(followers_count__gte=2).order_by('-pagerank', 'user_id').values(
+            'followers_count', 'mutual_count', 'pagerank', 'community_id', username=F('user__username')
+        )[:top_n]
+
+    def get_communities(self, top_n=20):
+        return UserGraphMetrics.objects.values('community_id').annotate(
+            members=Count('user_id'),
+            total_followers=Sum('followers_count'),
+            max_pagerank=Max('pagerank'),
+        ).order_by('-members', 'community_id')[:top_n]
+
+    def social_profile(self, user_id, suggestions=10):
+        metrics = UserGraphMetrics.objects.filter(user_id=user_id).values(
+            'followers_count', 'following_count', 'mutual_count', 'pagerank', 'community_id', 'community_size'
+        ).first()
+        if metrics is None:
+            return None
+        metrics['suggestions'] = list(FollowSuggestion.objects.filter(user_id=user_id).order_by('rank').values(
+            'rank', 'mutual_connections', username=F('suggested__username')
+        )[:suggestions])
+        return metrics
+
+    def get_cohort_breakdown(self, group_by=('country',), **filters):
+        # Читається матеріалізоване представлення когорт (refresh_cohort_views), а не join Profile x Activity
+        return CohortAnalytics.breakdown(group_by, **filters)
+
+    def get_cohort_demographics(self, group_by=('country',), **filters):
+        return CohortAnalytics.demographics(group_by, **filters)
 
     def get_activity_type_performance(self):
         return Activity.objects.values('activity_type').annotate(
@@ -55,9 +118,44 @@ class AnalyticsRepository:
                 output_field=CharField(),
             )
         ).values('username', 'activities_count', 'status')
+
+    SEARCH_FIELDS = ('id', 'user__username', 'activity_type', 'start_time', 'distance_m', 'duration_sec')
+
+    def activities_in_bbox(self, min_lat, min_lon, max_lat, max_lon, limit=100):
+        """Активності з GPS-точками у прямокутнику, новіші першими."""
+        ids = SpatialIndex.in_bbox(min_lat, min_lon, max_lat, max_lon)
+        return list(Activity.objects.filter(id__in=ids).order_by(
+            F('start_time').desc(nulls_last=True), '-id'
+        ).values(*self.SEARCH_FIELDS)[:limit])
+
+    def activities_near(self, lat, lon, radius_m, limit=100):
+        """Активності, трек яких проходить у межах radius_m від точки, найближчі першими."""
+        distances = SpatialIndex.near(lat, lon, radius_m)
+        nearest = sorted(distances, key=lambda pk: (distances[pk], pk))[:limit]
+        rows = {row['id']: row for row in Activity.objects.filter(id__in=nearest).values(*self.SEARCH_FIELDS)}
+        return [{**rows[pk], 'nearest_point_m': round(distances[pk], 1)} for pk in nearest if pk in rows]
+
+    def queryset_for(self, method, *args, **kwargs):
+        """QuerySet, що стоїть за get_* (місячна статистика після запиту ще перетворюється у Python)."""
+        if method == 'get_monthly_activity_stats':
+            return self.monthly_rollup_queryset()
+        return getattr(self, method)(*args, **kwargs)
+
+    async def afetch(self, method, *args, **kwargs):
+        """Матеріалізує результат get_* через асинхронну ітерацію ORM."""
+        rows = [row async for row in self.queryset_for(method, *args, **kwargs)]
+        if method == 'get_monthly_activity_stats':
+            return self.monthly_rows(rows)
+        return rows
+
+
 class DataAccessLayer:
-    def __init__(self):
-        self.analytics = AnalyticsRepository()
+    def __init__(self, use_cache=True):
+        self.cache = AnalyticsCache()
+        self.repository = AnalyticsRepository()
+        self.analytics = self.repository
+        if use_cache:
+            self.analytics = CachedAnalyticsRepository(self.repository, self.cache)
 
     def __enter__(self):
         return self
@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import F, Sum, Count, Value
+from django.db.models.functions import ExtractYear, ExtractMonth, Greatest, Round
+from django.utils import timezone
+
+from .models import Activity, UserMonthlyStats
+
+
+class MonthlyStatsRollup:
+    """Інкрементально підтримує UserMonthlyStats замість агрегації всієї таблиці Activity."""
+
+    BATCH_SIZE = 5000
+
+    @staticmethod
+    def snapshot(user_id, start_time, distance_m, duration_sec):
+        # Частина стану активності, від якої залежить місячний агрегат
+        if user_id is None or start_time is None:
+            return None
+
+        if timezone.is_aware(start_time):
+            start_time = timezone.localtime(start_time)
+
+        return (
+            user_id,
+            start_time.year,
+            start_time.month,
+            float(distance_m or 0.0),
+            int((duration_sec or 0) + 0.5),
+        )
+
+    @classmethod
+    def snapshot_of(cls, activity):
+        return cls.snapshot(activity.user_id, activity.start_time, activity.distance_m, activity.duration_sec)
+
+    @classmethod
+    def snapshot_of_row(cls, row):
+        if row is None:
+            return None
+        return cls.snapshot(row['user_id'], row['start_time'], row['distance_m'], row['duration_sec'])
+
+    @classmethod
+    def add(cls, snapshot):
+        if snapshot is None:
+            return
+
+        user_id, year, month, distance, duration = snapshot
+        with transaction.atomic():
+            stats, _ = UserMonthlyStats.objects.get_or_create(user_id=user_id, year=year, month=month)
+            UserMonthlyStats.objects.filter(pk=stats.pk).update(
+                total_distance_m=F('total_distance_m') + distance,
+                total_duration_sec=F('total_duration_sec') + duration,
+                activities_count=F('activities_count') + 1,
+            )
+
+    @classmethod
+    def subtract(cls, snapshot):
+        if snapshot is None:
+            return
+
+        user_id, year, month, distance, duration = snapshot
+        with transaction.atomic():
+            rows = UserMonthlyStats.objects.filter(user_id=user_id, year=year, month=month)
+            # Greatest захищає CheckConstraint від похибки округлення float
+            rows.update(
+                total_distance_m=Greatest(F('total_distance_m') - distance, Value(0.0)),
+                total_duration_sec=Greatest(F('total_duration_sec') - duration, Value(0)),
+                activities_count=Greatest(F('activities_count') - 1, Value(0)),
+            )
+            rows.filter(activities_count=0).delete()
+
+    @classmethod
+    def replace(cls, old, new):
+        if old == new:
+            return
+        cls.subtract(old)
+        cls.add(new)
+
+    @classmethod
+    def rebuild(cls, batch_size=None):
+        batch_size = batch_size or cls.BATCH_SIZE
+
+        rows = Activity.objects.filter(start_time__isnull=False).annotate(
+            year=ExtractYear('start_time'),
+            month=ExtractMonth('start_time'),
+        ).values('user_id', 'year', 'month').annotate(
+            total_distance=Sum('distance_m'),
+            total_duration=Sum(Round('duration_sec')),
+            total_activities=Count('id'),
+        ).order_by()
+
+        created = 0
+        with transaction.atomic():
+            UserMonthlyStats.objects.all().delete()
+
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(UserMonthlyStats(
+                    user_id=row['user_id'],
+                    year=row['year'],
+                    month=row['month'],
+                    total_distance_m=max(row['total_distance'] or 0.0, 0.0),
+                    total_duration_sec=int(row['total_duration'] or 0),
+                    activities_count=row['total_activities'],
+                ))
+                if len(batch) >= batch_size:
+                    UserMonthlyStats.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+
+            if batch:
+                UserMonthlyStats.objects.bulk_create(batch)
+                created += len(batch)
+
+        return created
@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_read_database = ContextVar('read_database', default=None)
+
+
+@contextmanager
+def use_database(alias):
+    """Усі читання ORM у цьому контексті (потоці/корутині) йдуть на alias."""
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+class ContextDatabaseRouter:
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
@@ -0,0 +1,379 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import copy_rows
+from .cache import AnalyticsCache
+from .cohorts import CohortAnalytics
+from .counters import EngagementCounters
+from .geo import EARTH_RADIUS_M
+from .feeds import FeedService
+from .graph import SocialGraphAnalytics
+from .ingestion import POINT_COLUMNS, point_rows
+from .leaderboards import LeaderboardRollup
+from .models import Activity, ActivityPoint, Comment, Follower, Kudos, Profile
+from .rollups import MonthlyStatsRollup
+from .spatial import SpatialIndex
+from .track_metrics import elevation_gain, group_starts
+from .tracks import TrackStore
+
+CITIES = (
+    ('Kyiv', 50.4501, 30.5234),
+    ('Lviv', 49.8397, 24.0297),
+    ('Odesa', 46.4825, 30.7233),
+    ('Kharkiv', 49.9935, 36.2304),
+    ('Dnipro', 48.4647, 35.0462),
+    ('Zaporizhzhia', 47.8388, 35.1396),
+    ('Vinnytsia', 49.2331, 28.4682),
+    ('Uzhhorod', 48.6208, 22.2879),
+)
+
+# тип: (частка, медіана дистанції м, sigma lognormal, середня швидкість м/с, каденс або None)
+ACTIVITY_PROFILES = {
+    'running': (0.30, 7000, 0.45, 2.9, 170),
+    'cycling': (0.20, 30000, 0.55, 7.0, 85),
+    'walking': (0.15, 4000, 0.50, 1.4, 110),
+    'swimming': (0.05, 1500, 0.40, 0.7, None),
+    'hiking': (0.08, 12000, 0.45, 1.1, 100),
+    'yoga': (0.06, 0, 0, 0, None),
+    'gym': (0.08, 0, 0, 0, None),
+    'crossfit': (0.04, 0, 0, 0, None),
+    'other': (0.04, 3000, 0.80, 1.5, None),
+}
+
+COMMENT_BODIES = (
+    "Чудовий темп!", "Гарний маршрут 👍", "Круто!", "Як погода була?",
+    "Вражає!", "Наступного разу разом?", "Це рекорд?", "Так тримати!",
+)
+
+
+def group_cumsum(values, starts, counts):
+    """Кумулятивна сума, що починається заново для кожної групи."""
+    total = np.cumsum(values)
+    return total - np.repeat(total[starts] - values[starts], counts)
+
+
+class DatasetSeeder:
+    """
+    Відтворюваний (за seed) синтетичний набір даних для навантажувальних тестів.
+
+    Рядки, на які не посилаються інші таблиці (профілі, підписки, kudos, точки),
+    пишуться через copy_rows; решта — bulk_create, щоб отримати первинні ключі.
+    Сигнали при цьому не спрацьовують, тож агрегати перераховуються наприкінці.
+    """
+
+    def __init__(self, users=1000, activities_per_user=20, points_per_activity=200,
+                 followers_per_user=15, kudos_per_activity=3.0, comments_per_activity=1.5,
+                 reply_probability=0.4, days=365, seed=42, prefix='seed_',
+                 batch_size=5000, storage='rows', stdout=None):
+        if storage not in ('rows', 'packed'):
+            raise ValidationError(f"Невідомий режим зберігання: {storage}")
+
+        self.users = users
+        self.activities_per_user = activities_per_user
+        self.points_per_activity = points_per_activity
+        self.followers_per_user = followers_per_user
+        self.kudos_per_activity = kudos_per_activity
+        self.comments_per_activity = comments_per_activity
+        self.reply_probability = reply_probability
+        self.days = days
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.storage = storage
+        self.stdout = stdout
+        self.rng = np.random.default_rng(seed)
+        self.now = timezone.now().replace(microsecond=0)
+        self.timings = {}
+
+    def _log(self, phase, rows, started, duration=None):
+        if duration is None:
+            duration = time.perf_counter() - started
+        self.timings[phase] = {'rows': rows, 'seconds': round(duration, 3)}
+        if self.stdout is not None:
+            rate = rows / duration if duration > 0 else 0
+            self.stdout.write(f"{phase:<16} {rows:>12} rows {duration:>9.2f} s {rate:>12.0f} rows/s")
+
+    def _overdispersed(self, mean, size, shape=1.5):
+        # Пуассон з гамма-розподіленою інтенсивністю: "довгий хвіст" активних користувачів/популярних записів
+        if mean <= 0 or size == 0:
+            return np.zeros(size, dtype=np.int64)
+        return self.rng.poisson(self.rng.gamma(shape, mean / shape, size))
+
+    def run(self):
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise ValidationError(f"Користувачі з префіксом '{self.prefix}' вже існують; оберіть інший --prefix.")
+
+        with transaction.atomic():
+            user_ids, cities = self.seed_users()
+            popularity = self.seed_followers(user_ids)
+            activity_ids = self.seed_activities(user_ids, cities)
+            self.seed_kudos(activity_ids, user_ids, popularity)
+            self.seed_comments(activity_ids, user_ids, popularity)
+
+            started = time.perf_counter()
+            rows = MonthlyStatsRollup.rebuild(batch_size=self.batch_size)
+            rows += LeaderboardRollup.rebuild(batch_size=self.batch_size)
+            rows += FeedService.rebuild()
+            rows += SocialGraphAnalytics.refresh(full=True).users_updated
+            rows += SpatialIndex.rebuild()
+            refresh = CohortAnalytics.refresh(force=True)
+            rows += refresh.activity_rows + refresh.profile_rows
+            EngagementCounters.reconcile()
+            self._log('aggregates', rows, started)
+
+        transaction.on_commit(AnalyticsCache().invalidate)
+        return self.timings
+
+    def seed_users(self):
+        started = time.perf_counter()
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            [User(username=f'{self.prefix}{i:07d}', password=password) for i in range(self.users)],
+            batch_size=self.batch_size,
+        )
+        user_ids = np.array([user.pk for user in users], dtype=np.int64)
+        cities = self.rng.integers(0, len(CITIES), self.users)
+
+        genders = self.rng.choice(['male', 'female', 'other'], self.users, p=[0.48, 0.48, 0.04])
+        height = np.round(np.clip(self.rng.normal(172, 9, self.users), 140, 210), 1)
+        bmi = np.clip(self.rng.normal(23.5, 3, self.users), 17, 40)
+        weight = np.round(bmi * (height / 100) ** 2, 1)
+        age = np.clip(self.rng.normal(34, 11, self.users), 14, 90).astype(np.int64)
+
+        rows = (
+            (user_id, f'Athlete {i}', CITIES[city][0], 'Ukraine', gender, w, h, a, self.now)
+            for i, (user_id, city, gender, w, h, a) in enumerate(zip(
+                user_ids.tolist(), cities.tolist(), genders.tolist(), weight.tolist(), height.tolist(), age.tolist()
+            ))
+        )
+        copy_rows(
+            Profile,
+            ('user_id', 'display_name', 'city', 'country', 'gender', 'weight_kg', 'height_cm', 'age', 'created_at'),
+            rows, batch_size=self.batch_size,
+        )
+        self._log('users+profiles', self.users, started)
+        return user_ids, cities
+
+    def seed_followers(self, user_ids):
+        """Степеневий граф: популярність за Парето, кількість підписок — з довгим хвостом."""
+        started = time.perf_counter()
+        n = len(user_ids)
+        popularity = self.rng.pareto(1.2, n) + 1
+        if n < 2:
+            self._log('followers', 0, started)
+            return popularity / popularity.sum()
+        popularity /= popularity.sum()
+
+        degrees = np.minimum(self._overdispersed(self.followers_per_user, n), n - 1)
+        follower = np.repeat(np.arange(n), degrees)
+        followee = self.rng.choice(n, size=len(follower), p=popularity)
+        pairs = np.unique(follower * n + followee)
+        follower, followee = pairs // n, pairs % n
+        keep = follower != followee
+        follower, followee = user_ids[follower[keep]], user_ids[followee[keep]]
+
+        written = copy_rows(
+            Follower, ('follower_id', 'followee_id', 'created_at'),
+            zip(follower.tolist(), followee.tolist(), [self.now] * len(follower)),
+            batch_size=self.batch_size,
+        )
+        self._log('followers', written, started)
+        return popularity
+
+    def seed_activities(self, user_ids, cities):
+        started = time.perf_counter()
+        points_seconds = 0.0
+        points_written = 0
+
+        counts = self._overdispersed(self.activities_per_user, len(user_ids))
+        owners = np.repeat(np.arange(len(user_ids)), counts)
+        activity_ids = np.zeros(len(owners), dtype=np.int64)
+
+        chunk = max(1, self.batch_size // max(1, self.points_per_activity // 10))
+        for lo in range(0, len(owners), chunk):
+            hi = min(lo + chunk, len(owners))
+            rows, track = self._activity_chunk(owners[lo:hi], user_ids, cities)
+            created = Activity.objects.bulk_create(rows, batch_size=self.batch_size)
+            ids = np.array([activity.pk for activity in created], dtype=np.int64)
+            activity_ids[lo:hi] = ids
+
+            if track is not None:
+                tick = time.perf_counter()
+                points_written += self._write_points(ids, track)
+                points_seconds += time.perf_counter() - tick
+
+        self._log('activities', len(owners), started, time.perf_counter() - started - points_seconds)
+        self._log('points', points_written, started, points_seconds)
+        return activity_ids
+
+    def _activity_chunk(self, owners, user_ids, cities):
+        k = len(owners)
+        types = list(ACTIVITY_PROFILES)
+        shares = np.array([ACTIVITY_PROFILES[t][0] for t in types])
+        type_index = self.rng.choice(len(types), size=k, p=shares / shares.sum())
+        median, sigma, speed, cadence = (
+            np.array([ACTIVITY_PROFILES[types[i]][j] for i in type_index], dtype=np.float64)
+            for j in (1, 2, 3, 4)
+        )
+
+        moving = median > 0
+        distance = np.where(moving, median * self.rng.lognormal(0, np.where(moving, sigma, 0)), 0.0)
+        avg_speed = np.where(moving, speed * self.rng.lognormal(0, 0.15, k), 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            duration = np.where(moving, distance / avg_speed, self.rng.lognormal(np.log(3600), 0.35, k))
+
+        offsets = self.rng.uniform(0, self.days * 86400, k)
+        start = np.datetime64(self.now.replace(tzinfo=None), 'us') - (offsets * 1e6).astype(np.int64).astype('timedelta64[us]')
+        base_ele = self.rng.uniform(50, 400, k)
+
+        track = None
+        gain = np.round(distance * self.rng.uniform(0, 0.015, k))
+        height = np.round(base_ele + gain / 2)
+        n_points = np.where(moving, self.points_per_activity, 0) if self.points_per_activity >= 2 else np.zeros(k, int)
+        if n_points.sum():
+            track, gain, height = self._tracks(
+                n_points, distance, duration, start, base_ele, avg_speed, cadence, cities[owners]
+            )
+
+        rows = [
+            Activity(
+                user_id=user_id,
+                activity_type=types[t],
+                duration_sec=float(d),
+                distance_m=float(m),
+                elevation_gain_m=int(g),
+                height=max(int(h), 0),
+                start_time=pd.Timestamp(s).tz_localize('UTC').to_pydatetime(),
+                end_time=pd.Timestamp(s).tz_localize('UTC').to_pydatetime() + timedelta(seconds=float(d)),
+            )
+            for user_id, t, d, m, g, h, s in zip(
+                user_ids[owners].tolist(), type_index.tolist(), duration, distance, gain, height, start
+            )
+        ]
+        return rows, track
+
+    def _tracks(self, n_points, distance, duration, start, base_ele, avg_speed, cadence, cities):
+        """Випадкові блукання заданої довжини для всіх активностей пакета одразу."""
+        k = len(n_points)
+        total = int(n_points.sum())
+        groups = np.repeat(np.arange(k), n_points)
+        starts = group_starts(groups)
+        counts = n_points[n_points > 0]
+
+        step = np.repeat(np.divide(distance, np.maximum(n_points - 1, 1)), n_points)
+        step[starts] = 0.0
+        heading = group_cumsum(self.rng.normal(0, 0.25, total), starts, counts)
+        heading += np.repeat(self.rng.uniform(0, 2 * np.pi, k), n_points)
+        north = group_cumsum(step * np.cos(heading), starts, counts)
+        east = group_cumsum(step * np.sin(heading), starts, counts)
+
+        city_lat = np.array([CITIES[c][1] for c in cities]) + self.rng.normal(0, 0.05, k)
+        city_lon = np.array([CITIES[c][2] for c in cities]) + self.rng.normal(0, 0.05, k)
+        lat0, lon0 = np.repeat(city_lat, n_points), np.repeat(city_lon, n_points)
+        lat = lat0 + np.degrees(north / EARTH_RADIUS_M)
+        lon = lon0 + np.degrees(east / (EARTH_RADIUS_M * np.cos(np.radians(lat0))))
+
+        covered = group_cumsum(step, starts, counts)
+        fraction = covered / np.repeat(np.maximum(distance, 1e-9), n_points)
+        elapsed = fraction * np.repeat(duration, n_points)
+        recorded_at = np.repeat(start, n_points) + (elapsed * 1e6).astype(np.int64).astype('timedelta64[us]')
+
+        ele = np.repeat(base_ele, n_points) + group_cumsum(self.rng.normal(0, 0.8, total), starts, counts)
+        speed = np.repeat(avg_speed, n_points) * self.rng.lognormal(0, 0.2, total)
+        cadence = np.round(np.repeat(cadence, n_points) + self.rng.normal(0, 4, total))
+
+        # Набір висоти — тим самим згладженим алгоритмом, що й update_activity_metrics
+        gain = elevation_gain(ele, groups, k)
+        height = np.full(k, -np.inf)
+        np.maximum.at(height, groups, ele)
+        height = np.where(np.isfinite(height), height, base_ele)
+        gain = np.where(n_points > 0, gain, np.round(distance * 0.005))
+
+        track = {
+            'owners': groups,
+            'recorded_at': recorded_at, 'lat': lat, 'lon': lon,
+            'ele': ele, 'speed': speed, 'cadence': cadence,
+        }
+        return track, np.round(gain), np.round(height)
+
+    def _write_points(self, ids, track):
+        activity_ids = ids[track['owners']]
+        batch = {name: track[name] for name in POINT_COLUMNS}
+        if self.storage == 'packed':
+            starts = group_starts(activity_ids)
+            ends = np.append(starts[1:], len(activity_ids))
+            for activity_id, lo, hi in zip(activity_ids[starts].tolist(), starts.tolist(), ends.tolist()):
+                TrackStore.save(activity_id, {name: values[lo:hi] for name, values in batch.items()})
+            return len(activity_ids)
+
+        return copy_rows(
+            ActivityPoint, ('activity_id',) + POINT_COLUMNS,
+            point_rows(activity_ids, batch), batch_size=self.batch_size,
+        )
+
+    def seed_kudos(self, activity_ids, user_ids, popularity):
+        started = time.perf_counter()
+        n_users = len(user_ids)
+        counts = np.minimum(self._overdispersed(self.kudos_per_activity, len(activity_ids)), n_users)
+        activity = np.repeat(np.arange(len(activity_ids)), counts)
+        giver = self.rng.choice(n_users, size=len(activity), p=popularity) if n_users else activity
+        pairs = np.unique(activity * max(n_users, 1) + giver)
+        activity, giver = pairs // max(n_users, 1), pairs % max(n_users, 1)
+
+        written = copy_rows(
+            Kudos, ('activity_id', 'user_id', 'created_at'),
+            zip(activity_ids[activity].tolist(), user_ids[giver].tolist(), [self.now] * len(activity)),
+            batch_size=self.batch_size,
+        )
+        self._log('kudos', written, started)
+
+    def seed_comments(self, activity_ids, user_ids, popularity):
+        """Дерева відповідей: коментар з імовірністю reply_probability відповідає на раніший у тій самій активності."""
+        started = time.perf_counter()
+        counts = self._overdispersed(self.comments_per_activity, len(activity_ids))
+        total = int(counts.sum())
+        if not total or not len(user_ids):
+            self._log('comments', 0, started)
+            return
+
+        activity = np.repeat(np.arange(len(activity_ids)), counts)
+        authors = self.rng.choice(len(user_ids), size=total, p=popularity)
+        bodies = self.rng.integers(0, len(COMMENT_BODIES), total)
+
+        starts = group_starts(activity)
+        first = np.repeat(starts, counts[counts > 0])
+        position = np.arange(total) - first
+        is_reply = (position > 0) & (self.rng.random(total) < self.reply_probability)
+        parent = np.where(is_reply, first + np.floor(self.rng.random(total) * np.maximum(position, 1)).astype(np.int64), -1)
+
+        # Батько завжди раніше за дитину, тож глибину можна порахувати одним проходом
+        depth = np.zeros(total, dtype=np.int64)
+        for index in np.flatnonzero(is_reply).tolist():
+            depth[index] = depth[parent[index]] + 1
+
+        pks = np.zeros(total, dtype=np.int64)
+        for level in range(int(depth.max()) + 1):
+            indices = np.flatnonzero(depth == level)
+            created = Comment.objects.bulk_create(
+                [
+                    Comment(
+                        activity_id=activity_id, user_id=user_id, body=COMMENT_BODIES[body],
+                        parent_comment_id=int(pks[p]) if p >= 0 else None,
+                    )
+                    for activity_id, user_id, body, p in zip(
+                        activity_ids[activity[indices]].tolist(), user_ids[authors[indices]].tolist(),
+                        bodies[indices].tolist(), parent[indices].tolist(),
+                    )
+                ],
+                batch_size=self.batch_size,
+            )
+            pks[indices] = [comment.pk for comment in created]
+
+        self._log('comments', total, started)
@@ -0,0 +1,384 @@
+import concurrent.futures
+import datetime
+import time
+from functools import partial
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .geo import EARTH_RADIUS_M, segment_lengths_m
+from .models import Activity, ActivityBounds, Segment, SegmentEffort
+from .pooling import close_pools, init_process, process_context
+from .spatial import cell_index
+from .track_metrics import group_starts, load_tracks
+from .tracks import TrackCodec, TrackStore
+
+# Крок, з яким полілінія сегмента перевіряється на покриття треком
+SAMPLE_SPACING_M = 10.0
+# Скільки пар (точка сегмента, відрізок треку) рахувати за одну операцію NumPy
+MAX_PAIRS = 2_000_000
+METERS_PER_DEGREE = np.radians(1.0) * EARTH_RADIUS_M
+
+
+def tolerance_m():
+    return getattr(settings, 'SEGMENT_MATCH_TOLERANCE_M', 25.0)
+
+
+def project(lat, lon, lat0):
+    """Локальна рівнопроміжна проєкція в метри: похибка в межах допуску зневажно мала."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    return lon * METERS_PER_DEGREE * np.cos(np.radians(lat0)), lat * METERS_PER_DEGREE
+
+
+def resample(lat, lon, spacing=SAMPLE_SPACING_M):
+    """Точки через кожні spacing метрів уздовж полілінії, включно з обома кінцями."""
+    along = np.concatenate(([0.0], np.cumsum(segment_lengths_m(lat, lon))))
+    stations = np.append(np.arange(0.0, along[-1], spacing), along[-1])
+    return np.interp(stations, along, lat), np.interp(stations, along, lon)
+
+
+def nearest_on_polyline(px, py, x, y):
+    """
+    Для кожної точки (px, py) — відстань до найближчого відрізка полілінії (x, y) та позиція
+    на ній k + t (відрізок k, частка t ∈ [0, 1]). Матриця точки x відрізки рахується шматками.
+    """
+    px, py = np.atleast_1d(px), np.atleast_1d(py)
+    distance = np.full(len(px), np.inf)
+    position = np.zeros(len(px))
+    if len(x) < 2:
+        return distance, position
+
+    ax, ay, dx, dy = x[:-1], y[:-1], np.diff(x), np.diff(y)
+    length2 = dx * dx + dy * dy
+    length2[length2 == 0] = 1.0
+
+    step = max(1, MAX_PAIRS // len(ax))
+    for lo in range(0, len(px), step):
+        qx, qy = px[lo:lo + step, None], py[lo:lo + step, None]
+        t = np.clip(((qx - ax) * dx + (qy - ay) * dy) / length2, 0.0, 1.0)
+        d2 = (ax + t * dx - qx) ** 2 + (ay + t * dy - qy) ** 2
+        k = np.argmin(d2, axis=1)
+        rows = np.arange(len(k))
+        distance[lo:lo + step] = np.sqrt(d2[rows, k])
+        position[lo:lo + step] = k + t[rows, k]
+    return distance, position
+
+
+def passes(qx, qy, x, y, tolerance):
+    """
+    Позиції найближчого підходу треку (x, y) до точки (qx, qy): по одній на кожну серію
+    відрізків треку, що проходять у межах tolerance. Відсортовані за позицією.
+    """
+    if len(x) < 2:
+        return np.zeros(0)
+
+    ax, ay, dx, dy = x[:-1], y[:-1], np.diff(x), np.diff(y)
+    length2 = dx * dx + dy * dy
+    t = np.clip(((qx - ax) * dx + (qy - ay) * dy) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    distance = np.hypot(ax + t * dx - qx, ay + t * dy - qy)
+
+    near = np.flatnonzero(distance <= tolerance)
+    if not len(near):
+        return np.zeros(0)
+    runs = np.cumsum(np.diff(near, prepend=near[0]) > 1)
+    order = np.lexsort((distance[near], runs))
+    closest = near[order][group_starts(runs[order])]
+    return closest + t[closest]
+
+
+def polyline_blob(lat, lon):
+    """Полілінія сегмента у форматі TrackCodec (решта колонок порожні)."""
+    n = len(lat)
+    track = {name: np.full(n, np.nan) for name in TrackStore.POINT_FIELDS}
+    track['recorded_at'] = np.full(n, np.datetime64('NaT'), dtype='datetime64[us]')
+    track['lat'], track['lon'] = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    return TrackCodec.encode(track)
+
+
+def epoch_seconds(recorded_at):
+    values = np.asarray(recorded_at, dtype='datetime64[us]')
+    return np.where(np.isnat(values), np.nan, values.astype(np.int64) / 1e6)
+
+
+class SegmentMatcher:
+    """
+    Пошук проходжень сегментів у треках.
+
+    Кандидати відбираються без перебору точок: bbox сегмента (з запасом на допуск) має лежати в bbox треку,
+    а поблизу старту й фінішу сегмента мають бути комірки сітки spatial.py, через які проходить трек.
+    Для кандидата: підходи треку до старту й фінішу, далі покриття — кожна точка сегмента (через
+    SAMPLE_SPACING_M) не далі tolerance від відрізка треку між ними. Час інтерполюється між точками треку.
+    """
+
+    def __init__(self, segments, tolerance=None):
+        self.tolerance = tolerance if tolerance is not None else tolerance_m()
+        self.ids, self.types, self.lat, self.lon = [], [], [], []
+        for segment_id, activity_type, blob in segments:
+            polyline = TrackCodec.decode(blob)
+            lat, lon = resample(polyline['lat'], polyline['lon'])
+            self.ids.append(segment_id)
+            self.types.append(activity_type)
+            self.lat.append(lat)
+            self.lon.append(lon)
+
+        self.ids = np.array(self.ids, dtype=np.int64)
+        self.types = np.array(self.types, dtype=object)
+        self.bounds = np.array([
+            (lat.min(), lon.min(), lat.max(), lon.max()) for lat, lon in zip(self.lat, self.lon)
+        ]).reshape(-1, 4)
+        self.ends = np.array([(lat[0], lon[0], lat[-1], lon[-1]) for lat, lon in zip(self.lat, self.lon)]).reshape(-1, 4)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def queryset(segment_ids=None):
+        segments = Segment.objects.order_by('id')
+        if segment_ids is not None:
+            segments = segments.filter(id__in=segment_ids)
+        return segments
+
+    @classmethod
+    def load(cls, segment_ids=None, tolerance=None):
+        return cls(cls.queryset(segment_ids).values_list('id', 'activity_type', 'polyline'), tolerance)
+
+    @classmethod
+    def for_activity(cls, activity_id, segment_ids=None, tolerance=None):
+        """Лише сегменти, чий bbox вміщується в ActivityBounds активності (один запит по segment_bounds_idx)."""
+        tolerance = tolerance if tolerance is not None else tolerance_m()
+        bounds = ActivityBounds.objects.filter(activity_id=activity_id).first()
+        if bounds is None:
+            return cls([], tolerance)
+
+        pad_lat = tolerance / METERS_PER_DEGREE
+        pad_lon = pad_lat / max(np.cos(np.radians(max(abs(bounds.min_lat), abs(bounds.max_lat)))), 1e-6)
+        segments = cls.queryset(segment_ids).filter(
+            min_lat__gte=bounds.min_lat - pad_lat, max_lat__lte=bounds.max_lat + pad_lat,
+            min_lon__gte=bounds.min_lon - pad_lon, max_lon__lte=bounds.max_lon + pad_lon,
+        )
+        return cls(segments.values_list('id', 'activity_type', 'polyline'), tolerance)
+
+    def _near_cells(self, rows, cols, lat, lon, reach_m):
+        """Чи є серед комірок треку (rows, cols) хоч одна в межах reach_m від кожної з точок (lat, lon)."""
+        pad_lat = reach_m / METERS_PER_DEGREE
+        pad_lon = pad_lat / np.maximum(np.cos(np.radians(np.abs(lat) + pad_lat)), 1e-6)
+        row0, col0 = cell_index(lat - pad_lat, lon - pad_lon)
+        row1, col1 = cell_index(lat + pad_lat, lon + pad_lon)
+        return (
+            (rows >= row0[:, None]) & (rows <= row1[:, None]) & (cols >= col0[:, None]) & (cols <= col1[:, None])
+        ).any(axis=1)
+
+    def candidates(self, lat, lon, activity_type=None):
+        """Індекси сегментів, які трек (lat, lon) потенційно проходить."""
+        if not len(self) or len(lat) < 2:
+            return np.zeros(0, dtype=np.int64)
+
+        pad_lat = self.tolerance / METERS_PER_DEGREE
+        pad_lon = pad_lat / max(np.cos(np.radians(np.abs(lat).max())), 1e-6)
+        keep = (
+            (self.bounds[:, 0] >= lat.min() - pad_lat) & (self.bounds[:, 2] <= lat.max() + pad_lat)
+            & (self.bounds[:, 1] >= lon.min() - pad_lon) & (self.bounds[:, 3] <= lon.max() + pad_lon)
+        )
+        if activity_type is not None:
+            keep &= np.array([kind is None or kind == activity_type for kind in self.types], dtype=bool)
+        selected = np.flatnonzero(keep)
+        if not len(selected):
+            return selected
+
+        # Точки треку лежать у межах найдовшого кроку від будь-якого його відрізка
+        reach = self.tolerance + segment_lengths_m(lat, lon).max()
+        cells = np.unique(np.stack(cell_index(lat, lon)), axis=1)
+        rows, cols = cells[0], cells[1]
+        ends = self.ends[selected]
+        near = self._near_cells(rows, cols, ends[:, 0], ends[:, 1], reach) \
+            & self._near_cells(rows, cols, ends[:, 2], ends[:, 3], reach)
+        return selected[near]
+
+    def _match_one(self, index, x, y, seconds, lat0):
+        sx, sy = project(self.lat[index], self.lon[index], lat0)
+        starts = passes(sx[0], sy[0], x, y, self.tolerance)
+        ends = passes(sx[-1], sy[-1], x, y, self.tolerance)
+
+        efforts, resume = [], -1.0
+        for start in starts:
+            # Проходження не перекриваються: наступне починається не раніше фінішу попереднього
+            if start < resume or (efforts and int(start) == efforts[-1]['start_index']):
+                continue
+            for end in ends[ends > start]:
+                lo, hi = int(start), min(int(end) + 1, len(x) - 1)
+                distance, _ = nearest_on_polyline(sx, sy, x[lo:hi + 1], y[lo:hi + 1])
+                if distance.max() > self.tolerance:
+                    continue
+
+                at = np.interp([start, end], np.arange(len(seconds)), seconds)
+                if np.isnan(at).any():
+                    break
+                efforts.append({
+                    'segment_id': int(self.ids[index]),
+                    'start_index': lo,
+                    'end_index': hi,
+                    'started_at': datetime.datetime.fromtimestamp(at[0], tz=datetime.timezone.utc),
+                    'elapsed_sec': float(max(at[1] - at[0], 0.0)),
+                })
+                resume = end
+                break
+        return efforts
+
+    def match_track(self, track, activity_type=None):
+        """(кількість кандидатів, [проходження]) для одного треку — dict колонок TrackStore."""
+        valid = np.isfinite(track['lat']) & np.isfinite(track['lon'])
+        lat, lon = track['lat'][valid], track['lon'][valid]
+        candidates = self.candidates(lat, lon, activity_type)
+        if not len(candidates):
+            return 0, []
+
+        seconds = epoch_seconds(track['recorded_at'][valid])
+        lat0 = float(lat.mean())
+        x, y = project(lat, lon, lat0)
+        efforts = []
+        for index in candidates.tolist():
+            efforts.extend(self._match_one(index, x, y, seconds, lat0))
+        return len(candidates), efforts
+
+
+# Матчер дочірнього процесу: сегменти завантажуються один раз на процес, а не на пакет
+_worker_matchers = {}
+
+
+def _match_chunk(activity_ids, segment_ids, tolerance, save):
+    key = (segment_ids, tolerance)
+    if key not in _worker_matchers:
+        _worker_matchers.clear()
+        _worker_matchers[key] = SegmentMatcher.load(segment_ids, tolerance)
+    try:
+        return SegmentService.match_batch(activity_ids, _worker_matchers[key], segment_ids, save)
+    finally:
+        connections.close_all()
+
+
+class SegmentService:
+    """Створення сегментів, масовий пошук проходжень (пакетами, за потреби в пулі процесів) і рейтинг."""
+
+    BATCH_SIZE = 2000
+    CHUNK_SIZE = 200
+
+    @staticmethod
+    def create(name, lat, lon, activity_type=None, created_by=None):
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        keep = np.isfinite(lat) & np.isfinite(lon)
+        lat, lon = lat[keep], lon[keep]
+        # Повтори точки дають нульові відрізки — прибираємо, щоб resample мав зростаючу відстань
+        moved = np.append(True, (np.diff(lat) != 0) | (np.diff(lon) != 0))[:len(lat)]
+        lat, lon = lat[moved], lon[moved]
+        if len(lat) < 2:
+            raise ValidationError("Сегмент має містити щонайменше дві різні точки.")
+        if activity_type is not None and activity_type not in dict(Activity.ACTIVITY_TYPES):
+            raise ValidationError(f"Невідомий тип активності: {activity_type}")
+
+        return Segment.objects.create(
+            name=name,
+            activity_type=activity_type,
+            created_by=created_by,
+            polyline=polyline_blob(lat, lon),
+            points_count=len(lat),
+            distance_m=float(segment_lengths_m(lat, lon).sum()),
+            min_lat=float(lat.min()), max_lat=float(lat.max()),
+            min_lon=float(lon.min()), max_lon=float(lon.max()),
+        )
+
+    @classmethod
+    def record(cls, activity_ids, efforts, owners, segment_ids=None):
+        """Замінює проходження активностей (лише по segment_ids, якщо задано) на знайдені."""
+        stale = SegmentEffort.objects.filter(activity_id__in=activity_ids)
+        if segment_ids is not None:
+            stale = stale.filter(segment_id__in=segment_ids)
+        with transaction.atomic():
+            stale.delete()
+            SegmentEffort.objects.bulk_create(
+                [SegmentEffort(user_id=owners[effort['activity_id']], **effort) for effort in efforts],
+                batch_size=cls.BATCH_SIZE,
+            )
+
+    @classmethod
+    def match_batch(cls, activity_ids, matcher, segment_ids=None, save=True):
+        """Один пакет активностей: треки читаються load_tracks (два запити), матчинг — у пам'яті."""
+        ordered, track, groups = load_tracks(activity_ids)
+        activities = {
+            pk: (user_id, activity_type)
+            for pk, user_id, activity_type in Activity.objects.filter(id__in=ordered).values_list(
+                'id', 'user_id', 'activity_type'
+            )
+        }
+
+        efforts, candidates = [], 0
+        starts = group_starts(groups)
+        for activity_id, lo, hi in zip(ordered, starts.tolist(), np.append(starts[1:], len(groups)).tolist()):
+            if activity_id not in activities:
+                continue
+            part = {name: values[lo:hi] for name, values in track.items()}
+            checked, found = matcher.match_track(part, activities[activity_id][1])
+            candidates += checked
+            efforts.extend(dict(effort, activity_id=activity_id) for effort in found)
+
+        if save:
+            owners = {pk: user_id for pk, (user_id, _) in activities.items()}
+            cls.record(list(activities), efforts, owners, segment_ids)
+        return {'activities': len(ordered), 'points': len(groups), 'candidates': candidates, 'efforts': len(efforts)}
+
+    @classmethod
+    def match_activity(cls, activity_id):
+        """Нова активність: кандидати спершу відбираються в SQL за ActivityBounds."""
+        matcher = SegmentMatcher.for_activity(activity_id)
+        if not len(matcher):
+            return 0
+        return cls.match_batch([activity_id], matcher, save=True)['efforts']
+
+    @classmethod
+    def match(cls, activity_ids=None, segment_ids=None, workers=1, chunk_size=None, save=True, tolerance=None):
+        """
+        Масовий пошук проходжень історичних активностей. workers > 1 — пул процесів (NumPy-матчинг
+        впирається в CPU, тож потоки не паралелять його через GIL); кожен процес пише свої пакети сам.
+        """
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        activity_ids = sorted(set(activity_ids)) if activity_ids is not None else TrackStore.activity_ids()
+        segment_ids = tuple(sorted(set(segment_ids))) if segment_ids is not None else None
+        tolerance = tolerance if tolerance is not None else tolerance_m()
+        chunks = [activity_ids[i:i + chunk_size] for i in range(0, len(activity_ids), chunk_size)]
+
+        started = time.perf_counter()
+        totals = {'activities': 0, 'points': 0, 'candidates': 0, 'efforts': 0}
+        if workers > 1 and len(chunks) > 1:
+            # Дочірні процеси не повинні успадкувати відкритий сокет чи пул батька
+            connections.close_all()
+            close_pools()
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=process_context(), initializer=init_process
+            ) as executor:
+                call = partial(_match_chunk, segment_ids=segment_ids, tolerance=tolerance, save=save)
+                results = list(executor.map(call, chunks))
+        else:
+            matcher = SegmentMatcher.load(segment_ids, tolerance)
+            results = [cls.match_batch(chunk, matcher, segment_ids, save) for chunk in chunks]
+
+        for result in results:
+            for key in totals:
+                totals[key] += result[key]
+        totals['segments'] = SegmentMatcher.queryset(segment_ids).count()
+        totals['seconds'] = time.perf_counter() - started
+        totals['activities_per_sec'] = totals['activities'] / totals['seconds'] if totals['seconds'] > 0 else None
+        return totals
+
+    @staticmethod
+    def leaderboard(segment_id, top_n=10):
+        """Найкраще проходження кожного користувача, від найшвидшого (ROW_NUMBER по користувачу)."""
+        best = SegmentEffort.objects.filter(segment_id=segment_id).annotate(position=Window(
+            RowNumber(), partition_by=[F('user_id')], order_by=[F('elapsed_sec').asc(), F('id').asc()]
+        )).filter(position=1).order_by('elapsed_sec', 'id').values(
+            'activity_id', 'started_at', 'elapsed_sec', username=F('user__username'),
+        )[:top_n]
+        return [dict(row, rank=rank) for rank, row in enumerate(best, start=1)]
@@ -1,6 +1,12 @@
+import hashlib
+import json
+import logging
+
+import bokeh
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from plotly.offline import plot
+from plotly.offline import plot, get_plotlyjs_version
 from bokeh.plotting import figure
 from bokeh.embed import components
 from bokeh.models import ColumnDataSource, HoverTool
@@ -9,207 +15,326 @@ from bokeh.transform import cumsum
 from math import pi
 import time
 import concurrent.futures
-from django.db import connection
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
 
 
 class ChartService:
+    CACHE_PREFIX = 'chart'
+
+    # тип графіка -> ключ джерела даних у data
+    CHART_SOURCES = {
+        'leaderboard': 'leaderboard',
+        'social': 'social',
+        'monthly': 'monthly',
+        'influencers': 'leaderboard',
+        'types': 'types',
+        'levels': 'levels',
+    }
+
     @staticmethod
     def get_queryset_as_df(queryset):
         return pd.DataFrame(list(queryset))
 
     @staticmethod
-    def build_plotly_charts(data):
+    def plotly_js_url():
+        return f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+    @staticmethod
+    def bokeh_js_url():
+        return f"https://cdn.bokeh.org/bokeh/release/bokeh-{bokeh.__version__}.min.js"
+
+    @staticmethod
+    def _data_hash(rows):
+        payload = json.dumps(list(rows), default=str, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @classmethod
+    def _cached_chart(cls, engine, chart_type, rows, params, build):
+        """Готовий HTML/JS графіка з кешу; ключ — тип, хеш вхідних даних і параметри фільтрів."""
+        params_key = '&'.join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        key = f"{cls.CACHE_PREFIX}:{engine}:{chart_type}:{cls._data_hash(rows)}:{params_key}"
+
+        cache = caches[getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')]
+        artifact = cache.get(key)
+        if artifact is None:
+            artifact = build()
+            cache.set(key, artifact, getattr(settings, 'CHART_CACHE_TIMEOUT', 3600))
+        return artifact
+
+    @staticmethod
+    def _plotly_leaderboard(df):
+        return px.bar(df, x='username', y='total_distance', title="Топ користувачів",
+                      color='total_distance', color_continuous_scale='Viridis')
+
+    @staticmethod
+    def _plotly_social(df):
+        df['label'] = df['user__username']
+        return px.scatter(df, x='comments_count', y='kudos_count', size='engagement_score',
+                          color='engagement_score', hover_name='label', title="Соціальна взаємодія")
+
+    @staticmethod
+    def _plotly_monthly(df):
+        return px.line(df, x='month', y='total_distance', markers=True, title="Дистанція по місяцях")
+
+    @staticmethod
+    def _plotly_influencers(df):
+        return px.histogram(df, x='total_distance', nbins=10,
+                            title="Розподіл дистанцій",
+                            labels={'total_distance': 'Дистанція (км)', 'count': 'Кількість'},
+                            color_discrete_sequence=['#ef553b'])
+
+    @staticmethod
+    def _plotly_types(df):
+        return px.bar(df, x='avg_distance', y='activity_type', orientation='h',
+                      title="Середня дистанція за типом", color='avg_distance')
+
+    @staticmethod
+    def _plotly_levels(df):
+        path = ['status']
+        if 'username' in df.columns:
+            path.append('username')
+
+        return px.sunburst(df, path=path, values='activities_count',
+                           title="Рівні активності")
+
+    @classmethod
+    def build_plotly_charts(cls, data, params=None):
         charts = {}
 
-        df = pd.DataFrame(data.get('leaderboard', []))
-        if not df.empty:
-            charts['leaderboard'] = plot(
-                px.bar(df, x='username', y='total_distance', title="Топ користувачів",
-                       color='total_distance', color_continuous_scale='Viridis'),
-                output_type='div')
-
-        df = pd.DataFrame(data.get('social', []))
-        if not df.empty:
-            df['label'] = df['user__username']
-            charts['social'] = plot(
-                px.scatter(df, x='comments_count', y='kudos_count', size='engagement_score',
-                           color='engagement_score', hover_name='label', title="Соціальна взаємодія"),
-                output_type='div')
-
-        df = pd.DataFrame(data.get('monthly', []))
-        if not df.empty:
-            charts['monthly'] = plot(
-                px.line(df, x='month', y='total_distance', markers=True, title="Дистанція по місяцях"),
-                output_type='div')
-
-        df_dist = pd.DataFrame(data.get('leaderboard', []))
-        if not df_dist.empty:
-            charts['influencers'] = plot(
-                px.histogram(df_dist, x='total_distance', nbins=10,
-                             title="Розподіл дистанцій",
-                             labels={'total_distance': 'Дистанція (км)', 'count': 'Кількість'},
-                             color_discrete_sequence=['#ef553b']),
-                output_type='div')
-
-        df = pd.DataFrame(data.get('types', []))
-        if not df.empty:
-            charts['types'] = plot(
-                px.bar(df, x='avg_distance', y='activity_type', orientation='h',
-                       title="Середня дистанція за типом", color='avg_distance'),
-                output_type='div')
-
-        df = pd.DataFrame(data.get('levels', []))
-        if not df.empty:
-            path = ['status']
-            if 'username' in df.columns:
-                path.append('username')
-
-            charts['levels'] = plot(
-                px.sunburst(df, path=path, values='activities_count',
-                            title="Рівні активності"),
-                output_type='div')
+        for chart_type, source in cls.CHART_SOURCES.items():
+            rows = data.get(source, [])
+            builder = getattr(cls, f'_plotly_{chart_type}')
+
+            def build():
+                df = pd.DataFrame(rows)
+                if df.empty:
+                    return ''
+                # plotly.js підключається один раз у шаблоні, а не в кожному div
+                return plot(builder(df), output_type='div', include_plotlyjs=False)
+
+            div = cls._cached_chart('plotly', chart_type, rows, params, build)
+            if div:
+                charts[chart_type] = div
 
         return charts
 
     @staticmethod
-    def build_bokeh_charts(data):
-        plots = {}
-
-        df = pd.DataFrame(data.get('leaderboard', []))
-        if not df.empty:
-            df = df.sort_values('total_distance', ascending=True)
-            p = figure(y_range=df['username'].tolist(), height=350, title="🏆 Топ користувачів",
-                       toolbar_location="right", tools="pan,wheel_zoom,reset,save")
-            p.hbar(y='username', right='total_distance', height=0.8, source=ColumnDataSource(df),
-                   line_color='white', fill_color="#4c72b0")
-            p.xgrid.grid_line_color = None
-            p.add_tools(HoverTool(tooltips=[("Користувач", "@username"), ("Дистанція", "@total_distance{0.0} м")]))
-            plots['leaderboard'] = p
-
-        df = pd.DataFrame(data.get('social', []))
-        if not df.empty:
-            p = figure(title="💬 Соціальна взаємодія", height=350,
-                       x_axis_label='Коментарі', y_axis_label='Лайки (Kudos)',
-                       toolbar_location="right", tools="pan,wheel_zoom,reset,box_select")
-            p.circle('comments_count', 'kudos_count', size=12, source=ColumnDataSource(df),
-                     color="navy", alpha=0.6, fill_color="#2b8cbe")
-            p.add_tools(HoverTool(tooltips=[("Користувач", "@user__username"), ("Score", "@engagement_score")]))
-            plots['social'] = p
-
-        df = pd.DataFrame(data.get('monthly', []))
-        if not df.empty:
-            p = figure(title="📅 Динаміка по місяцях", x_axis_type='datetime', height=350,
-                       toolbar_location="above", tools="pan,wheel_zoom,reset")
-            src = ColumnDataSource(df)
-            p.line(x='month', y='total_distance', line_width=3, color="#e6550d", source=src)
-            p.circle(x='month', y='total_distance', size=8, color="#e6550d", fill_color="white", source=src)
-            p.add_tools(HoverTool(tooltips=[("Дата", "@month{%F}"), ("Дистанція", "@total_distance м")],
-                                  formatters={'@month': 'datetime'}))
-            plots['monthly'] = p
-
-            df = pd.DataFrame(data.get('leaderboard', []))
-            if not df.empty:
-                import numpy as np
-
-                hist, edges = np.histogram(df['total_distance'], bins=10)
-
-                hist_df = pd.DataFrame({
-                    'top': hist,
-                    'left': edges[:-1],
-                    'right': edges[1:]
-                })
-                hist_df['interval'] = [f"{int(l)}-{int(r)}м" for l, r in zip(hist_df['left'], hist_df['right'])]
-
-                p = figure(title="📊 Розподіл дистанцій", height=350,
-                           toolbar_location="above", tools="pan,wheel_zoom,reset")
-
-                p.quad(top='top', bottom=0, left='left', right='right', source=ColumnDataSource(hist_df),
-                       fill_color="#ef553b", line_color="white", alpha=0.8)
-
-                p.y_range.start = 0
-                p.xaxis.axis_label = 'Дистанція (м)'
-                p.yaxis.axis_label = 'Кількість користувачів'
-
-                p.add_tools(HoverTool(tooltips=[("Діапазон", "@interval"), ("К-сть", "@top")]))
-
-                plots['influencers'] = p
-
-        df = pd.DataFrame(data.get('types', []))
-        if not df.empty:
-            p = figure(y_range=df['activity_type'].tolist(), height=350, title="🏃 Середня дистанція (Тип)",
-                       toolbar_location=None, tools="")
-            p.hbar(y='activity_type', right='avg_distance', height=0.9, source=ColumnDataSource(df),
-                   line_color='white', fill_color="#756bb1")
-            p.add_tools(HoverTool(tooltips=[("Тип", "@activity_type"), ("Сер. дистанція", "@avg_distance{0.0} м")]))
-            plots['types'] = p
-
-        df = pd.DataFrame(data.get('levels', []))
-        if not df.empty:
-            if 'status' in df.columns:
-                df_grouped = df.groupby('status')['activities_count'].sum().reset_index()
-            else:
-                df_grouped = df
-
-
-            total = df_grouped['activities_count'].sum()
-            if total > 0:
-                df_grouped['angle'] = df_grouped['activities_count'] / total * 2 * pi
-            else:
-                df_grouped['angle'] = 0
-
-            df_grouped['color'] = ["#31a354", "#fd8d3c", "#74c476"][:len(df_grouped)]  # Кольори вручну або палітра
-
-            p = figure(height=350, title="📊 Активність (Статуси)", toolbar_location=None,
-                       tools="hover", tooltips="@status: @activities_count", x_range=(-0.5, 0.5))
-
-            p.annular_wedge(x=0, y=0, inner_radius=0.2, outer_radius=0.4,
-                            start_angle=cumsum('angle', include_zero=True), end_angle=cumsum('angle'),
-                            line_color="white", fill_color='color', legend_field='status',
-                            source=ColumnDataSource(df_grouped))
-            p.axis.visible = False
-            p.grid.grid_line_color = None
-            plots['levels'] = p
-
-        script, divs = components(plots)
-        return {'script': script, 'divs': divs}
+    def _bokeh_leaderboard(df):
+        df = df.sort_values('total_distance', ascending=True)
+        p = figure(y_range=df['username'].tolist(), height=350, title="🏆 Топ користувачів",
+                   toolbar_location="right", tools="pan,wheel_zoom,reset,save")
+        p.hbar(y='username', right='total_distance', height=0.8, source=ColumnDataSource(df),
+               line_color='white', fill_color="#4c72b0")
+        p.xgrid.grid_line_color = None
+        p.add_tools(HoverTool(tooltips=[("Користувач", "@username"), ("Дистанція", "@total_distance{0.0} м")]))
+        return p
 
-class BenchmarkService:
     @staticmethod
-    def _db_task():
-        try:
-            return User.objects.count()
-        finally:
-            connection.close()
+    def _bokeh_social(df):
+        p = figure(title="💬 Соціальна взаємодія", height=350,
+                   x_axis_label='Коментарі', y_axis_label='Лайки (Kudos)',
+                   toolbar_location="right", tools="pan,wheel_zoom,reset,box_select")
+        p.circle('comments_count', 'kudos_count', size=12, source=ColumnDataSource(df),
+                 color="navy", alpha=0.6, fill_color="#2b8cbe")
+        p.add_tools(HoverTool(tooltips=[("Користувач", "@user__username"), ("Score", "@engagement_score")]))
+        return p
+
+    @staticmethod
+    def _bokeh_monthly(df):
+        p = figure(title="📅 Динаміка по місяцях", x_axis_type='datetime', height=350,
+                   toolbar_location="above", tools="pan,wheel_zoom,reset")
+        src = ColumnDataSource(df)
+        p.line(x='month', y='total_distance', line_width=3, color="#e6550d", source=src)
+        p.circle(x='month', y='total_distance', size=8, color="#e6550d", fill_color="white", source=src)
+        p.add_tools(HoverTool(tooltips=[("Дата", "@month{%F}"), ("Дистанція", "@total_distance м")],
+                              formatters={'@month': 'datetime'}))
+        return p
 
     @staticmethod
-    def run_experiment(total_requests=100):
-        results = []
-        thread_counts = [1, 2, 4, 8, 10, 16, 32]
+    def _bokeh_influencers(df):
+        hist, edges = np.histogram(df['total_distance'], bins=10)
+
+        hist_df = pd.DataFrame({
+            'top': hist,
+            'left': edges[:-1],
+            'right': edges[1:]
+        })
+        hist_df['interval'] = [f"{int(l)}-{int(r)}м" for l, r in zip(hist_df['left'], hist_df['right'])]
+
+        p = figure(title="📊 Розподіл дистанцій", height=350,
+                   toolbar_location="above", tools="pan,wheel_zoom,reset")
 
-        for workers in thread_counts:
-            start_time = time.time()
+        p.quad(top='top', bottom=0, left='left', right='right', source=ColumnDataSource(hist_df),
+               fill_color="#ef553b", line_color="white", alpha=0.8)
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
-                futures = [executor.submit(BenchmarkService._db_task) for _ in range(total_requests)]
-                for future in concurrent.futures.as_completed(futures):
-                    pass
+        p.y_range.start = 0
+        p.xaxis.axis_label = 'Дистанція (м)'
+        p.yaxis.axis_label = 'Кількість користувачів'
 
-            end_time = time.time()
-            duration = end_time - start_time
+        p.add_tools(HoverTool(tooltips=[("Діапазон", "@interval"), ("К-сть", "@top")]))
+        return p
 
-            results.append({
-                'threads': workers,
-                'duration': duration,
-                'requests_per_sec': total_requests / duration
-            })
+    @staticmethod
+    def _bokeh_types(df):
+        p = figure(y_range=df['activity_type'].tolist(), height=350, title="🏃 Середня дистанція (Тип)",
+                   toolbar_location=None, tools="")
+        p.hbar(y='activity_type', right='avg_distance', height=0.9, source=ColumnDataSource(df),
+               line_color='white', fill_color="#756bb1")
+        p.add_tools(HoverTool(tooltips=[("Тип", "@activity_type"), ("Сер. дистанція", "@avg_distance{0.0} м")]))
+        return p
 
-        return pd.DataFrame(results)
+    @staticmethod
+    def _bokeh_levels(df):
+        if 'status' in df.columns:
+            df_grouped = df.groupby('status')['activities_count'].sum().reset_index()
+        else:
+            df_grouped = df
+
+        total = df_grouped['activities_count'].sum()
+        if total > 0:
+            df_grouped['angle'] = df_grouped['activities_count'] / total * 2 * pi
+        else:
+            df_grouped['angle'] = 0
+
+        df_grouped['color'] = ["#31a354", "#fd8d3c", "#74c476"][:len(df_grouped)]  # Кольори вручну або палітра
+
+        p = figure(height=350, title="📊 Активність (Статуси)", toolbar_location=None,
+                   tools="hover", tooltips="@status: @activities_count", x_range=(-0.5, 0.5))
+
+        p.annular_wedge(x=0, y=0, inner_radius=0.2, outer_radius=0.4,
+                        start_angle=cumsum('angle', include_zero=True), end_angle=cumsum('angle'),
+                        line_color="white", fill_color='color', legend_field='status',
+                        source=ColumnDataSource(df_grouped))
+        p.axis.visible = False
+        p.grid.grid_line_color = None
+        return p
+
+    @classmethod
+    def build_bokeh_charts(cls, data, params=None):
+        scripts = []
+        divs = {}
+
+        for chart_type, source in cls.CHART_SOURCES.items():
+            rows = data.get(source, [])
+            builder = getattr(cls, f'_bokeh_{chart_type}')
+
+            def build():
+                df = pd.DataFrame(rows)
+                if df.empty:
+                    return None, None
+                return components(builder(df))
+
+            script, div = cls._cached_chart('bokeh', chart_type, rows, params, build)
+            if div:
+                scripts.append(script)
+                divs[chart_type] = div
+
+        return {'script': '\n'.join(scripts), 'divs': divs}
+
+class DashboardDataService:
+    """
+    Паралельне отримання шести незалежних наборів даних дашборду.
+
+    Кожен запит дашборду отримує власний пул потоків, тож повільні запити одного користувача
+    не займають воркери інших. Потік відкриває своє з'єднання з БД і закриває (або повертає
+    у пул, DJANGO_DB_POOL) його після запиту; на Postgres statement_timeout дорівнює таймауту
+    дашборду, тож запит, що не встиг, справді зупиняється і звільняє з'єднання.
+    Загальний час наближається до найповільнішого запиту.
+    """
+
+    QUERIES = {
+        'leaderboard': 'get_leaderboard',
+        'social': 'get_social_activities',
+        'monthly': 'get_monthly_activity_stats',
+        'influencers': 'get_influential_users',
+        'types': 'get_activity_type_performance',
+        'levels': 'get_user_activity_levels',
+    }
+
+    @staticmethod
+    def _run_query(db, method, kwargs=None, timeout=None):
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                if timeout is not None and connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT set_config('statement_timeout', %s, true)", [f"{int(timeout * 1000)}ms"])
+                return list(getattr(db.analytics, method)(**(kwargs or {}))), time.perf_counter() - start
+        finally:
+            # Потік живе лише один запит дашборду — з'єднання не має пережити його
+            connections.close_all()
+
+    @classmethod
+    def fetch(cls, db, timeout=None, params=None):
+        """
+        Повертає (data, timings); запити, що не встигли за timeout, дають порожній список.
+        params — аргументи окремих запитів за ключем джерела, напр. {'leaderboard': {'top_n': 5}}.
+        """
+        timeout = timeout if timeout is not None else getattr(settings, 'DASHBOARD_FETCH_TIMEOUT', 10)
+        params = params or {}
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(getattr(settings, 'DASHBOARD_FETCH_WORKERS', len(cls.QUERIES)), len(cls.QUERIES)),
+            thread_name_prefix='dashboard-fetch',
+        )
+        futures = {
+            executor.submit(cls._run_query, db, method, params.get(name), timeout): name
+            for name, method in cls.QUERIES.items()
+        }
+        # Не чекаємо запитів, що не встигли: statement_timeout зупинить їх на боці БД
+        executor.shutdown(wait=False)
+
+        done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+
+        data, timings = {}, {}
+        for future, name in futures.items():
+            data[name], timings[name] = [], None
+
+            if future in not_done:
+                future.cancel()
+                logger.warning("Dashboard query '%s' timed out after %s s", name, timeout)
+                continue
+
+            try:
+                data[name], duration = future.result()
+                timings[name] = round(duration * 1000, 1)
+            except Exception:
+                logger.exception("Dashboard query '%s' failed", name)
+
+        return data, timings
+
+
+class BenchmarkService:
+    """Візуалізація звітів BenchmarkSuite (activities/benchmarks.py) для ?mode=benchmark."""
+
+    @staticmethod
+    def results_frame(report):
+        df = pd.DataFrame(report.get('results', []))
+        if df.empty:
+            return df
+        if 'database' not in df:
+            df['database'] = 'default'
+        df['scenario'] = df['database'] + ' / ' + df['target'] + ' / ' + df['mode'] + ' / ' + df['connections']
+        return df.sort_values(['scenario', 'concurrency'])
 
     @staticmethod
     def build_benchmark_chart(df):
         if df.empty:
             return "<div>No Data</div>"
 
-        fig = px.line(df, x='threads', y='duration', markers=True, title='Time vs Threads')
-        return plot(fig, output_type='div')
\ No newline at end of file
+        fig = px.line(df, x='concurrency', y='throughput', color='scenario', markers=True,
+                      hover_data=['p50_ms', 'p95_ms', 'p99_ms', 'errors'],
+                      title='Throughput (req/s) vs concurrency', log_x=True)
+        return plot(fig, output_type='div', include_plotlyjs=False)
+
+    @staticmethod
+    def build_latency_chart(df):
+        if df.empty:
+            return "<div>No Data</div>"
+
+        fig = px.line(df, x='concurrency', y='p95_ms', color='scenario', markers=True,
+                      hover_data=['p50_ms', 'p99_ms'], title='p95 latency (ms) vs concurrency', log_x=True)
+        return plot(fig, output_type='div', include_plotlyjs=False)
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import AnalyticsCache
+from .counters import EngagementCounters
+from .feeds import FeedService
+from .leaderboards import LeaderboardRollup
+from .models import Activity, Comment, Kudos, Follower
+from .rollups import MonthlyStatsRollup
+
+
+@receiver(pre_save, sender=Activity)
+def remember_activity_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Один запит на збережений стан — з нього знімки для обох агрегатів
+    row = Activity.objects.filter(pk=instance.pk).values(*LeaderboardRollup.STATE_FIELDS).first() if instance.pk else None
+    instance._rollup_snapshot = MonthlyStatsRollup.snapshot_of_row(row)
+    instance._leaderboard_snapshot = LeaderboardRollup.snapshot_of_row(row)
+    instance._stored_start_time = row['start_time'] if row else None
+
+
+@receiver(post_save, sender=Activity)
+def update_monthly_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_rollup_snapshot', None)
+    MonthlyStatsRollup.replace(old, MonthlyStatsRollup.snapshot_of(instance))
+
+
+@receiver(post_delete, sender=Activity)
+def update_monthly_stats_on_delete(sender, instance, **kwargs):
+    MonthlyStatsRollup.subtract(MonthlyStatsRollup.snapshot_of(instance))
+
+
+@receiver(post_save, sender=Activity)
+def update_leaderboards_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_leaderboard_snapshot', None)
+    LeaderboardRollup.replace(old, LeaderboardRollup.snapshot_of(instance))
+
+
+@receiver(post_delete, sender=Activity)
+def update_leaderboards_on_delete(sender, instance, **kwargs):
+    LeaderboardRollup.subtract(LeaderboardRollup.snapshot_of(instance))
+
+
+@receiver(post_save, sender=Activity)
+def fan_out_activity(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        FeedService.publish(instance)
+    else:
+        FeedService.reschedule(instance, getattr(instance, '_stored_start_time', None))
+
+
+@receiver(post_save, sender=Follower)
+def backfill_feed_on_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        FeedService.follow(instance.follower_id, instance.followee_id)
+
+
+@receiver(post_delete, sender=Follower)
+def prune_feed_on_unfollow(sender, instance, **kwargs):
+    FeedService.unfollow(instance.follower_id, instance.followee_id)
+
+
+@receiver(post_save, sender=Kudos)
+@receiver(post_save, sender=Comment)
+def increment_engagement_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        EngagementCounters.increment(instance.activity_id, 'kudos_count' if sender is Kudos else 'comments_count')
+
+
+@receiver(post_delete, sender=Kudos)
+@receiver(post_delete, sender=Comment)
+def decrement_engagement_counter(sender, instance, origin=None, **kwargs):
+    # Каскад від видалення активності: її рядок зникає разом з лічильниками, UPDATE на кожен запис зайвий
+    if isinstance(origin, Activity) or getattr(origin, 'model', None) is Activity:
+        return
+    EngagementCounters.decrement(instance.activity_id, 'kudos_count' if sender is Kudos else 'comments_count')
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Kudos)
+@receiver(post_delete, sender=Kudos)
+@receiver(post_save, sender=Follower)
+@receiver(post_delete, sender=Follower)
+def invalidate_analytics_cache(sender, **kwargs):
+    transaction.on_commit(AnalyticsCache().invalidate)
+
+
+@receiver(post_save, sender=User)
+def invalidate_analytics_cache_on_new_user(sender, created, **kwargs):
+    # Нові користувачі з'являються у user_levels; оновлення last_login кеш не чіпає
+    if created:
+        transaction.on_commit(AnalyticsCache().invalidate)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_analytics_cache_on_user_delete(sender, **kwargs):
+    transaction.on_commit(AnalyticsCache().invalidate)
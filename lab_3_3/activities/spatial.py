@@ -0,0 +1,214 @@
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.db import transaction
+from django.db.models import BigIntegerField, Count, Exists, F, Max, Min, OuterRef, Q, Value
+from django.db.models.functions import Cast, Floor, Least
+
+from .geo import EARTH_RADIUS_M, haversine_m
+from .models import ActivityBounds, ActivityCell, ActivityPoint, ActivityTrack
+from .tracks import TrackCodec
+
+# Рівномірна сітка в градусах: 0.01° ≈ 1.1 км по широті. Зміна потребує build_spatial_index.
+CELL_SIZE_DEG = 0.01
+LAT_CELLS = int(round(180 / CELL_SIZE_DEG))
+LON_CELLS = int(round(360 / CELL_SIZE_DEG))
+# Вищі за стільки рядків сітки запити відхиляються: без комірок довелося б перевіряти всі точки
+MAX_CELL_ROWS = 200
+MAX_SPAN_DEG = MAX_CELL_ROWS * CELL_SIZE_DEG
+
+
+def cell_index(lat, lon):
+    """(рядок, стовпець) комірки сітки для скалярів або масивів координат."""
+    rows = np.floor((np.asarray(lat, dtype=np.float64) + 90) / CELL_SIZE_DEG).astype(np.int64)
+    cols = np.floor((np.asarray(lon, dtype=np.float64) + 180) / CELL_SIZE_DEG).astype(np.int64)
+    return np.clip(rows, 0, LAT_CELLS - 1), np.clip(cols, 0, LON_CELLS - 1)
+
+
+def cells_of(lat, lon):
+    rows, cols = cell_index(lat, lon)
+    return np.unique(rows * LON_CELLS + cols)
+
+
+def cell_expression():
+    """Та сама комірка, що й cells_of, обчислена в SQL по рядках ActivityPoint."""
+    row = Least(Floor((F('lat') + 90.0) / CELL_SIZE_DEG), Value(float(LAT_CELLS - 1)))
+    col = Least(Floor((F('lon') + 180.0) / CELL_SIZE_DEG), Value(float(LON_CELLS - 1)))
+    return Cast(row * float(LON_CELLS) + col, BigIntegerField())
+
+
+def circle_bbox(lat, lon, radius_m):
+    """(min_lat, min_lon, max_lat, max_lon), що містить коло радіуса radius_m."""
+    dlat = np.degrees(radius_m / EARTH_RADIUS_M)
+    dlon = dlat / max(np.cos(np.radians(lat)), 1e-6)
+    return max(lat - dlat, -90.0), max(lon - dlon, -180.0), min(lat + dlat, 90.0), min(lon + dlon, 180.0)
+
+
+class SpatialIndex:
+    """
+    Просторовий індекс активностей: ActivityBounds (bbox треку) та ActivityCell (комірки сітки з точками).
+
+    Пошук: діапазони комірок для кожного рядка сітки -> кандидати (index-only scan по (cell, activity)),
+    далі точна перевірка точок лише там, де результат не гарантований комірками.
+    Індекс оновлюється при імпорті треку (TrackImporter); після масового запису — build_spatial_index.
+    """
+
+    BATCH_SIZE = 5000
+
+    @staticmethod
+    def store(activity_id, bounds, cells, points_count):
+        """Замінює записи індексу активності; bounds — (min_lat, min_lon, max_lat, max_lon)."""
+        with transaction.atomic():
+            ActivityCell.objects.filter(activity_id=activity_id).delete()
+            if bounds is None:
+                ActivityBounds.objects.filter(activity_id=activity_id).delete()
+                return 0
+
+            min_lat, min_lon, max_lat, max_lon = (float(value) for value in bounds)
+            ActivityBounds.objects.update_or_create(activity_id=activity_id, defaults={
+                'min_lat': min_lat, 'min_lon': min_lon, 'max_lat': max_lat, 'max_lon': max_lon,
+                'points_count': points_count,
+            })
+            ActivityCell.objects.bulk_create(
+                [ActivityCell(activity_id=activity_id, cell=int(cell)) for cell in cells],
+                batch_size=SpatialIndex.BATCH_SIZE,
+            )
+            return len(cells)
+
+    @classmethod
+    def index_track(cls, activity_id, track):
+        lat, lon = track['lat'], track['lon']
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        lat, lon = lat[valid], lon[valid]
+        if not len(lat):
+            return cls.store(activity_id, None, [], 0)
+        return cls.store(activity_id, (lat.min(), lon.min(), lat.max(), lon.max()), cells_of(lat, lon), len(lat))
+
+    @classmethod
+    def rebuild(cls, activity_ids=None):
+        """Перераховує індекс: рядки ActivityPoint агрегуються в SQL, упаковані треки декодуються."""
+        points = ActivityPoint.objects.all()
+        tracks = ActivityTrack.objects.filter(~Exists(ActivityPoint.objects.filter(activity_id=OuterRef('activity_id'))))
+        bounds, cells = ActivityBounds.objects.all(), ActivityCell.objects.all()
+        if activity_ids is not None:
+            points, tracks = points.filter(activity_id__in=activity_ids), tracks.filter(activity_id__in=activity_ids)
+            bounds, cells = bounds.filter(activity_id__in=activity_ids), cells.filter(activity_id__in=activity_ids)
+
+        created = 0
+        with transaction.atomic():
+            cells.delete()
+            bounds.delete()
+
+            ActivityBounds.objects.bulk_create(
+                (
+                    ActivityBounds(**row) for row in points.values('activity_id').annotate(
+                        min_lat=Min('lat'), max_lat=Max('lat'), min_lon=Min('lon'), max_lon=Max('lon'),
+                        points_count=Count('id'),
+                    ).order_by().iterator(chunk_size=cls.BATCH_SIZE)
+                ),
+                batch_size=cls.BATCH_SIZE,
+            )
+
+            batch = []
+            pairs = points.annotate(cell=cell_expression()).values_list('activity_id', 'cell').distinct().order_by()
+            for activity_id, cell in pairs.iterator(chunk_size=cls.BATCH_SIZE):
+                batch.append(ActivityCell(activity_id=activity_id, cell=int(cell)))
+                if len(batch) >= cls.BATCH_SIZE:
+                    ActivityCell.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            ActivityCell.objects.bulk_create(batch)
+            created += len(batch)
+
+            for activity_id, blob in tracks.values_list('activity_id', 'data').iterator(chunk_size=100):
+                created += cls.index_track(activity_id, TrackCodec.decode(blob))
+        return created
+
+    @staticmethod
+    def _cell_filter(min_lat, min_lon, max_lat, max_lon, inset=0):
+        """
+        Q по діапазонах комірок (один діапазон на рядок сітки); inset=1 — лише внутрішні комірки,
+        що повністю лежать у прямокутнику. None — внутрішніх комірок немає.
+        """
+        rows, cols = cell_index([min_lat, max_lat], [min_lon, max_lon])
+        (row0, row1), (col0, col1) = (rows[0] + inset, rows[1] - inset), (cols[0] + inset, cols[1] - inset)
+        if row1 < row0 or col1 < col0:
+            return None
+        if row1 - row0 + 1 > MAX_CELL_ROWS:
+            raise ValueError(f"search area must span at most {MAX_SPAN_DEG:g} degrees of latitude")
+        col0, col1 = int(col0), int(col1)
+        return reduce(or_, (
+            Q(cell__range=(row * LON_CELLS + col0, row * LON_CELLS + col1)) for row in range(int(row0), int(row1) + 1)
+        ))
+
+    @classmethod
+    def candidates(cls, min_lat, min_lon, max_lat, max_lon):
+        """
+        id активностей, чий bbox перетинає прямокутник і хоч одна комірка.
+        ValueError — прямокутник вищий за MAX_CELL_ROWS рядків сітки.
+        """
+        cells = cls._cell_filter(min_lat, min_lon, max_lat, max_lon)
+        overlapping = ActivityBounds.objects.filter(
+            min_lat__lte=max_lat, max_lat__gte=min_lat, min_lon__lte=max_lon, max_lon__gte=min_lon,
+            activity_id__in=ActivityCell.objects.filter(cells).values('activity_id'),
+        )
+        return set(overlapping.values_list('activity_id', flat=True))
+
+    @classmethod
+    def _points(cls, activity_ids, min_lat, min_lon, max_lat, max_lon):
+        """(activity_id, lat, lon) точок кандидатів у прямокутнику: рядки фільтрує SQL, упаковані треки — NumPy."""
+        owners, lats, lons = [], [], []
+        rows = np.array(list(ActivityPoint.objects.filter(
+            activity_id__in=activity_ids, lat__range=(min_lat, max_lat), lon__range=(min_lon, max_lon)
+        ).values_list('activity_id', 'lat', 'lon')), dtype=np.float64).reshape(-1, 3)
+        owners.append(rows[:, 0].astype(np.int64))
+        lats.append(rows[:, 1])
+        lons.append(rows[:, 2])
+
+        packed = ActivityTrack.objects.filter(activity_id__in=activity_ids).exclude(
+            Exists(ActivityPoint.objects.filter(activity_id=OuterRef('activity_id')))
+        )
+        for activity_id, blob in packed.values_list('activity_id', 'data').iterator(chunk_size=100):
+            track = TrackCodec.decode(blob)
+            inside = (track['lat'] >= min_lat) & (track['lat'] <= max_lat) \
+                & (track['lon'] >= min_lon) & (track['lon'] <= max_lon)
+            owners.append(np.full(int(inside.sum()), activity_id, dtype=np.int64))
+            lats.append(track['lat'][inside])
+            lons.append(track['lon'][inside])
+        return np.concatenate(owners), np.concatenate(lats), np.concatenate(lons)
+
+    @classmethod
+    def in_bbox(cls, min_lat, min_lon, max_lat, max_lon):
+        """id активностей, хоча б одна GPS-точка яких лежить у прямокутнику."""
+        candidates = cls.candidates(min_lat, min_lon, max_lat, max_lon)
+        if not candidates:
+            return set()
+
+        # Точка у внутрішній комірці гарантовано лежить у прямокутнику — перевіряємо лише решту
+        inner = cls._cell_filter(min_lat, min_lon, max_lat, max_lon, inset=1)
+        certain = set(ActivityCell.objects.filter(inner, activity_id__in=candidates).values_list(
+            'activity_id', flat=True
+        )) if inner is not None else set()
+        uncertain = candidates - certain
+        if uncertain:
+            owners, _, _ = cls._points(uncertain, min_lat, min_lon, max_lat, max_lon)
+            certain.update(np.unique(owners).tolist())
+        return certain
+
+    @classmethod
+    def near(cls, lat, lon, radius_m):
+        """{activity_id: відстань (м) від найближчої точки треку} для треків у межах radius_m."""
+        box = circle_bbox(lat, lon, radius_m)
+        candidates = cls.candidates(*box)
+        if not candidates:
+            return {}
+
+        owners, lats, lons = cls._points(candidates, *box)
+        distances = haversine_m(lat, lon, lats, lons)
+        close = distances <= radius_m
+        owners, distances = owners[close], distances[close]
+
+        order = np.lexsort((distances, owners))
+        first = np.r_[True, owners[order][1:] != owners[order][:-1]] if len(order) else np.zeros(0, dtype=bool)
+        return dict(zip(owners[order][first].tolist(), distances[order][first].tolist()))
@@ -0,0 +1,159 @@
+import numpy as np
+from django.db import transaction
+
+from .models import Activity, ActivityStreamLevel
+from .track_metrics import group_starts, load_tracks
+from .tracks import TrackCodec, TrackStore
+
+SERIES = ('speed', 'ele', 'cadence')
+# Кожен наступний рівень піраміди менший у стільки разів; рівні коротші за MIN_LEVEL_POINTS не зберігаються
+LEVEL_FACTOR = 4
+MIN_LEVEL_POINTS = 256
+MAX_STREAM_POINTS = 10000
+
+
+def stream_axis(recorded_at):
+    """Секунди від першої точки з часом; без повної розмітки часом вісь X — порядковий номер точки."""
+    values = np.asarray(recorded_at, dtype='datetime64[us]')
+    timed = ~np.isnat(values)
+    seconds = np.full(len(values), np.nan)
+    if timed.any():
+        seconds[timed] = (values[timed] - values[timed][0]).astype(np.int64) / 1e6
+    axis = seconds if timed.all() else np.arange(len(values), dtype=np.float64)
+    return seconds, axis
+
+
+def lttb(x, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets для кількох рядів зі спільною віссю x: у кожному кошику лишається точка
+    з найбільшою сумою площ трикутників (нормовані ряди, NaN не враховується). Повертає індекси точок.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:max(threshold, 1)])
+
+    ys = np.atleast_2d(np.asarray(ys, dtype=np.float64))
+    finite = np.isfinite(ys)
+    low = np.min(np.where(finite, ys, np.inf), axis=1, keepdims=True)
+    high = np.max(np.where(finite, ys, -np.inf), axis=1, keepdims=True)
+    # Порожній чи сталий ряд не впливає на вибір точок
+    ys = (ys - np.where(finite.any(axis=1, keepdims=True), low, 0.0)) / np.where(high > low, high - low, 1.0)
+
+    # threshold - 2 кошики між першою та останньою точкою, кожен непорожній (n > threshold)
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    filled = np.nan_to_num(ys[:, 1:n - 1])
+    present = np.add.reduceat((~np.isnan(ys[:, 1:n - 1])).astype(np.float64), edges[:-1] - 1, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_y = np.add.reduceat(filled, edges[:-1] - 1, axis=1) / present
+    # Для останнього кошика «наступний» — сама остання точка
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.concatenate((mean_y[:, 1:], ys[:, -1:]), axis=1)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[a], ys[:, a:a + 1]
+        cx, cy = mean_x[bucket], mean_y[:, bucket:bucket + 1]
+        area = np.abs((ax - cx) * (ys[:, lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(np.nansum(area, axis=0)))
+        selected[bucket + 1] = a
+    return selected
+
+
+def downsample(track, threshold, series=SERIES):
+    """Підмножина точок треку (dict колонок TrackStore), обрана LTTB за рядами series."""
+    _, axis = stream_axis(track['recorded_at'])
+    indices = lttb(axis, [track[name] for name in series], threshold)
+    return {name: values[indices] for name, values in track.items()}
+
+
+class StreamPyramid:
+    """
+    Потоки активності (speed/ele/cadence) у заданій кількості точок.
+
+    Запит на N точок читає найменший рівень піраміди, що має не менше N точок, і проріджує вже його —
+    робота пропорційна розміру рівня, а не треку. Рівні будуються при імпорті та командою build_stream_pyramids;
+    без рівнів (короткий трек) LTTB рахується по самому треку.
+    """
+
+    BATCH_SIZE = 100
+
+    @staticmethod
+    def levels(track):
+        """[(рівень, трек)] — кожен рівень проріджується з попереднього."""
+        levels, current, size, level = [], track, len(track['lat']) // LEVEL_FACTOR, 1
+        while size >= MIN_LEVEL_POINTS:
+            current = downsample(current, size)
+            levels.append((level, current))
+            size, level = size // LEVEL_FACTOR, level + 1
+        return levels
+
+    @classmethod
+    def build(cls, activity_id, track=None):
+        track = TrackStore.load(activity_id) if track is None else track
+        rows = [
+            ActivityStreamLevel(
+                activity_id=activity_id, level=level, points_count=len(part['lat']),
+                source_points=len(track['lat']), data=TrackCodec.encode(part),
+            )
+            for level, part in cls.levels(track)
+        ]
+        with transaction.atomic():
+            ActivityStreamLevel.objects.filter(activity_id=activity_id).delete()
+            ActivityStreamLevel.objects.bulk_create(rows)
+        return len(rows)
+
+    @classmethod
+    def rebuild(cls, activity_ids, batch_size=None):
+        """Піраміди для багатьох активностей: треки читаються пакетами через load_tracks."""
+        batch_size = batch_size or cls.BATCH_SIZE
+        activity_ids = sorted(set(activity_ids))
+        created = points = 0
+        for offset in range(0, len(activity_ids), batch_size):
+            ordered, track, groups = load_tracks(activity_ids[offset:offset + batch_size])
+            starts = group_starts(groups)
+            for activity_id, lo, hi in zip(ordered, starts.tolist(), np.append(starts[1:], len(groups)).tolist()):
+                created += cls.build(activity_id, {name: values[lo:hi] for name, values in track.items()})
+            points += len(groups)
+        return created, points
+
+    @staticmethod
+    def source(activity_id, points):
+        """(трек, рівень, точок у вихідному треку): найменший рівень з не менше points точок або сам трек."""
+        row = ActivityStreamLevel.objects.filter(activity_id=activity_id, points_count__gte=points).order_by(
+            'points_count'
+        ).values_list('data', 'level', 'source_points').first()
+        if row is not None:
+            data, level, source_points = row
+            return TrackCodec.decode(data), level, source_points
+
+        track = TrackStore.load(activity_id)
+        return track, 0, len(track['lat'])
+
+    @classmethod
+    def load(cls, activity_id, points, series=SERIES):
+        """
+        {'points', 'source_points', 'level', 'x_axis', 'dataset': {колонка: np.ndarray}}
+        або None, якщо активності немає. time — секунди від старту (NaN без часу).
+        """
+        track, level, source_points = cls.source(activity_id, points)
+        if not source_points and not Activity.objects.filter(pk=activity_id).exists():
+            return None
+
+        part = downsample(track, points, series)
+        seconds, _ = stream_axis(part['recorded_at'])
+        dataset = {'time': seconds}
+        dataset.update((name, part[name]) for name in series)
+        return {
+            'points': len(seconds),
+            'source_points': source_points,
+            'level': level,
+            'x_axis': 'time' if not np.isnan(seconds).any() else 'index',
+            'dataset': dataset,
+        }
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+import numpy as np
+
+NUMERIC_TYPES = (int, float, Decimal, np.integer, np.floating)
+
+
+def parse_include(value):
+    """?include=dataset,... -> множина запитаних додаткових розділів відповіді."""
+    return {part.strip() for part in (value or '').split(',') if part.strip()}
+
+
+def _plain(value):
+    # NaN (std для однієї точки, порожня група) -> null замість невалідного JSON
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def column_array(rows, column):
+    """
+    Значення колонки як float64-масив (None -> NaN) або None, якщо колонка не числова.
+    Тип визначається за першим непорожнім значенням, як is_numeric_dtype у pandas.
+    """
+    sample = next((row.get(column) for row in rows if row.get(column) is not None), None)
+    if sample is None or isinstance(sample, bool) or not isinstance(sample, NUMERIC_TYPES):
+        return None
+    return np.array([row.get(column) for row in rows], dtype=np.float64)
+
+
+def describe(values):
+    """mean/median/min/max/std_dev (ddof=1) без NaN — ті самі значення, що й у pandas."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"mean": None, "median": None, "min": None, "max": None, "std_dev": None}
+    return {
+        "mean": _plain(values.mean()),
+        "median": _plain(np.median(values)),
+        "min": _plain(values.min()),
+        "max": _plain(values.max()),
+        "std_dev": _plain(values.std(ddof=1)) if len(values) > 1 else None,
+    }
+
+
+def grouped_means(rows, group_by_col, columns):
+    """{column: {group: mean}} одним bincount на колонку; порожні ключі групування пропускаються."""
+    keys = [row.get(group_by_col) for row in rows]
+    present = np.array([key is not None for key in keys])
+    if not present.any():
+        return {column: {} for column in columns}
+
+    groups, inverse = np.unique(np.array(keys, dtype=object)[present].astype(str), return_inverse=True)
+    labels = {str(key): key for key in keys if key is not None}
+
+    result = {}
+    for column, values in columns.items():
+        values = values[present]
+        valid = ~np.isnan(values)
+        sums = np.bincount(inverse[valid], weights=values[valid], minlength=len(groups))
+        counts = np.bincount(inverse[valid], minlength=len(groups))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        result[column] = {labels[group]: _plain(mean) for group, mean in zip(groups, means)}
+    return result
+
+
+def build_analytics_payload(rows, fields, stats_columns=None, group_by_col=None, include_dataset=True):
+    """
+    Статистика по колонках без DataFrame: по одному NumPy-масиву на колонку.
+    Рядки датасету віддаються лише за include_dataset (?include=dataset).
+    """
+    if not rows:
+        return {"message": "No data available", "statistics": {}}
+
+    fields = list(fields or rows[0].keys())
+    arrays = {}
+    for column in stats_columns or []:
+        if column in fields:
+            values = column_array(rows, column)
+            if values is not None:
+                arrays[column] = values
+
+    grouped_data = None
+    if group_by_col and group_by_col in fields and stats_columns:
+        grouped_data = grouped_means(rows, group_by_col, arrays)
+
+    payload = {
+        "statistics": {column: describe(values) for column, values in arrays.items()},
+        "grouped_analysis": grouped_data,
+        "count": len(rows),
+    }
+    if include_dataset:
+        payload["dataset"] = [{field: row.get(field) for field in fields} for row in rows]
+    return payload
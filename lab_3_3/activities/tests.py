@@ -0,0 +1,335 @@
+import datetime
+import io
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .counters import EngagementCounters
+from .ingestion import read_csv
+from .leaderboards import LeaderboardRollup
+from .models import Activity, Comment, Kudos, LeaderboardEntry, UserMonthlyStats
+from .pagination import decode_cursor, encode_cursor
+from .repositories import social_cursor_key
+from .rollups import MonthlyStatsRollup
+from .streams import lttb
+from .tracks import TrackCodec
+
+
+def make_activity(user, start_time, **fields):
+    values = {
+        'activity_type': 'running',
+        'duration_sec': 1800.0,
+        'distance_m': 5000.0,
+        'elevation_gain_m': 20,
+        'height': 180,
+    }
+    values.update(fields)
+    return Activity.objects.create(user=user, start_time=start_time, **values)
+
+
+class MonthlyStatsRollupTests(TestCase):
+    """Інкрементні оновлення UserMonthlyStats дають ті самі рядки, що й повний rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+
+    @staticmethod
+    def stats():
+        return sorted(UserMonthlyStats.objects.values_list(
+            'user_id', 'year', 'month', 'total_distance_m', 'total_duration_sec', 'activities_count'
+        ))
+
+    def assertMatchesRebuild(self):
+        incremental = self.stats()
+        MonthlyStatsRollup.rebuild()
+        self.assertEqual(incremental, self.stats())
+
+    def test_create_update_delete(self):
+        march = timezone.make_aware(datetime.datetime(2024, 3, 10, 8))
+        april = timezone.make_aware(datetime.datetime(2024, 4, 2, 8))
+
+        first = make_activity(self.alice, march)
+        second = make_activity(self.alice, march, distance_m=12000.0, duration_sec=3600.4)
+        make_activity(self.bob, april, distance_m=3000.0)
+        # Без start_time активність в агрегати не потрапляє
+        make_activity(self.bob, None)
+        self.assertMatchesRebuild()
+
+        second.start_time = april
+        second.distance_m = 8000.0
+        second.save()
+        self.assertMatchesRebuild()
+
+        first.user = self.bob
+        first.save()
+        self.assertMatchesRebuild()
+
+        first.delete()
+        second.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(UserMonthlyStats.objects.filter(user=self.alice).count(), 0)
+
+
+class LeaderboardRollupTests(TestCase):
+    """Інкрементні оновлення LeaderboardEntry дають ті самі рядки, що й повний rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+
+    @staticmethod
+    def entries():
+        return sorted(LeaderboardEntry.objects.values_list(
+            'user_id', 'window', 'period_start', 'activity_type',
+            'total_distance_m', 'total_duration_sec', 'activities_count'
+        ))
+
+    def assertMatchesRebuild(self):
+        incremental = self.entries()
+        LeaderboardRollup.rebuild()
+        self.assertEqual(incremental, self.entries())
+
+    def test_create_update_delete(self):
+        # Неділя й понеділок: різні тижні одного місяця; 31 грудня — інший рік
+        sunday = timezone.make_aware(datetime.datetime(2024, 3, 10, 23, 30))
+        monday = timezone.make_aware(datetime.datetime(2024, 3, 11, 0, 30))
+        new_year_eve = timezone.make_aware(datetime.datetime(2023, 12, 31, 12))
+
+        ride = make_activity(self.alice, sunday, activity_type='cycling', distance_m=40000.0, duration_sec=5400.6)
+        run = make_activity(self.alice, monday)
+        make_activity(self.bob, new_year_eve, activity_type='walking', distance_m=2500.0)
+        make_activity(self.bob, None)
+        self.assertMatchesRebuild()
+        self.assertEqual(
+            LeaderboardEntry.objects.filter(user=self.alice, window='all').count(), 3
+        )
+
+        ride.start_time = new_year_eve
+        ride.save()
+        self.assertMatchesRebuild()
+
+        run.activity_type = 'hiking'
+        run.distance_m = 7000.0
+        run.save()
+        self.assertMatchesRebuild()
+
+        run.user = self.bob
+        run.save()
+        self.assertMatchesRebuild()
+
+        ride.delete()
+        run.delete()
+        self.assertMatchesRebuild()
+        self.assertFalse(LeaderboardEntry.objects.filter(user=self.alice).exists())
+
+
+class TrackCodecTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        n = 500
+        rng = np.random.default_rng(7)
+        start = np.datetime64('2024-05-01T06:00:00.000000')
+        track = {
+            'recorded_at': start + np.cumsum(rng.integers(500_000, 1_500_000, n)).astype('timedelta64[us]'),
+            'lat': np.round(50.45 + np.cumsum(rng.normal(0, 1e-4, n)), 7),
+            'lon': np.round(30.52 + np.cumsum(rng.normal(0, 1e-4, n)), 7),
+            'ele': np.round(rng.uniform(100, 300, n), 2),
+            'speed': np.round(rng.uniform(0, 12, n), 3),
+            'cadence': rng.integers(60, 190, n).astype(np.float64),
+        }
+        # Пропуски в nullable-колонках мають зберегтися
+        track['recorded_at'][[0, 10]] = np.datetime64('NaT')
+        track['ele'][5:9] = np.nan
+        track['speed'][-1] = np.nan
+        track['cadence'][::7] = np.nan
+
+        decoded = TrackCodec.decode(TrackCodec.encode(track))
+
+        self.assertEqual(set(decoded), set(track))
+        np.testing.assert_array_equal(decoded['recorded_at'], track['recorded_at'])
+        np.testing.assert_allclose(decoded['lat'], track['lat'], rtol=0, atol=5e-8)
+        np.testing.assert_allclose(decoded['lon'], track['lon'], rtol=0, atol=5e-8)
+        np.testing.assert_allclose(decoded['ele'], track['ele'], rtol=0, atol=5e-3)
+        np.testing.assert_allclose(decoded['speed'], track['speed'], rtol=0, atol=5e-4)
+        np.testing.assert_array_equal(decoded['cadence'], track['cadence'])
+
+    @staticmethod
+    def empty_track():
+        return {
+            name: np.array([], dtype='datetime64[us]' if name == 'recorded_at' else np.float64)
+            for name, _, _ in TrackCodec.COLUMNS
+        }
+
+    def test_empty_track(self):
+        decoded = TrackCodec.decode(TrackCodec.encode(self.empty_track()))
+        self.assertTrue(all(len(values) == 0 for values in decoded.values()))
+
+    def test_rejects_unknown_version(self):
+        blob = bytearray(TrackCodec.encode(self.empty_track()))
+        blob[3] = TrackCodec.VERSION + 1
+        with self.assertRaises(ValueError):
+            TrackCodec.decode(bytes(blob))
+
+
+class ReadCsvTests(SimpleTestCase):
+
+    @staticmethod
+    def read(text, chunk_size=1000):
+        return list(read_csv(io.StringIO(text), chunk_size))
+
+    def test_short_rows_keep_columns_aligned(self):
+        [raw] = self.read(
+            "time,lat,lon,ele,cadence\n"
+            "2024-05-01T06:00:00Z,50.1,30.1,120,80\n"
+            "2024-05-01T06:00:01Z,50.2,30.2\n"
+            "2024-05-01T06:00:02Z,50.3\n"
+        )
+        self.assertEqual(raw['lat'], ['50.1', '50.2'])
+        self.assertEqual(raw['lon'], ['30.1', '30.2'])
+        self.assertEqual(raw['ele'], ['120', None])
+        self.assertEqual(raw['cadence'], ['80', None])
+        self.assertEqual(raw['speed'], [None, None])
+        self.assertTrue(all(len(values) == 2 for values in raw.values()))
+
+    def test_duplicate_aliases_take_first_non_empty_value(self):
+        [raw] = self.read(
+            "lat,latitude,lon,lng,elevation,altitude\n"
+            "50.1,,30.1,31.0,120,\n"
+            ",50.2,,30.2,,130\n"
+        )
+        self.assertEqual(raw['lat'], ['50.1', '50.2'])
+        self.assertEqual(raw['lon'], ['30.1', '30.2'])
+        self.assertEqual(raw['ele'], ['120', '130'])
+
+    def test_chunks(self):
+        rows = ''.join(f"{i},{i}\n" for i in range(5))
+        chunks = self.read("lat,lon\n" + rows, chunk_size=2)
+        self.assertEqual([len(chunk['lat']) for chunk in chunks], [2, 2, 1])
+
+    def test_requires_lat_and_lon(self):
+        with self.assertRaises(ValidationError):
+            self.read("time,lat\n2024-05-01T06:00:00Z,50.1\n")
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        cursor = encode_cursor(42, 1001)
+        self.assertEqual(decode_cursor(cursor, 2), (42, 1001))
+        self.assertEqual(social_cursor_key(decode_cursor(cursor, 2)), (42, 1001))
+
+    def test_first_page(self):
+        self.assertIsNone(decode_cursor(None, 2))
+        self.assertIsNone(decode_cursor('', 2))
+        self.assertIsNone(social_cursor_key(None))
+
+    def test_rejects_malformed(self):
+        for cursor in ['not a cursor', '!!!', encode_cursor(42), encode_cursor(1, 2, 3), 'eyJhIjogMX0']:
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor, 2)
+
+    def test_rejects_non_integer_values(self):
+        for values in [('42', 1001), (4.5, 1001), (None, 1001), (True, 1001), ([1], 1001)]:
+            with self.subTest(values=values), self.assertRaises(ValueError):
+                social_cursor_key(decode_cursor(encode_cursor(*values), 2))
+
+
+class EngagementCounterTests(TestCase):
+    """Лічильники kudos/коментарів лишаються точними, коли записи видаляються каскадом."""
+
+    def setUp(self):
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        self.carol = User.objects.create_user('carol')
+        self.activity = make_activity(self.alice, timezone.now())
+
+    def counts(self):
+        self.activity.refresh_from_db()
+        return self.activity.kudos_count, self.activity.comments_count, self.activity.engagement_score
+
+    def test_counts_follow_create_and_delete(self):
+        kudos = Kudos.objects.create(activity=self.activity, user=self.bob)
+        Comment.objects.create(activity=self.activity, user=self.bob, body='Nice')
+        self.assertEqual(self.counts(), (1, 1, 2))
+
+        kudos.delete()
+        self.assertEqual(self.counts(), (0, 1, 1))
+
+    def test_reply_cascade_from_parent_comment(self):
+        root = Comment.objects.create(activity=self.activity, user=self.bob, body='Nice')
+        reply = Comment.objects.create(activity=self.activity, user=self.alice, body='Thanks', parent_comment=root)
+        Comment.objects.create(activity=self.activity, user=self.carol, body='Wow', parent_comment=reply)
+        Comment.objects.create(activity=self.activity, user=self.carol, body='Great')
+        self.assertEqual(self.counts(), (0, 4, 4))
+
+        root.delete()
+        self.assertEqual(self.counts(), (0, 1, 1))
+        self.assertEqual(EngagementCounters.reconcile(dry_run=True), 0)
+
+    def test_user_cascade(self):
+        Kudos.objects.create(activity=self.activity, user=self.bob)
+        Kudos.objects.create(activity=self.activity, user=self.carol)
+        Comment.objects.create(activity=self.activity, user=self.bob, body='Nice')
+        make_activity(self.bob, timezone.now())
+        self.assertEqual(self.counts(), (2, 1, 3))
+
+        self.bob.delete()
+        self.assertEqual(self.counts(), (1, 0, 1))
+        self.assertEqual(EngagementCounters.reconcile(dry_run=True), 0)
+
+    def test_activity_cascade_skips_decrements(self):
+        root = Comment.objects.create(activity=self.activity, user=self.bob, body='Nice')
+        Comment.objects.create(activity=self.activity, user=self.alice, body='Thanks', parent_comment=root)
+        Kudos.objects.create(activity=self.activity, user=self.bob)
+
+        with mock.patch.object(EngagementCounters, 'decrement') as decrement:
+            self.activity.delete()
+        decrement.assert_not_called()
+        self.assertFalse(Comment.objects.exists() or Kudos.objects.exists())
+
+
+class LttbTests(SimpleTestCase):
+
+    def test_endpoints_and_length(self):
+        rng = np.random.default_rng(3)
+        for n, threshold in [(10, 3), (100, 7), (1000, 256), (1001, 1000), (5000, 4999)]:
+            x = np.cumsum(rng.uniform(0.5, 1.5, n))
+            ys = [rng.normal(size=n), rng.normal(size=n)]
+            with self.subTest(n=n, threshold=threshold):
+                indices = lttb(x, ys, threshold)
+                self.assertEqual(len(indices), threshold)
+                self.assertEqual((indices[0], indices[-1]), (0, n - 1))
+                self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_short_series_unchanged(self):
+        x = np.arange(5, dtype=np.float64)
+        for threshold in (5, 6, 100):
+            np.testing.assert_array_equal(lttb(x, [x], threshold), np.arange(5))
+
+    def test_tiny_threshold(self):
+        x = np.arange(10, dtype=np.float64)
+        np.testing.assert_array_equal(lttb(x, [x], 1), [0])
+        np.testing.assert_array_equal(lttb(x, [x], 2), [0, 9])
+
+    def test_keeps_spike(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.zeros(1000)
+        y[437] = 50.0
+        self.assertIn(437, lttb(x, [y], 20))
+
+    def test_missing_values(self):
+        x = np.arange(200, dtype=np.float64)
+        empty = np.full(200, np.nan)
+        gappy = np.sin(x / 10)
+        gappy[50:120] = np.nan
+        indices = lttb(x, [empty, gappy], 30)
+        self.assertEqual(len(indices), 30)
+        self.assertEqual((indices[0], indices[-1]), (0, 199))
+        self.assertTrue(np.all(np.diff(indices) > 0))
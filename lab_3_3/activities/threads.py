@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.db import connection
+
+from .models import Comment
+
+DEFAULT_MAX_DEPTH = 10
+MAX_DEPTH = 50
+DEFAULT_MAX_COMMENTS = 500
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+class CommentThread:
+    """
+    Дерево коментарів активності одним запитом: WITH RECURSIVE обходить replies від коренів
+    (або від root_id) до max_depth, ORDER BY depth, created_at, id LIMIT — тож при обрізанні
+    за розміром батьки завжди присутні. Вкладеність збирається за один прохід по рядках.
+    """
+
+    SQL = """
+        WITH RECURSIVE thread (id, depth) AS (
+            SELECT c.id, 0 FROM {comment} c
+            WHERE c.activity_id = %s AND {root_condition}
+          UNION ALL
+            SELECT c.id, t.depth + 1 FROM {comment} c
+            JOIN thread t ON c.parent_comment_id = t.id
+            WHERE t.depth < %s
+        )
+        SELECT c.id, c.activity_id, c.user_id, c.parent_comment_id, c.body, c.created_at,
+               t.depth, u.username,
+               (SELECT COUNT(*) FROM {comment} r WHERE r.parent_comment_id = c.id) AS replies_count
+        FROM thread t
+        JOIN {comment} c ON c.id = t.id
+        JOIN {user} u ON u.id = c.user_id
+        ORDER BY t.depth, c.created_at, c.id
+        LIMIT %s
+    """
+
+    @classmethod
+    def rows(cls, activity_id, root_id=None, max_depth=DEFAULT_MAX_DEPTH, limit=DEFAULT_MAX_COMMENTS):
+        if root_id is None:
+            root_condition, params = "c.parent_comment_id IS NULL", [activity_id]
+        else:
+            root_condition, params = "c.id = %s", [activity_id, root_id]
+
+        sql = cls.SQL.format(comment=_table(Comment), user=_table(User), root_condition=root_condition)
+        # limit + 1: зайвий рядок означає, що дерево обрізано за розміром
+        return list(Comment.objects.raw(sql, params + [max_depth, limit + 1]))
+
+    @staticmethod
+    def assemble(comments):
+        """Вкладені словники за O(n): рядки вже впорядковані за глибиною, тож батько завжди перед дитиною."""
+        nodes, roots = {}, []
+        for comment in comments:
+            node = {
+                'id': comment.id,
+                'username': comment.username,
+                'body': comment.body,
+                'created_at': comment.created_at,
+                'depth': comment.depth,
+                'replies_count': comment.replies_count,
+                'replies': [],
+            }
+            nodes[comment.id] = node
+            parent = nodes.get(comment.parent_comment_id) if comment.depth else None
+            (parent['replies'] if parent is not None else roots).append(node)
+        return roots
+
+    @classmethod
+    def load(cls, activity_id, root_id=None, max_depth=DEFAULT_MAX_DEPTH, limit=DEFAULT_MAX_COMMENTS):
+        """
+        {'comments': [...], 'count': n, 'truncated': bool}. replies_count — усі прямі відповіді вузла,
+        тож len(replies) < replies_count означає відповіді за межами max_depth/limit (догрузка через root_id).
+        """
+        comments = cls.rows(activity_id, root_id, max_depth, limit)
+        truncated = len(comments) > limit
+        comments = comments[:limit]
+        return {'comments': cls.assemble(comments), 'count': len(comments), 'truncated': truncated}
@@ -0,0 +1,231 @@
+import numpy as np
+
+from .geo import haversine_m
+from .models import ActivityPoint, ActivityTrack
+from .tracks import TrackCodec, TrackStore
+
+# Нижче цієї швидкості (м/с) відрізок вважається зупинкою і не входить у moving time
+MOVING_SPEED_MPS = 0.5
+# Вікно (у точках) ковзного середнього для висоти перед підрахунком набору
+ELEVATION_WINDOW = 5
+SPLIT_DISTANCE_M = 1000.0
+PERCENTILES = (50, 90, 95)
+
+
+def group_starts(groups):
+    """Індекси, з яких починається кожна група у відсортованому масиві ідентифікаторів."""
+    if not len(groups):
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.diff(groups, prepend=groups[0] - 1))
+
+
+def trailing_mean(values, window, starts):
+    """Ковзне середнє за останні window значень, що не виходить за межі групи."""
+    n = len(values)
+    if not n:
+        return values
+    index = np.arange(n)
+    first = np.repeat(starts, np.diff(np.append(starts, n)))
+    low = np.maximum(first, index - window + 1)
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return (cumulative[index + 1] - cumulative[low]) / (index - low + 1)
+
+
+def elevation_gain(ele, groups, n_groups, window=ELEVATION_WINDOW):
+    valid = ~np.isnan(ele)
+    ele, groups = ele[valid], groups[valid]
+    if len(ele) < 2:
+        return np.zeros(n_groups)
+
+    smoothed = trailing_mean(ele, window, group_starts(groups))
+    rise = np.diff(smoothed)
+    same = groups[1:] == groups[:-1]
+    return np.bincount(groups[1:], weights=np.where(same & (rise > 0), rise, 0.0), minlength=n_groups)
+
+
+def grouped_percentiles(columns, groups, n_groups, percentiles=PERCENTILES):
+    """
+    Перцентилі (лінійна інтерполяція, як np.percentile) кожної колонки для кожної групи.
+
+    Точки вже згруповані, тож порядок груп не сортується повторно: значення всіх колонок
+    сортуються одним np.sort у межах кожної групи; NaN опиняються в кінці групи й не враховуються.
+    Повертає масив (колонки, групи, перцентилі).
+    """
+    values = np.column_stack(columns).astype(np.float64)
+    result = np.full((values.shape[1], n_groups, len(percentiles)), np.nan)
+    if not len(values):
+        return result
+
+    starts = group_starts(groups)
+    bounds = np.append(starts, len(groups)).tolist()
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        values[lo:hi] = np.sort(values[lo:hi], axis=0)
+    offsets = np.zeros(n_groups, dtype=np.int64)
+    offsets[groups[starts]] = starts
+
+    for index in range(values.shape[1]):
+        column_values = values[:, index]
+        counts = np.bincount(groups[~np.isnan(column_values)], minlength=n_groups)
+        present = counts > 0
+        for column, q in enumerate(percentiles):
+            position = offsets[present] + (counts[present] - 1) * (q / 100.0)
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, offsets[present] + counts[present] - 1)
+            fraction = position - low
+            result[index, present, column] = column_values[low] * (1 - fraction) + column_values[high] * fraction
+
+    return result
+
+
+def compute_metrics(track, groups=None):
+    """
+    Метрики для одного або кількох треків за один векторизований прохід.
+
+    track — dict колонок (як повертає TrackStore), groups — номер треку 0..k-1
+    для кожної точки (точки мають бути згруповані та впорядковані за часом).
+    Повертає список dict, по одному на групу.
+    """
+    lat, lon = track['lat'], track['lon']
+    n = len(lat)
+    if groups is None:
+        groups = np.zeros(n, dtype=np.int64)
+    n_groups = int(groups.max()) + 1 if n else 0
+    if not n_groups:
+        return []
+
+    seconds = track['recorded_at'].astype('datetime64[us]').astype(np.int64) / 1e6
+    seconds[np.isnat(track['recorded_at'])] = np.nan
+
+    same = groups[1:] == groups[:-1]
+    seg_groups = groups[1:]
+    seg_dist = np.where(same, haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:]), 0.0)
+    seg_time = np.where(same, np.diff(seconds), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        seg_speed = seg_dist / seg_time
+    moving = same & (seg_time > 0) & (seg_speed >= MOVING_SPEED_MPS)
+
+    points = np.bincount(groups, minlength=n_groups)
+    distance = np.bincount(seg_groups, weights=seg_dist, minlength=n_groups)
+    moving_time = np.bincount(seg_groups, weights=np.where(moving, seg_time, 0.0), minlength=n_groups)
+    gain = elevation_gain(track['ele'], groups, n_groups)
+
+    timed = ~np.isnan(seconds)
+    start = np.full(n_groups, np.inf)
+    end = np.full(n_groups, -np.inf)
+    np.minimum.at(start, groups[timed], seconds[timed])
+    np.maximum.at(end, groups[timed], seconds[timed])
+    elapsed = np.where(np.isfinite(start), end - start, 0.0)
+
+    speed = np.where(np.isnan(track['speed']), np.append(np.nan, np.where(same, seg_speed, np.nan)), track['speed'])
+    speed[~np.isfinite(speed)] = np.nan
+    speed_pct, cadence_pct = grouped_percentiles((speed, track['cadence']), groups, n_groups)
+    max_speed = np.full(n_groups, -np.inf)
+    np.fmax.at(max_speed, groups, speed)
+
+    splits = _splits(seg_dist, seconds, groups, n_groups)
+
+    metrics = []
+    for g in range(n_groups):
+        avg_speed = distance[g] / moving_time[g] if moving_time[g] > 0 else None
+        metrics.append({
+            'points': int(points[g]),
+            'distance_m': float(distance[g]),
+            'elevation_gain_m': float(gain[g]),
+            'elapsed_time_sec': float(elapsed[g]),
+            'moving_time_sec': float(moving_time[g]),
+            'avg_speed_mps': avg_speed,
+            'pace_sec_per_km': 1000.0 / avg_speed if avg_speed else None,
+            'max_speed_mps': float(max_speed[g]) if np.isfinite(max_speed[g]) else None,
+            'speed_percentiles': _percentile_dict(speed_pct[g]),
+            'cadence_percentiles': _percentile_dict(cadence_pct[g]),
+            'splits_sec': splits[g],
+        })
+    return metrics
+
+
+def _percentile_dict(row):
+    return {f"p{q}": (None if np.isnan(value) else float(value)) for q, value in zip(PERCENTILES, row)}
+
+
+def _splits(seg_dist, seconds, groups, n_groups):
+    """Час кожного повного кілометра (інтерполяція моменту перетину межі)."""
+    splits = [[] for _ in range(n_groups)]
+    if len(groups) < 2:
+        return splits
+
+    starts = group_starts(groups)
+    cumulative = np.concatenate(([0.0], np.cumsum(seg_dist)))
+    cumulative -= np.repeat(cumulative[starts], np.diff(np.append(starts, len(groups))))
+    km = np.floor(cumulative / SPLIT_DISTANCE_M)
+
+    crossing = np.flatnonzero((np.diff(km) > 0) & (groups[1:] == groups[:-1])) + 1
+    if not len(crossing):
+        return splits
+
+    previous = crossing - 1
+    boundary = km[crossing] * SPLIT_DISTANCE_M
+    fraction = (boundary - cumulative[previous]) / (cumulative[crossing] - cumulative[previous])
+    at = seconds[previous] + fraction * (seconds[crossing] - seconds[previous])
+
+    # Перший спліт рахується від першої точки з часом у групі
+    origin = np.full(n_groups, np.nan)
+    timed = ~np.isnan(seconds)
+    np.fmin.at(origin, groups[timed], seconds[timed])
+
+    crossing_groups = groups[crossing]
+    first = np.concatenate(([True], crossing_groups[1:] != crossing_groups[:-1]))
+    previous_at = np.where(first, origin[crossing_groups], np.append(np.nan, at[:-1]))
+    durations = at - previous_at
+
+    for g, value in zip(crossing_groups.tolist(), durations.tolist()):
+        splits[g].append(None if np.isnan(value) else round(value, 1))
+    return splits
+
+
+def load_tracks(activity_ids):
+    """
+    Завантажує треки кількох активностей в один набір масивів.
+
+    Повертає (activity_ids, track, groups): упаковані треки декодуються з ActivityTrack,
+    решта читається одним values_list-запитом з ActivityPoint.
+    """
+    activity_ids = sorted(set(activity_ids))
+    blobs = dict(ActivityTrack.objects.filter(activity_id__in=activity_ids).values_list('activity_id', 'data'))
+    parts = {activity_id: TrackCodec.decode(blob) for activity_id, blob in blobs.items()}
+
+    row_ids = [activity_id for activity_id in activity_ids if activity_id not in blobs]
+    if row_ids:
+        rows = list(
+            ActivityPoint.objects.filter(activity_id__in=row_ids)
+            .order_by('activity_id', 'recorded_at', 'id')
+            .values_list('activity_id', *TrackStore.POINT_FIELDS)
+        )
+        if rows:
+            owners = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            arrays = TrackStore.arrays_from_rows([row[1:] for row in rows])
+            for activity_id, lo, hi in _runs(owners):
+                parts[activity_id] = {name: values[lo:hi] for name, values in arrays.items()}
+
+    ordered = [activity_id for activity_id in activity_ids if activity_id in parts]
+    if not ordered:
+        return [], TrackStore.empty_track(), np.zeros(0, dtype=np.int64)
+
+    track = {
+        name: np.concatenate([parts[activity_id][name] for activity_id in ordered])
+        for name in TrackStore.POINT_FIELDS
+    }
+    groups = np.repeat(np.arange(len(ordered)), [len(parts[activity_id]['lat']) for activity_id in ordered])
+    return ordered, track, groups
+
+
+def _runs(owners):
+    starts = group_starts(owners)
+    ends = np.append(starts[1:], len(owners))
+    return zip(owners[starts].tolist(), starts.tolist(), ends.tolist())
+
+
+def compute_for_activities(activity_ids):
+    """{activity_id: metrics} для пакета активностей."""
+    ordered, track, groups = load_tracks(activity_ids)
+    return dict(zip(ordered, compute_metrics(track, groups)))
+
@@ -0,0 +1,187 @@
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from .models import ActivityPoint, ActivityTrack
+
+
+class TrackCodec:
+    """
+    Пакує GPS-трек у один бінарний блоб.
+
+    Кожна колонка квантується у int64 (координати з точністю 1e-7°, висота до см,
+    швидкість до мм/с, час до мкс), кодується дельтами, байти перемішуються
+    (byte shuffle), а весь payload стискається zlib. NULL-значення зберігаються
+    бітовою маскою.
+    """
+
+    MAGIC = b'TRK'
+    VERSION = 1
+    HEADER = struct.Struct('<3sBI')
+
+    # (назва, множник квантування, чи може бути NULL)
+    COLUMNS = (
+        ('recorded_at', 1, True),
+        ('lat', 10 ** 7, False),
+        ('lon', 10 ** 7, False),
+        ('ele', 100, True),
+        ('speed', 1000, True),
+        ('cadence', 1, True),
+    )
+
+    @staticmethod
+    def _shuffle(values):
+        return values.astype('<i8').view(np.uint8).reshape(-1, 8).T.tobytes()
+
+    @staticmethod
+    def _unshuffle(buffer, n):
+        return np.frombuffer(buffer, dtype=np.uint8).reshape(8, n).T.copy().view('<i8').ravel()
+
+    @classmethod
+    def encode(cls, track, level=6):
+        n = len(track['lat'])
+        parts = [cls.HEADER.pack(cls.MAGIC, cls.VERSION, n)]
+        payload = []
+
+        for name, scale, nullable in cls.COLUMNS:
+            if name == 'recorded_at':
+                values = np.asarray(track[name], dtype='datetime64[us]')
+                valid = ~np.isnat(values)
+                quantized = np.where(valid, values.astype(np.int64), 0)
+            else:
+                values = np.asarray(track[name], dtype=np.float64)
+                valid = ~np.isnan(values)
+                quantized = np.rint(np.where(valid, values, 0.0) * scale).astype(np.int64)
+
+            if nullable:
+                payload.append(np.packbits(valid).tobytes())
+                if n:
+                    # Пропуски заповнюємо попереднім значенням, щоб дельти лишались малими
+                    quantized = quantized[np.maximum.accumulate(np.where(valid, np.arange(n), 0))]
+
+            payload.append(cls._shuffle(np.diff(quantized, prepend=np.int64(0))))
+
+        parts.append(zlib.compress(b''.join(payload), level))
+        return b''.join(parts)
+
+    @classmethod
+    def decode(cls, blob):
+        blob = bytes(blob)
+        magic, version, n = cls.HEADER.unpack_from(blob)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError(f"Unsupported track encoding: {magic!r} v{version}")
+
+        payload = zlib.decompress(blob[cls.HEADER.size:])
+        mask_size = (n + 7) // 8
+        offset = 0
+        track = {}
+
+        for name, scale, nullable in cls.COLUMNS:
+            valid = None
+            if nullable:
+                valid = np.unpackbits(
+                    np.frombuffer(payload, dtype=np.uint8, count=mask_size, offset=offset), count=n
+                ).astype(bool)
+                offset += mask_size
+
+            quantized = np.cumsum(cls._unshuffle(payload[offset:offset + n * 8], n))
+            offset += n * 8
+
+            if name == 'recorded_at':
+                values = quantized.astype('datetime64[us]')
+                if valid is not None:
+                    values[~valid] = np.datetime64('NaT')
+            else:
+                values = quantized / scale
+                if valid is not None:
+                    values[~valid] = np.nan
+
+            track[name] = values
+
+        return track
+
+
+class TrackStore:
+    """Читання/запис треків як NumPy-масивів без створення об'єктів ActivityPoint."""
+
+    POINT_FIELDS = ('recorded_at', 'lat', 'lon', 'ele', 'speed', 'cadence')
+
+    @staticmethod
+    def empty_track():
+        return {
+            'recorded_at': np.array([], dtype='datetime64[us]'),
+            'lat': np.array([], dtype=np.float64),
+            'lon': np.array([], dtype=np.float64),
+            'ele': np.array([], dtype=np.float64),
+            'speed': np.array([], dtype=np.float64),
+            'cadence': np.array([], dtype=np.float64),
+        }
+
+    @classmethod
+    def arrays_from_rows(cls, rows):
+        # rows: кортежі у порядку POINT_FIELDS (наприклад, з values_list)
+        if not rows:
+            return cls.empty_track()
+
+        recorded_at, lat, lon, ele, speed, cadence = zip(*rows)
+        times = pd.to_datetime(pd.Series(recorded_at, dtype=object), utc=True)
+        return {
+            'recorded_at': times.dt.tz_localize(None).to_numpy(dtype='datetime64[us]'),
+            'lat': np.array(lat, dtype=np.float64),
+            'lon': np.array(lon, dtype=np.float64),
+            'ele': np.array(ele, dtype=np.float64),
+            'speed': np.array(speed, dtype=np.float64),
+            'cadence': np.array(cadence, dtype=np.float64),
+        }
+
+    @staticmethod
+    def activity_ids():
+        """Відсортовані id активностей, що мають трек (рядки ActivityPoint або ActivityTrack)."""
+        return sorted(
+            set(ActivityPoint.objects.values_list('activity_id', flat=True).distinct())
+            | set(ActivityTrack.objects.values_list('activity_id', flat=True))
+        )
+
+    @classmethod
+    def point_rows(cls, activity_id):
+        return ActivityPoint.objects.filter(activity_id=activity_id).order_by(
+            'recorded_at', 'id'
+        ).values_list(*cls.POINT_FIELDS)
+
+    @classmethod
+    def load_from_points(cls, activity_id):
+        return cls.arrays_from_rows(list(cls.point_rows(activity_id)))
+
+    @classmethod
+    def load(cls, activity_id):
+        """Повертає трек у вигляді dict колонок; спершу шукає упакований трек."""
+        blob = ActivityTrack.objects.filter(activity_id=activity_id).values_list('data', flat=True).first()
+        if blob is not None:
+            return TrackCodec.decode(blob)
+        return cls.load_from_points(activity_id)
+
+    @classmethod
+    def save(cls, activity_id, track):
+        blob = TrackCodec.encode(track)
+        ActivityTrack.objects.update_or_create(
+            activity_id=activity_id,
+            defaults={
+                'data': blob,
+                'points_count': len(track['lat']),
+                'encoding_version': TrackCodec.VERSION,
+            }
+        )
+        return len(blob)
+
+    @classmethod
+    def pack(cls, activity_id, delete_points=False):
+        """Переносить рядки ActivityPoint активності у ActivityTrack."""
+        with transaction.atomic():
+            track = cls.load_from_points(activity_id)
+            size = cls.save(activity_id, track)
+            if delete_points:
+                ActivityPoint.objects.filter(activity_id=activity_id).delete()
+        return len(track['lat']), size
@@ -1,12 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, async_views
 
 router = DefaultRouter()
 router.register(r'analytics', views.AnalyticsViewSet, basename='analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('activities/import/', views.TrackImportView.as_view(), name='track_import'),
+    path('activities/search/', views.ActivitySearchView.as_view(), name='activity_search'),
+    path('activities/<int:activity_id>/comments/', views.CommentThreadView.as_view(), name='comment_thread'),
+    path('activities/<int:activity_id>/streams/', views.ActivityStreamsView.as_view(), name='activity_streams'),
+    path('segments/<int:segment_id>/leaderboard/', views.SegmentLeaderboardView.as_view(), name='segment_leaderboard'),
+    path('feed/', views.FeedView.as_view(), name='feed'),
+    path('async/analytics/<str:name>/', async_views.analytics_endpoint, name='async_analytics'),
 
     path('dashboard/', views.AnalyticsDashboard.as_view(), name='analytics_dashboard'),
 ]
\ No newline at end of file
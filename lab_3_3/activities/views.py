@@ -1,74 +1,150 @@
+import json
+
+import numpy as np
 import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, StreamingHttpResponse
 from django.shortcuts import render
 from django.views import View
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
+from rest_framework.views import APIView
 
-from .repositories import DataAccessLayer
-from .services import ChartService, BenchmarkService
+from .benchmarks import BenchmarkSuite, list_reports, load_report, save_report
+from .cohorts import DIMENSIONS as COHORT_DIMENSIONS, PROFILE_DIMENSIONS, CohortAnalytics, parse_dimensions
+from .feeds import FeedService, feed_cursor_key
+from .ingestion import TrackImporter
+from .leaderboards import ALL_TYPES, WINDOWS as LEADERBOARD_WINDOWS
+from .models import Activity, Segment
+from .pooling import all_pool_stats
+from .renderers import EXPORT_FORMATS, analytics_renderers
+from .pagination import encode_cursor, decode_cursor, parse_limit, split_page
+from .repositories import DataAccessLayer, social_cursor_key
+from .segments import SegmentService
+from .streams import MAX_STREAM_POINTS, SERIES as STREAM_SERIES, StreamPyramid
+from .services import ChartService, BenchmarkService, DashboardDataService
+from .summaries import build_analytics_payload, parse_include
+from .threads import CommentThread, DEFAULT_MAX_DEPTH, MAX_DEPTH, DEFAULT_MAX_COMMENTS
 
 
 class AnalyticsViewSet(viewsets.ViewSet):
     permission_classes = [AllowAny]
+    # JSON, колонковий JSON, Arrow IPC, Parquet — за Accept або ?format=
+    renderer_classes = analytics_renderers()
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.db = DataAccessLayer()
 
+    def _include_dataset(self, default=False):
+        # default=True — для дій, де рядки і є запитаними даними (сторінка курсора, розріз когорт):
+        # датасет повертається, доки його не вимкнено ?include=none
+        if self.request.accepted_renderer.format in EXPORT_FORMATS:
+            return True
+        include = parse_include(self.request.query_params.get('include'))
+        return 'dataset' in include or (default and 'none' not in include)
+
     def _process_pandas_response(self, queryset, fields, stats_columns=None, group_by_col=None):
-        if fields:
-            data = list(queryset.values(*fields))
-        else:
-            data = list(queryset)
-
-        df = pd.DataFrame(data)
-
-        if df.empty:
-            return Response({"message": "No data available", "statistics": {}})
-
-        stats = {}
-        if stats_columns:
-            for col in stats_columns:
-                if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
-                    stats[col] = {
-                        "mean": df[col].mean(),
-                        "median": df[col].median(),
-                        "min": df[col].min(),
-                        "max": df[col].max(),
-                        "std_dev": df[col].std()
-                    }
-
-        grouped_data = None
-        if group_by_col and group_by_col in df.columns and stats_columns:
-            grouped_df = df.groupby(group_by_col)[stats_columns].mean()
-            grouped_data = grouped_df.to_dict()
-
-        response_data = {
-            "dataset": df.to_dict(orient="records"),
-            "statistics": stats,
-            "grouped_analysis": grouped_data
-        }
-        return Response(response_data)
+        return Response(build_analytics_payload(
+            list(queryset), fields, stats_columns, group_by_col, include_dataset=self._include_dataset()
+        ))
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        return Response(self.db.cache.stats())
+
+    @action(detail=False, methods=['get'])
+    def pool_stats(self, request):
+        return Response(all_pool_stats())
+
+    @staticmethod
+    def _leaderboard_params(params):
+        # ?window=week|month|year|all&activity_type=...; ValueError -> 400
+        window = params.get('window', 'all')
+        if window not in LEADERBOARD_WINDOWS:
+            raise ValueError(f"window must be one of: {', '.join(LEADERBOARD_WINDOWS)}")
+        return {'window': window, 'activity_type': params.get('activity_type') or ALL_TYPES}
+
+    @classmethod
+    def _leaderboard_top_params(cls, params):
+        # _leaderboard_params + ?top_n=10&min_distance=0; спільні з асинхронним /api/async/analytics/leaderboard/
+        top = cls._leaderboard_params(params)
+        top['top_n'] = min(max(int(params.get('top_n', 10)), 1), 1000)
+        top['min_distance'] = float(params.get('min_distance', 0))
+        return top
 
     @action(detail=False, methods=['get'])
     def leaderboard(self, request):
-        qs = self.db.analytics.get_top_distance_users()
+        try:
+            params = self._leaderboard_top_params(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = self.db.analytics.get_leaderboard(**params)
         return self._process_pandas_response(
             qs,
-            fields=['username', 'total_distance'],
+            fields=['rank', 'username', 'total_distance', 'activities_count'],
             stats_columns=['total_distance']
         )
 
+    @action(detail=False, methods=['get'])
+    def leaderboard_rank(self, request):
+        try:
+            params = self._leaderboard_params(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        username = request.query_params.get('user') or getattr(request.user, 'username', '')
+        user = User.objects.filter(username=username).only('id').first() if username else None
+        if user is None:
+            return Response({"error": "Користувача не знайдено (параметр 'user')."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Точкове читання двома запитами по індексу — без кешу, щоб місце було актуальним
+        result = self.db.repository.leaderboard_rank(user.id, **params)
+        if result is None:
+            return Response({"username": username, **params, "rank": None})
+        return Response({"username": username, **params, **result})
+
+    SOCIAL_FIELDS = ['id', 'user__username', 'comments_count', 'kudos_count', 'engagement_score']
+
+    @staticmethod
+    def _ndjson_rows(queryset, fields):
+        # iterator() на Postgres читає через server-side cursor пакетами по chunk_size
+        for row in queryset.values(*fields).iterator(chunk_size=2000):
+            yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
     @action(detail=False, methods=['get'])
     def social_engagement(self, request):
-        qs = self.db.analytics.get_social_activities()
-        return self._process_pandas_response(
-            qs,
-            fields=['id', 'user__username', 'comments_count', 'kudos_count', 'engagement_score'],
-            stats_columns=['engagement_score', 'comments_count', 'kudos_count']
+        if request.query_params.get('stream') == 'ndjson':
+            qs = self.db.repository.get_social_activities().order_by('-engagement_score', '-id')
+            return StreamingHttpResponse(
+                self._ndjson_rows(qs, self.SOCIAL_FIELDS), content_type='application/x-ndjson'
+            )
+
+        try:
+            after = social_cursor_key(decode_cursor(request.query_params.get('cursor'), 2))
+            limit = parse_limit(request.query_params.get('limit'))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows, has_more = split_page(self.db.analytics.get_social_activities_page(after=after, limit=limit), limit)
+        payload = build_analytics_payload(
+            rows,
+            fields=self.SOCIAL_FIELDS,
+            stats_columns=['engagement_score', 'comments_count', 'kudos_count'],
+            include_dataset=self._include_dataset(default=True),
         )
+        payload['next_cursor'] = (
+            encode_cursor(rows[-1]['engagement_score'], rows[-1]['id']) if has_more else None
+        )
+        return Response(payload)
 
     @action(detail=False, methods=['get'])
     def monthly_trends(self, request):
@@ -84,9 +160,74 @@ class AnalyticsViewSet(viewsets.ViewSet):
         qs = self.db.analytics.get_influential_users()
         return self._process_pandas_response(
             qs,
-            fields=['username', 'followers_count'],
-            stats_columns=['followers_count']
+            fields=['username', 'followers_count', 'pagerank', 'mutual_count', 'community_id'],
+            stats_columns=['followers_count', 'pagerank']
+        )
+
+    @action(detail=False, methods=['get'])
+    def communities(self, request):
+        qs = self.db.analytics.get_communities()
+        return self._process_pandas_response(
+            qs,
+            fields=['community_id', 'members', 'total_followers', 'max_pagerank'],
+            stats_columns=['members']
+        )
+
+    @action(detail=False, methods=['get'])
+    def social_graph(self, request):
+        username = request.query_params.get('user') or getattr(request.user, 'username', '')
+        user = User.objects.filter(username=username).only('id').first() if username else None
+        if user is None:
+            return Response({"error": "Користувача не знайдено (параметр 'user')."}, status=status.HTTP_404_NOT_FOUND)
+
+        profile = self.db.repository.social_profile(user.id)
+        if profile is None:
+            return Response({"username": username, "error": "Метрики графа ще не пораховано (refresh_social_graph)."},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({"username": username, **profile})
+
+    def _cohort_response(self, method, dimensions, stats_columns):
+        # ?group_by=country,age_band&country=...&age_band=...&gender=...[&activity_type=...]; ValueError -> 400
+        try:
+            group_by = parse_dimensions(self.request.query_params.get('group_by'), dimensions)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if not CohortAnalytics.is_populated():
+            return Response({"error": "Когортні представлення ще не наповнено (refresh_cohort_views)."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        filters = {dimension: self.request.query_params.get(dimension) for dimension in dimensions}
+        rows = getattr(self.db.analytics, method)(group_by, **{key: value for key, value in filters.items() if value})
+        payload = build_analytics_payload(
+            list(rows), fields=None, stats_columns=stats_columns, include_dataset=self._include_dataset(default=True)
         )
+        payload['group_by'] = list(group_by)
+        payload['freshness'] = CohortAnalytics.freshness()
+        return Response(payload)
+
+    @action(detail=False, methods=['get'])
+    def cohorts(self, request):
+        return self._cohort_response(
+            'get_cohort_breakdown', COHORT_DIMENSIONS, ['total_distance', 'total_athletes', 'distance_per_athlete']
+        )
+
+    @action(detail=False, methods=['get'])
+    def cohort_demographics(self, request):
+        return self._cohort_response(
+            'get_cohort_demographics', PROFILE_DIMENSIONS, ['total_athletes', 'avg_age', 'avg_bmi']
+        )
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def cohort_refresh(self, request):
+        # Оновлення на вимогу; ?force=1 — без перевірки застарілості
+        refresh = CohortAnalytics.refresh(force=request.query_params.get('force') in ('1', 'true'))
+        return Response({
+            "mode": refresh.mode,
+            "activity_rows": refresh.activity_rows,
+            "profile_rows": refresh.profile_rows,
+            "duration_ms": refresh.duration_ms,
+            "freshness": CohortAnalytics.freshness(),
+        })
 
     @action(detail=False, methods=['get'])
     def activity_performance(self, request):
@@ -108,36 +249,234 @@ class AnalyticsViewSet(viewsets.ViewSet):
         )
 
 
+class TrackImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Файл треку не передано (поле 'file')."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            importer = TrackImporter(
+                request.user,
+                activity_type=request.data.get('activity_type', 'other'),
+                storage=request.data.get('storage', 'rows'),
+            )
+            result = importer.import_file(upload, TrackImporter.detect_format(upload.name, request.data.get('format')))
+        except ValidationError as exc:
+            return Response({"error": exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class ActivitySearchView(APIView):
+    """
+    Регіональний пошук: ?bbox=min_lat,min_lon,max_lat,max_lon або ?lat=..&lon=..&radius=<метри>.
+    Прямокутник через антимеридіан не підтримується (min_lon <= max_lon); висота — до MAX_SPAN_DEG градусів.
+    """
+
+    permission_classes = [IsAuthenticated]
+    MAX_RADIUS_M = 100000
+
+    @staticmethod
+    def _coordinate(value, limit, name):
+        value = float(value)
+        if not -limit <= value <= limit:
+            raise ValueError(f"{name} must be within [-{limit}, {limit}]")
+        return value
+
+    def get(self, request):
+        params = request.query_params
+        repository = DataAccessLayer(use_cache=False).repository
+        try:
+            limit = parse_limit(params.get('limit'))
+            if params.get('bbox'):
+                parts = params['bbox'].split(',')
+                if len(parts) != 4:
+                    raise ValueError("bbox must be min_lat,min_lon,max_lat,max_lon")
+                min_lat, max_lat = (self._coordinate(parts[i], 90, 'lat') for i in (0, 2))
+                min_lon, max_lon = (self._coordinate(parts[i], 180, 'lon') for i in (1, 3))
+                if min_lat > max_lat or min_lon > max_lon:
+                    raise ValueError("bbox minimum must not exceed maximum")
+                rows = repository.activities_in_bbox(min_lat, min_lon, max_lat, max_lon, limit=limit)
+            elif params.get('lat') and params.get('lon') and params.get('radius'):
+                radius = float(params['radius'])
+                if not 0 < radius <= self.MAX_RADIUS_M:
+                    raise ValueError(f"radius must be within (0, {self.MAX_RADIUS_M}] m")
+                rows = repository.activities_near(
+                    self._coordinate(params['lat'], 90, 'lat'), self._coordinate(params['lon'], 180, 'lon'),
+                    radius, limit=limit,
+                )
+            else:
+                raise ValueError("Pass bbox=min_lat,min_lon,max_lat,max_lon or lat, lon and radius")
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"count": len(rows), "dataset": rows})
+
+
+class FeedView(APIView):
+    """Стрічка поточного користувача: ?limit=20&cursor=<next_cursor>."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            after = feed_cursor_key(decode_cursor(request.query_params.get('cursor'), 2))
+            limit = parse_limit(request.query_params.get('limit'), default=20, maximum=100)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows, has_more = FeedService.page(request.user.id, after=after, limit=limit)
+        return Response({
+            "count": len(rows),
+            "dataset": rows,
+            "next_cursor": encode_cursor(rows[-1]['start_time'].isoformat(), rows[-1]['id']) if has_more else None,
+        })
+
+
+class CommentThreadView(APIView):
+    """Дерево коментарів активності одним запитом: ?depth=10&limit=500&root=<comment_id>."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, activity_id):
+        try:
+            depth = min(max(int(request.query_params.get('depth', DEFAULT_MAX_DEPTH)), 0), MAX_DEPTH)
+            limit = parse_limit(request.query_params.get('limit'), default=DEFAULT_MAX_COMMENTS)
+            root = request.query_params.get('root')
+            root = int(root) if root else None
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        thread = CommentThread.load(activity_id, root_id=root, max_depth=depth, limit=limit)
+        if not thread['count'] and not Activity.objects.filter(pk=activity_id).exists():
+            return Response({"error": "Активність не знайдено."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(thread)
+
+
+class ActivityStreamsView(APIView):
+    """
+    Потоки активності (time, speed, ele, cadence), проріджені LTTB: ?points=500&series=speed,ele.
+    Колонки — типізовані масиви: ?format=columnar (JSON), arrow або parquet (бінарні).
+    """
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = analytics_renderers()
+
+    def get(self, request, activity_id):
+        try:
+            points = parse_limit(request.query_params.get('points'), default=500, maximum=MAX_STREAM_POINTS)
+            series = [name for name in request.query_params.get('series', ','.join(STREAM_SERIES)).split(',') if name]
+            unknown = set(series) - set(STREAM_SERIES)
+            if unknown or not series:
+                raise ValueError(f"series must be a comma-separated subset of: {', '.join(STREAM_SERIES)}")
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        streams = StreamPyramid.load(activity_id, points, series=tuple(dict.fromkeys(series)))
+        if streams is None:
+            return Response({"error": "Активність не знайдено."}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.accepted_renderer.format not in EXPORT_FORMATS:
+            # Звичайний JSON-рендерер не серіалізує NumPy і NaN
+            streams['dataset'] = {
+                name: np.where(np.isnan(values), None, values).tolist()
+                for name, values in streams['dataset'].items()
+            }
+        return Response({"activity_id": activity_id, **streams})
+
+
+class SegmentLeaderboardView(APIView):
+    """Рейтинг сегмента: найкраще проходження кожного користувача, ?limit=10."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, segment_id):
+        try:
+            limit = parse_limit(request.query_params.get('limit'), default=10, maximum=100)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        segment = Segment.objects.filter(pk=segment_id).values('id', 'name', 'activity_type', 'distance_m').first()
+        if segment is None:
+            return Response({"error": "Сегмент не знайдено."}, status=status.HTTP_404_NOT_FOUND)
+
+        rows = SegmentService.leaderboard(segment_id, top_n=limit)
+        return Response({"segment": segment, "count": len(rows), "dataset": rows})
+
+
 class AnalyticsDashboard(View):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.db = DataAccessLayer()
 
+    def benchmark(self, request):
+        runs = list_reports()
+        n_requests = min(max(int(request.GET.get('n_requests', 100)), 10), 1000)
+        report, selected, error = None, request.GET.get('run') or (runs[0] if runs else None), None
+
+        if selected:
+            try:
+                report = load_report(selected)
+            except (FileNotFoundError, ValueError):
+                error = f"Прогін '{selected}' не знайдено."
+        return self.render_benchmark(request, report, runs, selected, error, n_requests)
+
+    def run_benchmark(self, request):
+        try:
+            n_requests = min(max(int(request.POST.get('n_requests', 100)), 10), 1000)
+        except ValueError:
+            return HttpResponseBadRequest("n_requests must be an integer")
+
+        # Швидкий прогін зі сторінки; повний набір сценаріїв — manage.py run_benchmarks
+        suite = BenchmarkSuite(
+            concurrency=(1, 2, 4, 8, 16, 32), requests=n_requests, warmup=10, repetitions=1,
+            databases=list(settings.DATABASES),
+        )
+        report = suite.run()
+        selected = save_report(report).name
+        return self.render_benchmark(request, report, list_reports(), selected, None, n_requests)
+
+    def render_benchmark(self, request, report, runs, selected, error, n_requests):
+        df = BenchmarkService.results_frame(report or {})
+        best = df.loc[df['throughput'].idxmax()].to_dict() if not df.empty else None
+
+        return render(request, 'activities/dashboard_benchmark.html', {
+            'chart': BenchmarkService.build_benchmark_chart(df),
+            'latency_chart': BenchmarkService.build_latency_chart(df),
+            'plotly_js_url': ChartService.plotly_js_url(),
+            'results': df.to_dict('records'),
+            'meta': (report or {}).get('meta'),
+            'runs': runs,
+            'selected_run': selected,
+            'error': error,
+            'n_requests': n_requests,
+            'best': best,
+            'pool_stats': all_pool_stats(),
+        })
+
     def get(self, request):
         mode = request.GET.get('mode', 'plotly')
 
         if mode == 'benchmark':
-            n_requests = int(request.GET.get('n_requests', 100))
-            df_results = BenchmarkService.run_experiment(total_requests=n_requests)
-            best_result = df_results.loc[df_results['duration'].idxmin()]
-            chart = BenchmarkService.build_benchmark_chart(df_results)
-
-            return render(request, 'activities/dashboard_benchmark.html', {
-                'chart': chart,
-                'n_requests': n_requests,
-                'best_threads': best_result['threads'],
-                'min_time': round(best_result['duration'], 3)
-            })
+            # Бенчмарк навантажує всі БД, тому сторінка лише для персоналу
+            if not request.user.is_staff:
+                return redirect_to_login(request.get_full_path())
+            return self.benchmark(request)
+
+        top_n = min(max(int(request.GET.get('top_n', 10)), 1), 1000)
+        min_dist = float(request.GET.get('min_dist', 0))
+        window = request.GET.get('window', 'all')
+        if window not in LEADERBOARD_WINDOWS:
+            window = 'all'
 
+        # Фільтр і top-N виконує БД над готовою таблицею лідерів
+        leaderboard_params = {'window': window, 'top_n': top_n, 'min_distance': min_dist}
         with self.db as db:
-            data_sources = {
-                'leaderboard': db.analytics.get_top_distance_users(),
-                'social': db.analytics.get_social_activities(),
-                'monthly': db.analytics.get_monthly_activity_stats(),
-                'influencers': db.analytics.get_influential_users(),
-                'types': db.analytics.get_activity_type_performance(),
-                'levels': db.analytics.get_user_activity_levels(),
-            }
+            data_sources, query_timings = DashboardDataService.fetch(db, params={'leaderboard': leaderboard_params})
 
         stats = {
             'avg_monthly_dist': 0,
@@ -150,29 +489,37 @@ class AnalyticsDashboard(View):
             stats['avg_monthly_dist'] = round(df_monthly['total_distance'].mean(), 1)
             stats['max_monthly_dist'] = round(df_monthly['total_distance'].max(), 1)
 
-        top_n = int(request.GET.get('top_n', 10))
-        min_dist = float(request.GET.get('min_dist', 0))
-
-        df_leaderboard = pd.DataFrame(data_sources['leaderboard'])
-        if not df_leaderboard.empty:
-            df_leaderboard = df_leaderboard[df_leaderboard['total_distance'] >= min_dist]
-            df_leaderboard = df_leaderboard.head(top_n)
-            data_sources['leaderboard'] = df_leaderboard.to_dict('records')
+        chart_params = {'top_n': top_n, 'min_dist': min_dist, 'window': window}
 
         if mode == 'bokeh':
-            bokeh_data = ChartService.build_bokeh_charts(data_sources)
+            bokeh_data = ChartService.build_bokeh_charts(data_sources, params=chart_params)
             return render(request, 'activities/dashboard_bokeh.html', {
                 'current_top_n': top_n,
                 'current_min_dist': min_dist,
+                'current_window': window,
+                'leaderboard_windows': LEADERBOARD_WINDOWS,
                 'stats': stats,
+                'bokeh_js_url': ChartService.bokeh_js_url(),
                 'bokeh_script': bokeh_data['script'],
                 'bokeh_divs': bokeh_data['divs'],
+                'query_timings': query_timings,
             })
         else:
-            charts = ChartService.build_plotly_charts(data_sources)
+            charts = ChartService.build_plotly_charts(data_sources, params=chart_params)
             return render(request, 'activities/dashboard_plotly.html', {
                 'charts': charts,
                 'stats': stats,
+                'plotly_js_url': ChartService.plotly_js_url(),
                 'current_top_n': top_n,
                 'current_min_dist': min_dist,
-            })
\ No newline at end of file
+                'current_window': window,
+                'leaderboard_windows': LEADERBOARD_WINDOWS,
+                'query_timings': query_timings,
+            })
+
+    def post(self, request):
+        if request.GET.get('mode') != 'benchmark':
+            return HttpResponseNotAllowed(['GET'])
+        if not request.user.is_staff:
+            return redirect_to_login(request.get_full_path())
+        return self.run_benchmark(request)
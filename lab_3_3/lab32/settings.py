@@ -1,3 +1,5 @@
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -61,6 +63,85 @@ DATABASES = {
     }
 }
 
+# Пул з'єднань (DJANGO_DB_POOL):
+#   psycopg  — вбудований пул Django 5.1 на psycopg_pool (pip install "psycopg[pool]");
+#   pgbouncer — з'єднання через PgBouncer у transaction mode (без серверних курсорів);
+#   off      — нове з'єднання на кожен запит.
+# Без змінної пул вмикається лише тоді, коли встановлені psycopg 3 і psycopg_pool (інакше, зокрема з psycopg2, — off)
+DATABASE_POOL_MODE = os.environ.get('DJANGO_DB_POOL') or (
+    'psycopg' if find_spec('psycopg') and find_spec('psycopg_pool') else 'off'
+)
+DATABASE_POOL_OPTIONS = {
+    'min_size': 2,
+    'max_size': 20,
+    'timeout': 10,          # скільки чекати на вільне з'єднання, с
+    'max_idle': 300,
+    'max_lifetime': 3600,
+}
+
+# Той самий сервер без пулу — для порівняння в бенчмарку; у тестах дзеркалить default
+DATABASES['unpooled'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+if DATABASE_POOL_MODE == 'psycopg':
+    # З CONN_HEALTH_CHECKS Django передає пулу ConnectionPool.check_connection:
+    # з'єднання перевіряється перед кожною видачею з пулу
+    DATABASES['default'].update({
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': DATABASE_POOL_OPTIONS},
+    })
+elif DATABASE_POOL_MODE == 'pgbouncer':
+    DATABASES['default'].update({
+        'PORT': os.environ.get('DJANGO_PGBOUNCER_PORT', '6432'),
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+    })
+
+# Дозволяє тимчасово спрямувати читання на інший alias (activities.routers.use_database)
+DATABASE_ROUTERS = ['activities.routers.ContextDatabaseRouter']
+
+# Кеш результатів аналітики. LocMemCache живе в межах одного процесу —
+# для кількох воркерів варто перейти на спільний бекенд (Redis/Memcached),
+# щоб інвалідація сигналами бачилась усіма процесами.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lab32-analytics',
+    }
+}
+
+ANALYTICS_CACHE_ALIAS = 'default'
+# TTL (секунди) для кожного методу AnalyticsRepository; 'default' — для решти
+ANALYTICS_CACHE_TIMEOUTS = {
+    'default': 300,
+    'get_social_activities': 120,
+}
+# Готові HTML/JS графіків дашборду (ключ включає хеш даних, тож TTL лише прибирає сміття)
+CHART_CACHE_TIMEOUT = 3600
+
+# Паралельне завантаження даних дашборду: потоків на один запит сторінки і загальний таймаут (с),
+# він же statement_timeout цих запитів на Postgres
+DASHBOARD_FETCH_WORKERS = 6
+DASHBOARD_FETCH_TIMEOUT = 10
+
+# Стрічка: максимальна довжина матеріалізованої стрічки (решту прибирає rebuild_feeds --trim)
+# і поріг підписників, з якого активності автора не розсилаються, а дочитуються при запиті
+FEED_MAX_LENGTH = 500
+FEED_FANOUT_LIMIT = 10000
+
+# Сегменти: трек має пройти в межах стількох метрів від кожної точки сегмента
+SEGMENT_MATCH_TOLERANCE_M = 25.0
+
+# Postgres: ActivityPoint розбита на діапазони по стільки id активностей; архів від'єднаних розділів (Parquet)
+ACTIVITY_POINT_PARTITION_SIZE = 100000
+ACTIVITY_POINT_ARCHIVE_DIR = BASE_DIR / 'point_archive'
+
+# Когортні представлення (refresh_cohort_views): старші за стільки секунд оновлюються навіть без нових рядків
+COHORT_VIEWS_MAX_AGE = 3600
+
+# Куди run_benchmarks та ?mode=benchmark зберігають JSON-звіти
+BENCHMARK_RESULTS_DIR = BASE_DIR / 'benchmark_results'
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -2,6 +2,6 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lab_3.2.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lab32.settings")
 
 application = get_wsgi_application()
\ No newline at end of file